@@ -4,7 +4,7 @@ import * as ImagePicker from 'expo-image-picker';
 import * as React from 'react';
 import { useState } from 'react';
 // Import UI components and utilities from React Native
-import { Alert, Button, Image, ScrollView, StyleSheet, View } from 'react-native';
+import { Alert, Button, Image, ScrollView, StyleSheet, Text, View } from 'react-native';
 // Import API configuration
 import { API_ENDPOINTS } from './config/api';
 
@@ -12,6 +12,9 @@ import { API_ENDPOINTS } from './config/api';
 export default function PhotoUploader() {
   // State to store photo URIs
   const [photos, setPhotos] = useState<string[]>([]);
+  // Items detected so far in the current scan, shown as they stream in
+  const [detections, setDetections] = useState<any[]>([]);
+  const [scanning, setScanning] = useState(false);
 
   // Request permission to use the camera
   const requestCameraPermission = async () => {
@@ -74,50 +77,92 @@ export default function PhotoUploader() {
     setPhotos(photos.filter(photo => photo !== uri));
   };
 
-  const sendToFlask = async () => {
-    try {
-      if (photos.length === 0) {
-        Alert.alert('Error', 'No photo to upload');
-        return;
-      }
-      const photoUri = photos[0]; // Only send the first photo for now
-      const formData = new FormData();
-      formData.append('image', {
+  // Upload the photos and read the NDJSON event stream from /photo_scanner/stream,
+  // rendering each detected item as soon as the server sends it
+  const sendToFlask = () => {
+    if (photos.length === 0) {
+      Alert.alert('Error', 'No photo to upload');
+      return;
+    }
+    const formData = new FormData();
+    photos.forEach(photoUri => {
+      formData.append('images', {
         uri: photoUri,
         type: 'image/jpeg',
         name: photoUri.split('/').pop() || 'photo.jpg',
       } as any); // React Native FormData workaround
+    });
 
-      console.log('Sending photo to:', API_ENDPOINTS.PHOTO_SCANNER);
-      const response = await fetch(API_ENDPOINTS.PHOTO_SCANNER, {
-        method: 'POST',
-        body: formData,
-        // Do NOT set Content-Type header!
-      });
-      
-      if (!response.ok) {
-        const text = await response.text();
-        throw new Error('Network response was not ok: ' + text);
+    console.log('Sending photos to:', API_ENDPOINTS.PHOTO_SCANNER_STREAM);
+    setDetections([]);
+    setScanning(true);
+
+    const found: any[] = [];
+    let streamError = '';
+    let readUpTo = 0;
+    const readEvents = (text: string) => {
+      // Only complete lines; the last one may still be arriving
+      const end = text.lastIndexOf('\n') + 1;
+      if (end <= readUpTo) return;
+      const lines = text.slice(readUpTo, end).split('\n');
+      readUpTo = end;
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.event === 'item') {
+          found.push(event.item);
+          setDetections([...found]);
+        } else if (event.event === 'image' && event.error) {
+          console.error(`Image ${event.index + 1} failed:`, event.error);
+        } else if (event.event === 'error') {
+          streamError = event.error;
+        }
+      }
+    };
+
+    // XMLHttpRequest rather than fetch: React Native hands over partial responses through onprogress
+    const xhr = new XMLHttpRequest();
+    xhr.open('POST', API_ENDPOINTS.PHOTO_SCANNER_STREAM);
+    xhr.onprogress = () => {
+      try {
+        readEvents(xhr.responseText);
+      } catch (error) {
+        console.error('Error reading scan events:', error);
       }
-      
-      const data = await response.json();
-      console.log('Response from server:', data);
-      
-      if (data.success && data.results && data.results.length > 0) {
-        const items = data.results[0]; // Get first image results
-        const itemNames = items.map((item: any) => item.item).join(', ');
+    };
+    xhr.onload = () => {
+      setScanning(false);
+      if (xhr.status !== 200) {
+        Alert.alert('Error', 'Network response was not ok: ' + xhr.responseText);
+        return;
+      }
+      try {
+        readEvents(xhr.responseText);
+      } catch (error) {
+        streamError = String((error as any)?.message || error);
+      }
+      if (streamError) {
+        Alert.alert('Error', streamError);
+        return;
+      }
+      if (found.length > 0) {
+        const itemNames = found.map((item: any) => item.item).join(', ');
         Alert.alert(
-          '✅ Scan Complete!', 
-          `Found ${items.length} items: ${itemNames}\n\nThese have been added to your expiring food list.`,
+          '✅ Scan Complete!',
+          `Found ${found.length} items: ${itemNames}\n\nThese have been added to your expiring food list.`,
           [{ text: 'OK', onPress: () => setPhotos([]) }] // Clear photos after success
         );
       } else {
         Alert.alert('Scan Complete', 'No items found in the image.');
       }
-    } catch (error) {
-      console.error('Error sending photo:', error);
-      Alert.alert('Error', String((error as any)?.message || error));
-    }
+    };
+    xhr.onerror = () => {
+      setScanning(false);
+      console.error('Error sending photos');
+      Alert.alert('Error', 'Could not reach the photo scanner');
+    };
+    // Do NOT set Content-Type header!
+    xhr.send(formData);
   };
 
   // Render the UI
@@ -138,6 +183,18 @@ export default function PhotoUploader() {
           </View>
         ))}
       </ScrollView>
+      {/* Items detected so far, filled in while the scan streams */}
+      {(scanning || detections.length > 0) && (
+        <View style={styles.detections}>
+          <Text style={styles.detectionsTitle}>{scanning ? 'Scanning…' : 'Detected'}</Text>
+          {detections.map((item, i) => (
+            <Text key={i}>
+              {item.item}
+              {item.expiration ? ` — ${item.expiration}` : ''}
+            </Text>
+          ))}
+        </View>
+      )}
     </View>
   );
 }
@@ -159,4 +216,12 @@ const styles = StyleSheet.create({
     height: 120,
     borderRadius: 10,
   },
+  detections: {
+    marginTop: 10,
+    alignSelf: 'stretch',
+  },
+  detectionsTitle: {
+    fontWeight: 'bold',
+    marginBottom: 4,
+  },
 });
\ No newline at end of file
@@ -20,12 +20,6 @@ interface ExpiringIngredient {
   category_or_nutrition: string;
 }
 
-interface RecipeResponse {
-  success: boolean;
-  recipe?: string;
-  error?: string;
-}
-
 interface Recipe {
   id: string;
   title: string;
@@ -40,6 +34,7 @@ export default function GenerateRecipeScreen() {
   const [recipes, setRecipes] = useState<Recipe[]>([]);
   const [selectedRecipe, setSelectedRecipe] = useState<Recipe | null>(null);
   const [loading, setLoading] = useState(false);
+  const [streamingText, setStreamingText] = useState("");
   const [expiringIngredients, setExpiringIngredients] = useState<
     ExpiringIngredient[]
   >([]);
@@ -70,54 +65,106 @@ export default function GenerateRecipeScreen() {
     }
   };
 
-  const generateRecipe = async () => {
-    setLoading(true);
-    try {
-      const requestBody = {
-        recipe_size: recipeSize,
-        dietary_restrictions: dietaryRestrictions,
-        cuisine_preference: cuisinePreference,
-        prioritize_expiring: prioritizeExpiring,
-      };
+  const addRecipe = (content: string) => {
+    // Extract recipe title from the AI-generated content
+    const recipeLines = content.split("\n");
+    const title = recipeLines[0].replace(/[🍳📊🌍⭐*#]/g, "").trim();
 
-      // Call the API to generate recipe from database
-      const data = (await apiCall(API_ENDPOINTS.GENERATE_RECIPE, {
-        method: "POST",
-        body: JSON.stringify(requestBody),
-      })) as RecipeResponse;
+    const newRecipe: Recipe = {
+      id: Date.now().toString(),
+      title: title,
+      content: content,
+      size: recipeSize,
+      dietary: dietaryRestrictions,
+      cuisine: cuisinePreference,
+      timestamp: new Date(),
+    };
 
-      if (data.success && data.recipe) {
-        // Extract recipe title from the AI-generated content
-        const recipeLines = data.recipe.split("\n");
-        const title = recipeLines[0].replace(/[🍳📊🌍⭐*#]/g, "").trim();
+    setRecipes((prev) => [newRecipe, ...prev]);
+  };
 
-        const newRecipe: Recipe = {
-          id: Date.now().toString(),
-          title: title,
-          content: data.recipe,
-          size: recipeSize,
-          dietary: dietaryRestrictions,
-          cuisine: cuisinePreference,
-          timestamp: new Date(),
-        };
+  const generateRecipe = () => {
+    const requestBody = {
+      recipe_size: recipeSize,
+      dietary_restrictions: dietaryRestrictions,
+      cuisine_preference: cuisinePreference,
+      prioritize_expiring: prioritizeExpiring,
+    };
 
-        setRecipes((prev) => [newRecipe, ...prev]);
+    setLoading(true);
+    setStreamingText("");
+
+    // The recipe streams in as the model writes it (NDJSON events, see
+    // /generate-recipe/stream): chunk {text}, reset, done {recipe}, error {error}
+    let text = "";
+    let recipe = "";
+    let streamError = "";
+    let readUpTo = 0;
+    const readEvents = (responseText: string) => {
+      // Only complete lines; the last one may still be arriving
+      const end = responseText.lastIndexOf("\n") + 1;
+      if (end <= readUpTo) return;
+      const lines = responseText.slice(readUpTo, end).split("\n");
+      readUpTo = end;
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.event === "chunk") {
+          text += event.text;
+        } else if (event.event === "reset") {
+          text = ""; // the model failed part-way; the template recipe follows
+        } else if (event.event === "done") {
+          recipe = event.recipe;
+        } else if (event.event === "error") {
+          streamError = event.error;
+        }
+      }
+      setStreamingText(text);
+    };
+
+    // XMLHttpRequest rather than fetch: React Native hands over partial responses through onprogress
+    const xhr = new XMLHttpRequest();
+    xhr.open("POST", API_ENDPOINTS.GENERATE_RECIPE_STREAM);
+    xhr.setRequestHeader("Content-Type", "application/json");
+    xhr.onprogress = () => {
+      try {
+        readEvents(xhr.responseText);
+      } catch (error) {
+        console.error("Error reading recipe events:", error);
+      }
+    };
+    xhr.onload = () => {
+      setLoading(false);
+      setStreamingText("");
+      if (xhr.status !== 200) {
+        Alert.alert("Error", "Failed to generate recipe from database");
+        return;
+      }
+      try {
+        readEvents(xhr.responseText);
+      } catch (error) {
+        streamError = String((error as any)?.message || error);
+      }
+      if (recipe) {
+        addRecipe(recipe);
         Alert.alert("Success!", "New recipe generated successfully!");
       } else {
         Alert.alert(
           "Error",
-          data.error || "Failed to generate recipe from database"
+          streamError || "Failed to generate recipe from database"
         );
       }
-    } catch (error) {
+    };
+    xhr.onerror = () => {
+      setLoading(false);
+      setStreamingText("");
       Alert.alert(
         "Connection Error",
         "Unable to connect to the recipe database. Please ensure the backend server is running."
       );
-      console.error("Recipe generation error:", error);
-    } finally {
-      setLoading(false);
-    }
+      console.error("Recipe generation error: network request failed");
+    };
+    xhr.send(JSON.stringify(requestBody));
   };
 
   const resetOptions = () => {
@@ -191,6 +238,17 @@ export default function GenerateRecipeScreen() {
           </Button>
         </View>
 
+        {/* Recipe being written */}
+        {loading && streamingText !== "" && (
+          <View style={styles.recipesContainer}>
+            <Card style={styles.recipeCard} elevation={0}>
+              <Card.Content>
+                <Text style={styles.recipeText}>{streamingText}</Text>
+              </Card.Content>
+            </Card>
+          </View>
+        )}
+
         {/* Generated Recipes */}
         {recipes.length > 0 && (
           <View style={styles.recipesContainer}>
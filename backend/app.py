@@ -2,22 +2,35 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sqlite3
 from datetime import datetime, timedelta
+import io
 import os
+import sys
+
+backend_path = os.path.dirname(os.path.abspath(__file__))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+import database
+import ingredient_search
+import inventory
+import inventory_sync
+import food_data  # creates the food tables, search index and change log
+import expiry_cache
+import bulk_ingredients
+import scan_pipeline
+import uploads
 
 app = Flask(__name__)
+app.request_class = uploads.SpooledRequest  # keep photo uploads in memory
 CORS(app)
 
 # --- Database paths ---
-USER_DB = "users.db"
+USER_DB = database.USER_DB
 # Use the same database as food_data.py (root foodapp.db)
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # Go up to project root
-FOOD_DB = os.path.join(BASE_DIR, "foodapp.db")
+FOOD_DB = database.FOOD_DB
 
 # --- Init user database ---
-def init_user_db():
-    conn = sqlite3.connect(USER_DB)
-    cursor = conn.cursor()
-    cursor.execute("""
+def init_user_db(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE,
@@ -25,10 +38,9 @@ def init_user_db():
             password TEXT
         )
     """)
-    conn.commit()
-    conn.close()
 
-init_user_db()
+# Created before users.db is first used; database.bootstrap() in __main__ does it up front
+database.register_schema(init_user_db, USER_DB)
 
 # ========================
 # 🔑 AUTH ROUTES
@@ -45,15 +57,12 @@ def signup():
         return jsonify({"error": "Missing fields"}), 400
 
     try:
-        conn = sqlite3.connect(USER_DB)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
-            (username, email, password),
-        )
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
+        with database.user_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                (username, email, password),
+            )
+            user_id = cursor.lastrowid
         return jsonify({"user_id": user_id}), 200
     except sqlite3.IntegrityError:
         return jsonify({"error": "Username or email already exists"}), 400
@@ -65,14 +74,11 @@ def login():
     username = data.get("username")
     password = data.get("password")
 
-    conn = sqlite3.connect(USER_DB)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id FROM users WHERE username = ? AND password = ?",
-        (username, password),
-    )
-    row = cursor.fetchone()
-    conn.close()
+    with database.user_connection() as conn:
+        row = conn.execute(
+            "SELECT id FROM users WHERE username = ? AND password = ?",
+            (username, password),
+        ).fetchone()
 
     if row:
         return jsonify({"user_id": row[0]}), 200
@@ -89,22 +95,17 @@ def logout():
 # 🥦 FOOD ROUTES
 # ========================
 
-def get_food_info(name):
-    conn = sqlite3.connect(FOOD_DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, category, date_added, expire_days FROM food WHERE LOWER(name) = LOWER(?)", (name,))
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        name, category, date_added, expire_days = row
-        date_added_dt = datetime.strptime(date_added, "%Y-%m-%d")
-        expire_date = date_added_dt + timedelta(days=expire_days)
-        return {
-            "name": name,
-            "category": category,
-            "expiration": expire_date.strftime("%Y-%m-%d")
+def get_food_info(name, limit=1):
+    """Best matches for `name` from the ingredient search index, best first."""
+    return [
+        {
+            "name": match["name"],
+            "category": match["category"],
+            "expiration": match["expires_on"],
+            "score": match["score"],
         }
-    return None
+        for match in ingredient_search.search(name, source="food", limit=limit)
+    ]
 
 
 @app.route("/search", methods=["GET"])
@@ -112,58 +113,70 @@ def search():
     query = request.args.get("q", "")
     if not query:
         return jsonify({"error": "No query provided"}), 400
-    result = get_food_info(query)
-    if result:
-        return jsonify(result)
+    limit = request.args.get("limit", default=ingredient_search.DEFAULT_LIMIT, type=int)
+    results = get_food_info(query, limit)
+    if results:
+        return jsonify({**results[0], "results": results})
     else:
         return jsonify({"error": "Not found"}), 404
 
 
 @app.route("/all-ingredients", methods=["GET"])
+@inventory_sync.conditional()
 def all_ingredients():
+    """
+    Non-expired ingredients, soonest expiry first.
+
+    Optional query args: limit & cursor (keyset pagination, response becomes
+    {"items": [...], "next_cursor": ...}), fields=name,expiration,... and category=.
+    """
     print("DEBUG: /all-ingredients endpoint called")
-    conn = sqlite3.connect(FOOD_DB)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, category, date_added, expire_days FROM food")
-    rows = cursor.fetchall()
+    try:
+        fields = inventory.parse_fields(request.args.get("fields"))
+        cursor = request.args.get("cursor")
+        paginate = "limit" in request.args or cursor is not None
+        limit = inventory.parse_limit(request.args.get("limit", type=int)) if paginate else None
+        today = datetime.now().date()
+        yesterday = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+        # Only include foods that haven't expired: an index range scan on expires_on
+        rows, next_cursor = inventory.food_page(yesterday, limit, cursor, request.args.get("category"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     print(f"DEBUG: Retrieved {len(rows)} rows from database")
-    conn.close()
     
-    result = []
-    today = datetime.now().date()
-    
-    for name, category, date_added, expire_days in rows:
-        try:
-            date_added_dt = datetime.strptime(date_added, "%Y-%m-%d")
-            expire_date = date_added_dt + timedelta(days=expire_days)
-            days_left = (expire_date.date() - today).days
-            
-            # Only include foods that haven't expired
-            if days_left >= 0:
-                result.append({
-                    "name": name,
-                    "category": category,
-                    "expiration": expire_date.strftime("%Y-%m-%d"),
-                    "days_until_expiry": days_left
-                })
-        except Exception as e:
-            print(f"DEBUG: Error processing {name}: {e}")
-            continue
+    result = [
+        inventory.project({
+            "id": food_id,
+            "name": name,
+            "category": category,
+            "expiration": expires_on,
+            "days_until_expiry": (datetime.strptime(expires_on, "%Y-%m-%d").date() - today).days
+        }, fields)
+        for food_id, name, category, expires_on in rows
+    ]
     
     print(f"DEBUG: Returning {len(result)} non-expired ingredients")
+    if paginate:
+        return jsonify({"items": result, "next_cursor": next_cursor})
     return jsonify(result)
 
 
+@app.route("/inventory/changes", methods=["GET"])
+def inventory_changes():
+    """Inserts/updates/deletes since a client's last seen inventory version."""
+    since = request.args.get("since", default=0, type=int)
+    user_id = request.args.get("user_id", type=int)
+    return jsonify(inventory_sync.changes_since(inventory_sync.inventory_name(user_id), since))
+
+
 @app.route("/delete-ingredient", methods=["DELETE"])
 def delete_ingredient():
     name = request.args.get("name")
     if not name:
         return jsonify({"error": "No name provided"}), 400
-    conn = sqlite3.connect(FOOD_DB)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM food WHERE name = ?", (name,))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food WHERE name = ?", (name,))
+    expiry_cache.invalidate("food")
     return jsonify({"success": True})
 
 from datetime import datetime
@@ -186,17 +199,17 @@ def add_ingredient():
         print("Date conversion error:", e)
         return jsonify({"error": "Invalid date format"}), 400
 
-    date_added = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    date_added = now.strftime("%Y-%m-%d")
+    expires_on = (now + timedelta(days=expire_days)).strftime("%Y-%m-%d")
 
     try:
-        conn = sqlite3.connect(FOOD_DB)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO food (name, category, expire_days, date_added)
-            VALUES (?, ?, ?, ?)
-        """, (name, category, expire_days, date_added))
-        conn.commit()
-        conn.close()
+        with database.connection() as conn:
+            conn.execute("""
+                INSERT INTO food (name, category, expire_days, date_added, expires_on)
+                VALUES (?, ?, ?, ?, ?)
+            """, (name, category, expire_days, date_added, expires_on))
+        expiry_cache.invalidate("food")
         return jsonify({
             "success": True,
             "name": name,
@@ -208,6 +221,28 @@ def add_ingredient():
         print("DB Error:", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/ingredients/bulk", methods=["POST"])
+def ingredients_bulk():
+    """Adds, deletes and updates from a JSON array or NDJSON stream, in one transaction."""
+    try:
+        if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+            # Buffered: readline() on the raw request stream reads a byte at a time
+            items = bulk_ingredients.parse_ndjson_items(io.BufferedReader(request.stream))
+        else:
+            items = bulk_ingredients.parse_json_items(request.get_data())
+        results, applied = bulk_ingredients.apply_bulk(items)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print("DB Error:", e)
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "success": applied == len(items),
+        "applied": applied,
+        "failed": len(items) - applied,
+        "results": results,
+    })
+
 # ========================
 # 🍳 RECIPE ROUTES
 # ========================
@@ -248,32 +283,30 @@ def photo_scanner():
     try:
         import sys
         import os
-        import tempfile
         sys.path.append(os.path.dirname(__file__))
-        from scanner import analyze_image
-        
+        import scanner
+
+        def analyze(image):
+            return scanner.analyze_image(image, save=False)
+
         # Check if request has files or JSON
         if request.files:
-            # Handle file upload (from mobile app)
+            # Handle file upload (from mobile app); the uploads are analysed
+            # from memory, without temp files (see uploads.py)
+            image_files = [request.files[file_key] for file_key in request.files if request.files[file_key]]
+
+            # Analyze the images in parallel; results come back in upload order
+            scans = scan_pipeline.scan_images(image_files, analyze,
+                                              max_concurrency=request.args.get("concurrency", type=int))
+
             all_detected_items = []
-            
-            for file_key in request.files:
-                file = request.files[file_key]
-                if file:
-                    # Save to temporary file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                        file.save(temp_file.name)
-                        temp_path = temp_file.name
-                    
-                    try:
-                        # Analyze the image
-                        detected_items = analyze_image(temp_path)
-                        all_detected_items.extend(detected_items)
-                    finally:
-                        # Clean up temp file
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
-            
+            for scan in scans:
+                if "error" in scan:
+                    raise RuntimeError(scan["error"])
+            for scan in scans:
+                scanner.save_items(scan["items"])
+                all_detected_items.extend(scan["items"])
+
             return jsonify({
                 'results': [all_detected_items],  # Wrap in array for compatibility
                 'detected_items': all_detected_items,
@@ -288,16 +321,16 @@ def photo_scanner():
             if not paths:
                 return jsonify({'error': 'No image paths or files provided', 'success': False}), 400
             
+            # Skip paths that don't exist, analyze the rest in parallel
+            scans = scan_pipeline.scan_images([p for p in paths if os.path.exists(p)], analyze)
+            for scan in scans:
+                if "error" in scan:
+                    raise RuntimeError(scan["error"])
+
             all_detected_items = []
-            
-            for image_path in paths:
-                # Check if file exists
-                if not os.path.exists(image_path):
-                    continue
-                    
-                # Analyze the image
-                detected_items = analyze_image(image_path)
-                all_detected_items.extend(detected_items)
+            for scan in scans:
+                scanner.save_items(scan["items"])
+                all_detected_items.extend(scan["items"])
             
             return jsonify({
                 'detected_items': all_detected_items,
@@ -311,6 +344,7 @@ def photo_scanner():
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route("/expiring-ingredients", methods=["GET"])
+@inventory_sync.conditional(lambda: inventory_sync.inventory_name(request.args.get("user_id", type=int)))
 def expiring_ingredients():
     """Get ingredients that are expiring soon."""
     try:
@@ -343,8 +377,9 @@ def expiring_ingredients():
 
 @app.route("/", methods=["GET"])
 def home():
-    return "✅ Unified Flask API running! Available: /signup, /login, /logout, /search, /all-ingredients"
+    return "✅ Unified Flask API running! Available: /signup, /login, /logout, /search, /all-ingredients, /inventory/changes, /ingredients/bulk"
 
 if __name__ == "__main__":
+    database.bootstrap()
     app.run(debug=True, port=5000, use_reloader=False)
 
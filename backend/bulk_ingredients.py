@@ -0,0 +1,198 @@
+import json
+import math
+from datetime import datetime, timedelta
+import database
+import expiry_cache
+import catalog_index
+
+# Batched writes to the food inventory for /ingredients/bulk.
+#
+# A request is a list of operations:
+#   {"op": "add", "name": ..., "category": ..., "expiration_date": "YYYY-MM-DD"}
+#       (or "expire_days" instead of a date; with neither, the catalog default
+#       for the name, or DEFAULT_EXPIRE_DAYS)
+#   {"op": "delete", "name": ...}  or  {"op": "delete", "id": ...}
+#   {"op": "update", "id": ..., "name"?, "category"?, "expiration_date"?}
+#
+# Every operation is validated up front. The valid ones are applied in order
+# inside ONE transaction, through a handful of statements the connection
+# prepares once and reuses, so a 40-item grocery haul costs one commit
+# instead of 40. Each operation runs on its own so an add reports its row's
+# id (lastrowid) and a delete or update that matches no row reports "Not
+# found". Invalid or not-found operations get an error in their result slot
+# and don't stop the rest. The change-log triggers bump the inventory
+# version for every row, so ETags and /inventory/changes stay correct.
+
+MAX_BULK_ITEMS = 5000
+DEFAULT_EXPIRE_DAYS = 7
+MAX_EXPIRE_DAYS = 100 * 365  # longer is a data error, not a shelf life (as in import_csv)
+
+ADD_SQL = "INSERT INTO food (name, date_added, expire_days, category, expires_on) VALUES (?, ?, ?, ?, ?)"
+DELETE_BY_NAME_SQL = "DELETE FROM food WHERE name = ?"
+DELETE_BY_ID_SQL = "DELETE FROM food WHERE id = ?"
+# One statement for every partial update: NULL parameters leave the column alone,
+# and a new expiry keeps expire_days = expires_on - date_added.
+UPDATE_SQL = """
+    UPDATE food SET
+        name = COALESCE(?, name),
+        category = COALESCE(?, category),
+        expire_days = COALESCE(CAST(julianday(?) - julianday(date_added) AS INTEGER), expire_days),
+        expires_on = COALESCE(?, expires_on)
+    WHERE id = ?
+"""
+
+
+def parse_json_items(body):
+    """Items from a JSON array body (or {"items": [...]}); raises ValueError if malformed."""
+    try:
+        data = json.loads(body or b"null")
+    except ValueError:
+        raise ValueError("Body is not valid JSON")
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of operations")
+    return data
+
+
+def parse_ndjson_items(lines):
+    """
+    Items from an NDJSON stream, one operation per line. Blank lines are
+    skipped; a line that isn't valid JSON becomes an {"error": ...} placeholder
+    so it still gets its own result slot.
+    """
+    items = []
+    for line_no, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append({"op": None, "error": f"Line {line_no} is not valid JSON"})
+        if len(items) > MAX_BULK_ITEMS:
+            break  # apply_bulk rejects the batch; don't read the rest
+    return items
+
+
+def _expiry(item, now):
+    """
+    (expire_days, expires_on) for an add, matching /add_ingredient's date
+    handling; raises ValueError with the reason for an unusable expiry.
+    """
+    if item.get("expiration_date"):
+        try:
+            expire_date = datetime.strptime(item["expiration_date"], "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ValueError("Invalid expiration_date or expire_days")
+        expire_days = max((expire_date - now).days, 0)
+    elif item.get("expire_days") is not None:
+        try:
+            days = float(item["expire_days"])
+        except (TypeError, ValueError, OverflowError):  # OverflowError: a huge int
+            raise ValueError("Invalid expiration_date or expire_days")
+        if not math.isfinite(days) or not 0 <= days <= MAX_EXPIRE_DAYS:  # 1e400 is inf, negatives, 10**9
+            raise ValueError(f"expire_days must be a number from 0 to {MAX_EXPIRE_DAYS}")
+        expire_days = int(days)
+    else:
+        expire_days = catalog_index.default_days(item.get("name"), DEFAULT_EXPIRE_DAYS)
+    if expire_days > MAX_EXPIRE_DAYS:
+        raise ValueError(f"expiration_date is more than {MAX_EXPIRE_DAYS} days away")
+    return expire_days, (now + timedelta(days=expire_days)).strftime("%Y-%m-%d")
+
+
+def _row_id(value):
+    """A food row id from an operation; raises ValueError unless it's a whole number SQLite can hold."""
+    try:
+        row_id = int(value)
+    except (TypeError, ValueError, OverflowError):  # OverflowError: 1e400
+        raise ValueError("Invalid id")
+    if (isinstance(value, float) and value != row_id) or not 0 < row_id < 2 ** 63:
+        raise ValueError("Invalid id")
+    return row_id
+
+
+def _prepare(item, now, today):
+    """Validate one operation and return (sql, params); raises ValueError with the reason."""
+    if not isinstance(item, dict):
+        raise ValueError("Operation must be an object")
+    if item.get("error"):
+        raise ValueError(item["error"])
+    op = item.get("op", "add")
+
+    if op == "add":
+        if not item.get("name"):
+            raise ValueError("Missing name")
+        expire_days, expires_on = _expiry(item, now)
+        return ADD_SQL, (item["name"], today, expire_days, item.get("category"), expires_on)
+
+    if op == "delete":
+        if item.get("id") is not None:
+            return DELETE_BY_ID_SQL, (_row_id(item["id"]),)
+        if item.get("name"):
+            return DELETE_BY_NAME_SQL, (item["name"],)
+        raise ValueError("Delete needs an id or a name")
+
+    if op == "update":
+        if item.get("id") is None:
+            raise ValueError("Update needs an id")
+        expires_on = item.get("expiration_date")
+        if expires_on:
+            try:
+                datetime.strptime(expires_on, "%Y-%m-%d")
+            except (TypeError, ValueError):
+                raise ValueError("Invalid expiration_date")
+        if not any(item.get(f) for f in ("name", "category", "expiration_date")):
+            raise ValueError("Nothing to update")
+        return UPDATE_SQL, (item.get("name"), item.get("category"), expires_on, expires_on, _row_id(item["id"]))
+
+    raise ValueError(f"Unknown op: {op}")
+
+
+def apply_bulk(items):
+    """
+    Apply a batch of add/delete/update operations to the food inventory in
+    one transaction.
+
+    Returns:
+        (results, applied) where results has one dict per input item, in
+        order, with `index`, `op`, `ok` and either `error` or, for adds, the
+        new row's `id`, and applied counts the operations that took effect.
+    """
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValueError(f"At most {MAX_BULK_ITEMS} operations per request")
+
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    results = []
+    pending = []  # (result, sql, params) for the valid operations, in order
+    for index, item in enumerate(items):
+        op = item.get("op", "add") if isinstance(item, dict) else None
+        result = {"index": index, "op": op, "ok": True}
+        results.append(result)
+        try:
+            sql, params = _prepare(item, now, today)
+        except (TypeError, ValueError, OverflowError) as e:
+            result["ok"] = False
+            result["error"] = str(e)
+            continue
+        pending.append((result, sql, params))
+
+    if not pending:
+        return results, 0
+
+    applied = 0
+    with database.connection() as conn:
+        for result, sql, params in pending:
+            cursor = conn.execute(sql, params)
+            if result["op"] == "add":
+                result["id"] = cursor.lastrowid
+            elif cursor.rowcount == 0:
+                result["ok"] = False
+                result["error"] = "Not found"
+                continue
+            applied += 1
+    expiry_cache.invalidate("food")
+    return results, applied
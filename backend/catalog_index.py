@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+import database
+import shelf_life_store
+
+# In-memory index of default shelf lives, for items added without an
+# expiration date (/add_ingredient, /ingredients/bulk, add_user_food) and as
+# the scanner's first fallback before any shelf-life lookup.
+#
+# The whole catalog is held as one dict keyed by shelf_life_store.normalize_name,
+# so "Tomatoes", "tomato" and " TOMATO! " all hit the same entry. A name
+# with no entry of its own falls back to its trailing words ("roma tomatoes"
+# -> "tomato"), which lets brand and variety prefixes resolve too. food_data.csv
+# seeds fill in names the catalog doesn't have; catalog values win.
+#
+# Triggers on food_catalog bump catalog_version on every write, whoever
+# makes it (add_to_catalog, import_csv.py, a sqlite shell). Lookups check
+# that counter at most every CHECK_INTERVAL seconds and reload the dict when
+# it moved; writers in this process call invalidate() to reload right away.
+
+CHECK_INTERVAL = float(os.getenv("EXPIREASE_CATALOG_CHECK_INTERVAL", "5"))
+
+
+def ensure_catalog_version(conn):
+    """Create the catalog_version counter and the food_catalog triggers that bump it."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)")
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='food_catalog'").fetchone():
+        return  # food_data not imported yet; this runs again when it is
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS food_catalog_version_{event.lower()} AFTER {event} ON food_catalog BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            END
+        """)
+
+
+database.register_schema(ensure_catalog_version, on_tables=True)
+
+
+class CatalogIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days = None       # normalized name -> default days
+        self._version = None    # catalog_version the dict was built from
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def _load(self, conn):
+        days = {}
+        try:
+            for key, value in conn.execute(
+                "SELECT name_key, days FROM shelf_life WHERE source = 'csv' AND days IS NOT NULL"
+            ):
+                days[key] = value
+        except sqlite3.OperationalError:
+            pass  # no shelf_life table yet
+        try:
+            for name, value in conn.execute(
+                "SELECT name, default_expire_days FROM food_catalog WHERE default_expire_days IS NOT NULL"
+            ):
+                key = shelf_life_store.normalize_name(name)
+                if key:
+                    days[key] = value
+        except sqlite3.OperationalError:
+            pass  # no food_catalog table yet
+        return days
+
+    def _index(self):
+        days = self._days
+        if days is not None and time.monotonic() - self._checked_at < CHECK_INTERVAL:
+            return days
+        with self._lock:
+            if self._days is not None and time.monotonic() - self._checked_at < CHECK_INTERVAL:
+                return self._days
+            with database.connection() as conn:
+                try:
+                    version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()
+                except sqlite3.OperationalError:
+                    version = None
+                if self._days is None or version is None or version != self._version:
+                    self._days = self._load(conn)
+                    self._version = version
+                    self.loads += 1
+            self._checked_at = time.monotonic()
+            return self._days
+
+    def lookup(self, name):
+        """Default shelf life in days for `name`, or None when the catalog has nothing close."""
+        words = shelf_life_store.normalize_name(name).split()
+        if not words:
+            return None
+        days = self._index()
+        for start in range(len(words)):
+            value = days.get(" ".join(words[start:]))
+            if value is not None:
+                return value
+        return None
+
+    def default_days(self, name, fallback):
+        days = self.lookup(name)
+        return days if days is not None else fallback
+
+    def invalidate(self):
+        """Rebuild on the next lookup (call after writing food_catalog in this process)."""
+        with self._lock:
+            self._days = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._days) if self._days is not None else 0,
+                "version": self._version,
+                "loads": self.loads,
+            }
+
+
+_index = CatalogIndex()
+lookup = _index.lookup
+default_days = _index.default_days
+invalidate = _index.invalidate
+stats = _index.stats
@@ -1,8 +1,9 @@
 from flask import Flask, request, jsonify
-from datetime import datetime
+from datetime import datetime, timedelta
 import sqlite3
 import os
 from flask_cors import CORS
+import migrate_expires_on
 
 app = Flask(__name__)
 CORS(app)
@@ -24,7 +25,8 @@ def init_db():
         name TEXT,
         date_added TEXT,
         expire_days INTEGER,
-        category TEXT
+        category TEXT,
+        expires_on TEXT
     )
     """)
 
@@ -35,6 +37,7 @@ def init_db():
     )
     """)
 
+    migrate_expires_on.migrate(conn)
     conn.commit()
     conn.close()
 
@@ -51,12 +54,13 @@ def add_ingredient():
 
     today = datetime.now().strftime("%Y-%m-%d")
     expire_days = (datetime.strptime(expiration_date, "%Y-%m-%d") - datetime.strptime(today, "%Y-%m-%d")).days
+    expires_on = (datetime.strptime(today, "%Y-%m-%d") + timedelta(days=expire_days)).strftime("%Y-%m-%d")
 
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO food (name, date_added, expire_days, category) VALUES (?, ?, ?, ?)",
-        (name, today, expire_days, category)
+        "INSERT INTO food (name, date_added, expire_days, category, expires_on) VALUES (?, ?, ?, ?, ?)",
+        (name, today, expire_days, category, expires_on)
     )
     conn.commit()
     conn.close()
@@ -1,6 +1,7 @@
 import sqlite3
 from datetime import datetime, timedelta
 import os
+import migrate_expires_on
 
 BASE_DIR = os.path.dirname(__file__)
 DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
@@ -19,7 +20,8 @@ CREATE TABLE IF NOT EXISTS user_food (
     food_name TEXT,
     date_added TEXT,
     expire_days INTEGER,
-    nutrition TEXT
+    nutrition TEXT,
+    expires_on TEXT
 )
 """)
 
@@ -32,6 +34,7 @@ CREATE TABLE IF NOT EXISTS user_favorites (
 )
 """)
 
+migrate_expires_on.migrate(conn)
 conn.commit()
 conn.close()
 
@@ -39,12 +42,14 @@ conn.close()
 def add_user_food(user_id, food_name, expire_days=None, nutrition=""):
     conn = get_connection()
     cursor = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
     if expire_days is None:
         expire_days = 3  # default expire days
+    expires_on = (now + timedelta(days=expire_days)).strftime("%Y-%m-%d")
     cursor.execute(
-        "INSERT INTO user_food (user_id, food_name, date_added, expire_days, nutrition) VALUES (?, ?, ?, ?, ?)",
-        (user_id, food_name, today, expire_days, nutrition)
+        "INSERT INTO user_food (user_id, food_name, date_added, expire_days, nutrition, expires_on) VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, food_name, today, expire_days, nutrition, expires_on)
     )
     conn.commit()
     conn.close()
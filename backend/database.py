@@ -0,0 +1,210 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Shared data-access layer: every module that touches foodapp.db or users.db
+# borrows a pre-opened connection from here instead of calling sqlite3.connect().
+#
+# Modules don't create their tables at import time. They register_schema()
+# a setup function instead, and ensure_schema() runs the pending setups for
+# a database once, before the first connection to it is handed out (or up
+# front, from bootstrap()), so importing a module never touches the disk.
+# A setup that indexes or hooks onto another module's tables (expires_on,
+# the search index, the change log) registers with on_tables=True: it runs
+# after the others, and again whenever a later import adds tables, so it
+# doesn't matter which module was imported first.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # project root
+FOOD_DB = os.environ.get("EXPIREASE_FOOD_DB", os.path.join(BASE_DIR, "foodapp.db"))
+USER_DB = os.environ.get("EXPIREASE_USER_DB", os.path.join(BASE_DIR, "users.db"))
+
+POOL_SIZE = int(os.environ.get("EXPIREASE_DB_POOL_SIZE", "8"))
+ACQUIRE_TIMEOUT = 30          # seconds to wait for a free connection
+BUSY_TIMEOUT_MS = 5000        # how long a writer waits on a locked database
+STATEMENT_CACHE_SIZE = 256    # prepared statements kept per connection
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers no longer block on writers
+    "PRAGMA synchronous=NORMAL",    # safe with WAL, one fsync per checkpoint
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache per connection
+    "PRAGMA mmap_size=67108864",    # 64 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pre-opened SQLite connections for one database file."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def _open(self):
+        # check_same_thread=False is safe because a connection is only ever
+        # handed to one thread at a time by acquire()/release().
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        if self._closed:
+            raise RuntimeError(f"Connection pool for {self.path} is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free database connection for {self.path} after {timeout}s")
+
+    def release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error."""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_schemas = {}                     # database path -> setup(conn) functions not run yet
+_table_setups = {}                # database path -> on_tables setups, re-run after new tables
+_tables_changed = set()           # paths whose on_tables setups are due
+_schema_lock = threading.RLock()  # re-entrant: a setup may borrow connections itself
+_schema_running = set()           # paths whose setups are running (in the thread holding the lock)
+
+
+def get_pool(path=None):
+    """Return the process-wide pool for a database file (foodapp.db by default)."""
+    path = os.path.abspath(path or FOOD_DB)
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = ConnectionPool(path)
+    return pool
+
+
+def register_schema(setup, path=None, on_tables=False):
+    """
+    Have setup(conn) create its tables in foodapp.db (or `path`) before the
+    database is first used. With on_tables=True it works on tables other
+    modules create, so it must be safe to run repeatedly and skip tables
+    that don't exist yet.
+    """
+    path = os.path.abspath(path or FOOD_DB)
+    with _schema_lock:
+        if on_tables:
+            _table_setups.setdefault(path, []).append(setup)
+        else:
+            _schemas.setdefault(path, []).append(setup)
+        _tables_changed.add(path)
+
+
+def ensure_schema(path=None):
+    """Run the setups registered for foodapp.db (or `path`) that haven't run yet, in order, once each."""
+    path = os.path.abspath(path or FOOD_DB)
+    if path not in _tables_changed:
+        return
+    with _schema_lock:
+        if path in _schema_running:
+            return  # a setup below is borrowing a connection
+        if path not in _tables_changed:
+            return  # another thread got here first
+        _schema_running.add(path)
+        try:
+            pending = _schemas.get(path, [])
+            while pending:
+                with get_pool(path).connection() as conn:
+                    pending[0](conn)
+                pending.pop(0)  # only once it worked; a failed setup runs again next time
+            if _table_setups.get(path):
+                with get_pool(path).connection() as conn:
+                    for setup in _table_setups[path]:
+                        setup(conn)
+            _tables_changed.discard(path)  # not on failure: everything due runs again next time
+        finally:
+            _schema_running.discard(path)
+
+
+def bootstrap():
+    """Create every registered table now, e.g. at server start, instead of on first use."""
+    for path in list(_tables_changed):
+        ensure_schema(path)
+
+
+def connection(path=None):
+    """Context manager yielding a pooled connection to foodapp.db (or `path`)."""
+    ensure_schema(path)
+    return get_pool(path).connection()
+
+
+def user_connection():
+    """Context manager yielding a pooled connection to users.db."""
+    ensure_schema(USER_DB)
+    return get_pool(USER_DB).connection()
+
+
+def close_all():
+    """Close every pool, e.g. before deleting a database file in tests."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def _migrate_expires_on(conn):
+    # Registered here rather than by migrate_expires_on, so a module that
+    # reads expires_on without importing it (recipe_maker) still gets the
+    # column on a database created before it existed. Imported on first use:
+    # migrate_expires_on imports this module.
+    import migrate_expires_on
+    migrate_expires_on.migrate(conn)
+
+
+register_schema(_migrate_expires_on, on_tables=True)
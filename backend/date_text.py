@@ -0,0 +1,144 @@
+import calendar
+import re
+from datetime import datetime, timedelta
+
+# Expiration text -> date, for the "Expiration:" lines the scanner's model
+# returns and anything else a label might say.
+#
+# One precompiled pattern holds every form we understand as named
+# alternatives, so a line is scanned once and the alternative that matched
+# (match.lastgroup) picks the converter; there is no strptime-and-catch loop.
+# The leftmost match wins, so "2025-10-05 (7 days)" is read as the date.
+# Forms, with the confidence each one gets:
+#
+#   iso         2025-10-05, 2025/10/05                         0.95
+#   numeric     10/15/2025, 15.10.25 (US or EU: day first     0.9 / 0.6 when both
+#               only when the first part can't be a month)     parts could be the month
+#   day_month   15 Oct 2025, 15th of October                   0.9 / 0.8 without a year
+#   month_day   best by Oct 15, October 15, 2025               0.9 / 0.8 without a year
+#   month_year  Dec 2025 (the last day of the month)           0.7
+#   range       3-5 days, 1 to 2 weeks (the midpoint)          0.75
+#   duration    7 days, two weeks, a month                     0.85
+#   relative    today, tomorrow, next week, a few days...      0.9 exact / 0.5 vague
+#
+# A date without a year is taken as this year, or next year when that
+# would put it more than ROLLOVER_DAYS in the past.
+
+ROLLOVER_DAYS = 180
+UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+# (days from today, confidence)
+RELATIVE = {
+    "today": (0, 0.9), "tonight": (0, 0.9), "tomorrow": (1, 0.9), "day after tomorrow": (2, 0.9),
+    "next week": (7, 0.5), "next month": (30, 0.5),
+    "a couple days": (2, 0.5), "a couple of days": (2, 0.5), "a few days": (3, 0.5), "several days": (5, 0.5),
+}
+
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+_COUNT = r"\d+|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve"
+_UNIT = r"day|week|month|year"
+_RELATIVE = "|".join(sorted((re.escape(phrase).replace(r"\ ", r"\s+") for phrase in RELATIVE), key=len, reverse=True))
+
+PATTERN = re.compile(rf"""
+    (?P<iso>\b(?P<iso_y>\d{{4}})[-/.](?P<iso_m>\d{{1,2}})[-/.](?P<iso_d>\d{{1,2}})\b)
+  | (?P<numeric>\b(?P<num_a>\d{{1,2}})[-/.](?P<num_b>\d{{1,2}})[-/.](?P<num_y>\d{{4}}|\d{{2}})\b)
+  | (?P<day_month>\b(?P<dm_d>\d{{1,2}})(?:st|nd|rd|th)?[\s-]+(?:of\s+)?(?P<dm_m>{_MONTH})(?:,?[\s-]+(?P<dm_y>\d{{4}}))?(?![a-z]))
+  | (?P<month_day>\b(?P<md_m>{_MONTH})[\s-]+(?P<md_d>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<md_y>\d{{4}})\b)?)
+  | (?P<month_year>\b(?P<my_m>{_MONTH}),?\s+(?P<my_y>\d{{4}})\b)
+  | (?P<range>\b(?P<r_lo>{_COUNT})\s*(?:-|–|to)\s*(?P<r_hi>{_COUNT})\s*(?P<r_unit>{_UNIT})s?\b)
+  | (?P<duration>\b(?P<dur_n>{_COUNT}|an?)\s*(?P<dur_unit>{_UNIT})s?\b)
+  | (?P<relative>\b(?P<rel>{_RELATIVE})\b)
+""", re.IGNORECASE | re.VERBOSE)
+
+
+def _count(text):
+    text = text.lower()
+    return WORD_NUMBERS[text] if text in WORD_NUMBERS else int(text)
+
+
+def _month(text):
+    return MONTHS[text[:3].lower()]
+
+
+def _year(text):
+    if not text:
+        return None
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+
+def _calendar_date(year, month, day, today):
+    """datetime for an absolute date; a missing year is this year or, once well past, next year."""
+    if year is None:
+        date = datetime(today.year, month, day)
+        if (today - date).days > ROLLOVER_DAYS:
+            date = datetime(today.year + 1, month, day)
+        return date
+    if not 2000 <= year <= 2100:
+        raise ValueError(f"implausible year {year}")
+    return datetime(year, month, day)
+
+
+def _convert(match, today):
+    """(datetime, confidence) for one match; raises ValueError for impossible dates."""
+    kind = match.lastgroup
+    g = match.group
+    if kind == "iso":
+        return _calendar_date(int(g("iso_y")), int(g("iso_m")), int(g("iso_d")), today), 0.95
+    if kind == "numeric":
+        a, b, year = int(g("num_a")), int(g("num_b")), _year(g("num_y"))
+        if a > 12:
+            return _calendar_date(year, b, a, today), 0.9   # 15/10/2025: day first
+        if b > 12 or a == b:
+            return _calendar_date(year, a, b, today), 0.9   # 10/15/2025: month first
+        return _calendar_date(year, a, b, today), 0.6       # 05/10/2025: read as US
+    if kind == "day_month":
+        year = _year(g("dm_y"))
+        return _calendar_date(year, _month(g("dm_m")), int(g("dm_d")), today), 0.9 if year else 0.8
+    if kind == "month_day":
+        year = _year(g("md_y"))
+        return _calendar_date(year, _month(g("md_m")), int(g("md_d")), today), 0.9 if year else 0.8
+    if kind == "month_year":
+        year, month = _year(g("my_y")), _month(g("my_m"))
+        return _calendar_date(year, month, calendar.monthrange(year, month)[1], today), 0.7
+    if kind == "range":
+        low, high = sorted((_count(g("r_lo")), _count(g("r_hi"))))
+        return today + timedelta(days=(low + high) // 2 * UNIT_DAYS[g("r_unit").lower()]), 0.75
+    if kind == "duration":
+        return today + timedelta(days=_count(g("dur_n")) * UNIT_DAYS[g("dur_unit").lower()]), 0.85
+    days, confidence = RELATIVE[" ".join(g("rel").lower().split())]
+    return today + timedelta(days=days), confidence
+
+
+def parse(text, today=None):
+    """
+    Read an expiration date out of free text.
+
+    Returns:
+        dict with `date` (a datetime: midnight for calendar dates, today plus
+        the offset for durations), `days` (calendar days from today), `kind`
+        (which form matched), `confidence` (0-1) and `match` (the text used);
+        None when the text holds no usable date.
+    """
+    if not text:
+        return None
+    today = today or datetime.today()
+    for match in PATTERN.finditer(text):
+        try:
+            date, confidence = _convert(match, today)
+        except (ValueError, OverflowError):
+            continue  # e.g. 2025-02-30; a later part of the text may still parse
+        return {
+            "date": date,
+            "days": (date.date() - today.date()).days,
+            "kind": match.lastgroup,
+            "confidence": confidence,
+            "match": match.group(0),
+        }
+    return None
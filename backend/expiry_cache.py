@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+
+# In-process cache of the day's expiry view: the parsed, sorted
+# (name, days_left, category) lists that recipe_maker.get_user_foods builds
+# for /all-ingredients, /expiring-ingredients, /search and /generate-recipe.
+#
+# Entries are keyed by inventory ("food" or "user:<id>") plus the query
+# options, and only live for the calendar day they were built on because
+# days_left is relative to datetime.now(); the first lookup after local
+# midnight drops everything. Writers through food_data, user_info and
+# personal_input call invalidate() for the inventory they touched.
+
+
+class ExpiryCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day = None
+        self._entries = {}
+        self._epoch = 0         # bumped by invalidate() of everything
+        self._generations = {}  # bumped per inventory; both guard in-flight loads
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.rollovers = 0
+
+    def _roll_over(self, today):
+        if self._day != today:
+            if self._day is not None:
+                self.rollovers += 1
+            self._entries.clear()
+            self._day = today
+
+    def get_or_load(self, inventory, key, loader):
+        """Return the cached value for (inventory, key) today, calling loader() on a miss."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self._lock:
+            self._roll_over(today)
+            entry = self._entries.get((inventory, key))
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(inventory, 0))
+
+        value = loader()
+
+        with self._lock:
+            # Don't store a result that a concurrent write or midnight already made stale
+            if self._day == today and (self._epoch, self._generations.get(inventory, 0)) == generation:
+                self._entries[(inventory, key)] = value
+        return value
+
+    def invalidate(self, inventory=None):
+        """Forget one inventory's entries, or everything when inventory is None."""
+        with self._lock:
+            self.invalidations += 1
+            if inventory is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            self._generations[inventory] = self._generations.get(inventory, 0) + 1
+            for cached in [k for k in self._entries if k[0] == inventory]:
+                del self._entries[cached]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "day": self._day,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "rollovers": self.rollovers,
+            }
+
+
+_cache = ExpiryCache()
+
+get_or_load = _cache.get_or_load
+invalidate = _cache.invalidate
+stats = _cache.stats
@@ -1,114 +1,96 @@
-import sqlite3
 from datetime import datetime, timedelta
-import os
+import database
+import expiry_cache
+import shelf_life_store
+import catalog_index
 
 # Use the root foodapp.db, not backend/foodapp.db
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # Go up one level to project root
-DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
-
-conn = sqlite3.connect(DB_NAME)
-cursor = conn.cursor()
+DB_NAME = database.FOOD_DB
 
 # ====== CREATE TABLES ======
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS food (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    date_added TEXT,
-    expire_days INTEGER,
-    category TEXT
-)               
-""")
+# Run by database.ensure_schema() before foodapp.db is first used (or by database.bootstrap())
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS food (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        date_added TEXT,
+        expire_days INTEGER,
+        category TEXT,
+        expires_on TEXT
+    )
+    """)
 
-cursor.execute(""" 
-CREATE TABLE IF NOT EXISTS food_catalog (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT UNIQUE,
-    default_expire_days INTEGER
-)
-""") 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS food_catalog (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE,
+        default_expire_days INTEGER
+    )
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS food_category (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT UNIQUE
-)
-""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS food_category (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE
+    )
+    """)
 
-conn.commit()
-conn.close()
+database.register_schema(ensure_schema)
 
 # ====== FUNCTIONS ======
 
 # Print all ingredients in the database
 def print_all_ingredients():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, category, date_added, expire_days FROM food")
-    rows = cursor.fetchall()
-    conn.close()
+    with database.connection() as conn:
+        rows = conn.execute("SELECT name, category, date_added, expire_days FROM food").fetchall()
     print("\n--- All Ingredients in Database ---")
     for name, category, date_added, expire_days in rows:
         print(f"Name: {name}, Category: {category}, Date Added: {date_added}, Expire Days: {expire_days}")
 def add_to_catalog(name, default_expire_days):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT OR IGNORE INTO food_catalog (name, default_expire_days) VALUES (?, ?)",
-        (name, default_expire_days)
-    )
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO food_catalog (name, default_expire_days) VALUES (?, ?)",
+            (name, default_expire_days)
+        )
+        shelf_life_store.add_catalog_entry(conn, name, default_expire_days)
+    catalog_index.invalidate()
 
 def add_food(name, expire_days, category):
-    today = datetime.now().strftime("%Y-%m-%d")
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO food (name, date_added, expire_days, category) VALUES (?, ?, ?, ?)",
-        (name, today, expire_days, category)
-    )
-    conn.commit()
-    conn.close()
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    expires_on = (now + timedelta(days=expire_days)).strftime("%Y-%m-%d")
+    with database.connection() as conn:
+        conn.execute(
+            "INSERT INTO food (name, date_added, expire_days, category, expires_on) VALUES (?, ?, ?, ?, ?)",
+            (name, today, expire_days, category, expires_on)
+        )
+    expiry_cache.invalidate("food")
 
 def add_category(name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT OR IGNORE INTO food_category (name) VALUES (?)",
-        (name,)
-    )
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO food_category (name) VALUES (?)",
+            (name,)
+        )
 
 def check_food_status():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    today = datetime.now()
-    cursor.execute("SELECT name, date_added, expire_days, category FROM food")
-    rows = cursor.fetchall()
-    conn.close()
+    today = datetime.now().strftime("%Y-%m-%d")
+    # Same as (expires_on - now).days: an item is expired from the morning of its expiry date
+    with database.connection() as conn:
+        rows = conn.execute(
+            "SELECT name, CAST(julianday(expires_on) - julianday(?) AS INTEGER) - 1, category FROM food",
+            (today,)
+        ).fetchall()
     result = []
-    for name, date_added, expire_days, category in rows:
-        date_added_dt = datetime.strptime(date_added, "%Y-%m-%d")
-        expire_date = date_added_dt + timedelta(days=expire_days)
-        days_left = (expire_date - today).days
+    for name, days_left, category in rows:
+        if days_left is None:
+            continue  # invalid date_added, nothing to report
         status = "expired" if days_left < 0 else f"{days_left} days left"
         result.append((name, status, category))
     return result
 
-def init_common_categories():
-        # New function to print all ingredients
-        def print_all_ingredients():
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name, category, date_added, expire_days FROM food")
-            rows = cursor.fetchall()
-            conn.close()
-            print("\n--- All Ingredients in Database ---")
-            for name, category, date_added, expire_days in rows:
-                print(f"Name: {name}, Category: {category}, Date Added: {date_added}, Expire Days: {expire_days}")
-
 def init_common_categories():
     common_categories = [
         "Fruit",
@@ -131,11 +113,9 @@ def init_common_categories():
 
 def delete_food(name):
     """Delete a food item by name"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM food WHERE name=?", (name,))
-    conn.commit()
-    conn.close()
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food WHERE name=?", (name,))
+    expiry_cache.invalidate("food")
 
 # ====== RUN ONCE ======
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+import io
+import os
+import time
+from PIL import Image
+
+# Shrinks photos before they are sent to the model. Phone photos are 12+ MP
+# and several MB, far more detail than the model needs to read a label, and
+# the bytes dominate upload time and token cost. prepare_image():
+#
+#   1. decodes JPEGs with Image.draft(), letting libjpeg scale down by 1/2,
+#      1/4 or 1/8 during decode instead of decoding every pixel,
+#   2. downsamples so the longest edge is at most MAX_EDGE,
+#   3. composites transparent images (PNG screenshots, stickers) onto white,
+#   4. applies the EXIF orientation so sideways phone shots read upright,
+#   5. re-encodes as JPEG (or WebP) at QUALITY without EXIF/ICC/XMP metadata.
+#
+# Photos that are already small, upright, metadata-free and in the target
+# format are sent as-is, without a decode/re-encode round trip.
+
+MAX_EDGE = int(os.getenv("EXPIREASE_IMAGE_MAX_EDGE", "1536"))
+FORMAT = os.getenv("EXPIREASE_IMAGE_FORMAT", "JPEG").upper()
+QUALITY = int(os.getenv("EXPIREASE_IMAGE_QUALITY", "85"))
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# EXIF Orientation tag value -> the transpose that makes the photo upright
+TRANSPOSE_FOR_ORIENTATION = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def _read(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        if source.seekable():
+            source.seek(0)
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _open(source):
+    """
+    (binary file PIL can decode, size in bytes). Seekable files are decoded
+    in place, so a photo spooled to disk is never read into memory whole.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), len(source)
+    if hasattr(source, "read") and source.seekable():
+        size = source.seek(0, io.SEEK_END)
+        source.seek(0)
+        return source, size
+    data = _read(source)
+    return io.BytesIO(data), len(data)
+
+
+def prepare_image(source, max_edge=MAX_EDGE, fmt=FORMAT, quality=QUALITY):
+    """
+    Downscale and re-encode an image (a path, bytes, bytearray, memoryview
+    or a binary file object) for the model.
+
+    Returns:
+        (blob, report) where blob is {"mime_type", "data"} ready to pass to
+        generate_content, and report holds bytes_before/bytes_after, the
+        sizes before and after, and per-stage timings in milliseconds.
+    """
+    fmt = fmt.upper()
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    timings = {}
+
+    start = time.perf_counter()
+    stream, bytes_before = _open(source)
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    im = Image.open(stream)
+    original_format = im.format
+    original_size = im.size
+    orientation = im.getexif().get(0x0112, 1)
+    has_metadata = any(key in im.info for key in ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp"))
+    if original_format == fmt and orientation == 1 and not has_metadata and max(original_size) <= max_edge:
+        # Nothing to fix: skip the decode/re-encode round trip and its generation loss
+        data = _read(stream)
+        timings["open"] = time.perf_counter() - start
+        return {"mime_type": MIME_TYPES[fmt], "data": data}, _report(bytes_before, data, original_size, im.size, fmt, timings)
+    if original_format == "JPEG":
+        # Only the longest edge has to stay >= max_edge, so scale the box to the aspect ratio
+        scale = min(1.0, max_edge / max(original_size))
+        im.draft("RGB", (int(original_size[0] * scale), int(original_size[1] * scale)))
+    im.load()
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if max(im.size) > max_edge:
+        im.thumbnail((max_edge, max_edge), Image.BICUBIC)
+    if im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info):
+        # Transparent pixels would turn black (or whatever colour they hide) in RGB
+        im = im.convert("RGBA")
+        background = Image.new("RGB", im.size, (255, 255, 255))
+        background.paste(im, mask=im.getchannel("A"))
+        im = background
+    elif im.mode != "RGB":
+        im = im.convert("RGB")
+    timings["resize"] = time.perf_counter() - start
+
+    # Rotating after the resize moves far fewer pixels; the max edge is the same either way
+    start = time.perf_counter()
+    if orientation in TRANSPOSE_FOR_ORIENTATION:
+        im = im.transpose(TRANSPOSE_FOR_ORIENTATION[orientation])
+    timings["orient"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    out = io.BytesIO()
+    im.save(out, format=fmt, quality=quality, optimize=fmt == "JPEG")
+    encoded = out.getvalue()
+    timings["encode"] = time.perf_counter() - start
+
+    return {"mime_type": MIME_TYPES[fmt], "data": encoded}, _report(bytes_before, encoded, original_size, im.size, fmt, timings)
+
+
+def _report(bytes_before, encoded, size_before, size_after, fmt, timings):
+    return {
+        "bytes_before": bytes_before,
+        "bytes_after": len(encoded),
+        "size_before": list(size_before),
+        "size_after": list(size_after),
+        "format": fmt,
+        "timings_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()},
+    }
@@ -0,0 +1,205 @@
+import sqlite3
+from datetime import datetime
+from difflib import SequenceMatcher
+import database
+
+# Ingredient name search backed by SQLite FTS5 trigram indexes.
+#
+# Each searchable table gets an external-content FTS5 table kept in sync by
+# triggers, so inserts/deletes through any code path update the index.
+# Queries of 3+ characters are substring matches answered from the trigram
+# index; shorter "as you type" queries use a NOCASE prefix index; and when
+# exact matches don't fill the limit, a fuzzy pass ORs the query's trigrams
+# together and re-ranks the best candidates by string similarity, which
+# catches typos like "bananna" or "aple".
+
+SOURCES = {
+    "food": {
+        "table": "food",
+        "key": "id",
+        "column": "name",
+        "fields": "t.id, t.name, t.category, t.expires_on",
+    },
+    "catalog": {
+        "table": "food_catalog",
+        "key": "id",
+        "column": "name",
+        "fields": "t.id, t.name, t.default_expire_days",
+    },
+    "user_food": {
+        "table": "user_food",
+        "key": "rowid",
+        "column": "food_name",
+        "fields": "t.rowid AS id, t.food_name AS name, t.nutrition, t.expires_on, t.user_id",
+    },
+}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+FUZZY_CANDIDATES = 200   # trigram candidates re-ranked in Python per fuzzy query
+FUZZY_MIN_SCORE = 0.6    # minimum similarity for a fuzzy hit to be returned
+
+
+def _fts_table(source):
+    return f"{SOURCES[source]['table']}_{SOURCES[source]['column']}_fts"
+
+
+def ensure_search_index(conn):
+    """Create FTS indexes and sync triggers for every searchable table that exists."""
+    for source, spec in SOURCES.items():
+        table, key, column = spec["table"], spec["key"], spec["column"]
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            continue
+        fts = _fts_table(source)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_nocase ON {table} ({column} COLLATE NOCASE)")
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (fts,)).fetchone()
+        if exists:
+            continue
+        try:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"{column}, content='{table}', content_rowid='{key}', tokenize='trigram')"
+            )
+        except sqlite3.OperationalError as e:
+            # SQLite < 3.34 has no trigram tokenizer; search falls back to LIKE scans.
+            print(f"Warning: could not create search index {fts}: {e}")
+            continue
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column}) VALUES (new.{key}, new.{column});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.{key}, old.{column});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.{key}, old.{column});
+                INSERT INTO {fts} (rowid, {column}) VALUES (new.{key}, new.{column});
+            END
+        """)
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+database.register_schema(ensure_search_index, on_tables=True)
+
+
+def _has_index(conn, source):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (_fts_table(source),)).fetchone() is not None
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _similarity(query, name):
+    """Best similarity between the query and the whole name or any word in it."""
+    name = name.lower()
+    candidates = [name] + name.replace("-", " ").replace(",", " ").split()
+    return max(SequenceMatcher(None, query, c).ratio() for c in candidates)
+
+
+def _row_to_dict(cursor, row, score):
+    item = {desc[0]: value for desc, value in zip(cursor.description, row)}
+    item["score"] = round(score, 3)
+    return item
+
+
+def search(query, source="food", limit=DEFAULT_LIMIT, user_id=None, fresh_only=False, fuzzy=True):
+    """
+    Ranked ingredient search.
+
+    Args:
+        query: Text typed by the user; any length, matched case-insensitively.
+        source: "food" (inventory), "catalog" (food_catalog) or "user_food".
+        limit: Maximum number of results (capped at MAX_LIMIT).
+        user_id: Restricts user_food results to one user.
+        fresh_only: Skip items whose expires_on date has passed.
+        fuzzy: Fill remaining slots with typo-tolerant matches.
+
+    Returns:
+        List of dicts with the source row's fields plus a `score` (1.0 = exact).
+    """
+    spec = SOURCES[source]
+    table, column = spec["table"], spec["column"]
+    q = " ".join(query.lower().split())
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if not q:
+        return []
+
+    filters, filter_params = [], []
+    if user_id is not None and source == "user_food":
+        filters.append("t.user_id = ?")
+        filter_params.append(user_id)
+    if fresh_only and source != "catalog":
+        filters.append("t.expires_on > ?")
+        filter_params.append(datetime.now().strftime("%Y-%m-%d"))
+    extra = "".join(f" AND {f}" for f in filters)
+
+    results = []
+    seen = set()
+    with database.connection() as conn:
+        indexed = _has_index(conn, source)
+        if len(q) < 3 or not indexed:
+            # Prefix (or, without an index, substring) match ordered via the NOCASE index
+            pattern = _escape_like(q) + "%" if len(q) < 3 else "%" + _escape_like(q) + "%"
+            cursor = conn.execute(
+                f"SELECT {spec['fields']} FROM {table} t WHERE t.{column} LIKE ? ESCAPE '\\'{extra} "
+                f"ORDER BY t.{column} COLLATE NOCASE LIMIT ?",
+                [pattern] + filter_params + [limit],
+            )
+        else:
+            # Substring match from the trigram index: prefix hits first, then shorter names
+            fts = _fts_table(source)
+            cursor = conn.execute(
+                f"SELECT {spec['fields']} FROM {fts} JOIN {table} t ON t.{spec['key']} = {fts}.rowid "
+                f"WHERE {fts} MATCH ?{extra} "
+                f"ORDER BY t.{column} LIKE ? ESCAPE '\\' DESC, length(t.{column}), t.{spec['key']} LIMIT ?",
+                [_quote(q)] + filter_params + [_escape_like(q) + "%", limit],
+            )
+        for row in cursor.fetchall():
+            item = _row_to_dict(cursor, row, 1.0)
+            seen.add(item["id"])
+            results.append(item)
+
+        if len(q) < 3 and len(results) < limit:
+            # Then words starting with the prefix later in the name; no ORDER BY so the scan stops at the limit.
+            # Names starting with the prefix were all returned above (the limit wasn't reached).
+            cursor = conn.execute(
+                f"SELECT {spec['fields']} FROM {table} t WHERE t.{column} LIKE ? ESCAPE '\\' "
+                f"AND t.{column} NOT LIKE ? ESCAPE '\\'{extra} LIMIT ?",
+                ["% " + _escape_like(q) + "%", _escape_like(q) + "%"] + filter_params + [limit - len(results)],
+            )
+            for row in cursor.fetchall():
+                item = _row_to_dict(cursor, row, 0.9)
+                if item["id"] not in seen:
+                    seen.add(item["id"])
+                    results.append(item)
+
+        if fuzzy and indexed and len(q) >= 4 and len(results) < limit:
+            trigrams = {q[i:i + 3] for i in range(len(q) - 2)}
+            fts = _fts_table(source)
+            cursor = conn.execute(
+                f"SELECT {spec['fields']} FROM {fts} JOIN {table} t ON t.{spec['key']} = {fts}.rowid "
+                f"WHERE {fts} MATCH ?{extra} ORDER BY {fts}.rank LIMIT ?",
+                [" OR ".join(_quote(t) for t in sorted(trigrams))] + filter_params + [FUZZY_CANDIDATES],
+            )
+            fuzzy_hits = []
+            for row in cursor.fetchall():
+                item = _row_to_dict(cursor, row, 0.0)
+                if item["id"] in seen:
+                    continue
+                score = _similarity(q, item["name"] or "")
+                if score >= FUZZY_MIN_SCORE:
+                    item["score"] = round(score, 3)
+                    fuzzy_hits.append(item)
+            fuzzy_hits.sort(key=lambda item: (-item["score"], len(item["name"])))
+            results.extend(fuzzy_hits[:limit - len(results)])
+
+    return results
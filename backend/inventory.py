@@ -0,0 +1,86 @@
+import base64
+import json
+import database
+
+# Keyset-paginated reads of the food inventory shared by server.py and
+# backend/app.py. Pages are ordered by (expires_on, id) and walked with an
+# opaque cursor, so every page is an index range scan no matter how deep the
+# client has scrolled or how large the inventory is.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+INGREDIENT_FIELDS = ("id", "name", "category", "expiration", "days_until_expiry")
+
+
+def encode_cursor(expires_on, food_id):
+    raw = json.dumps([expires_on, food_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        expires_on, food_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(expires_on, str) or not isinstance(food_id, int):
+        raise ValueError("Invalid cursor")
+    return expires_on, food_id
+
+
+def parse_fields(fields_arg, allowed=INGREDIENT_FIELDS):
+    """Turn a `fields=name,expiration` query argument into a tuple; None means all fields."""
+    if not fields_arg:
+        return None
+    fields = tuple(f.strip() for f in fields_arg.split(",") if f.strip())
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_limit(limit):
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def project(item, fields):
+    if fields is None:
+        return item
+    return {f: item[f] for f in fields if f in item}
+
+
+def food_page(expires_after, limit=DEFAULT_PAGE_SIZE, cursor=None, category=None):
+    """
+    One page of food rows with expires_on > `expires_after`, soonest expiry first.
+    A limit of None returns every remaining row.
+
+    Returns:
+        (rows, next_cursor) where rows are (id, name, category, expires_on)
+        tuples and next_cursor is None on the last page.
+    """
+    query = "SELECT id, name, category, expires_on FROM food WHERE expires_on > ?"
+    params = [expires_after]
+    if category:
+        query += " AND category = ?"
+        params.append(category)
+    if cursor:
+        query += " AND (expires_on, id) > (?, ?)"
+        params.extend(decode_cursor(cursor))
+    query += " ORDER BY expires_on, id"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit + 1)  # one extra row tells us whether another page exists
+
+    with database.connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[3], last[0])
+    return rows, next_cursor
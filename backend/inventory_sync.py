@@ -0,0 +1,151 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+import database
+
+# Change tracking for the inventory endpoints.
+#
+# Triggers on food and user_food append every insert/update/delete to
+# inventory_changes, so all writers (add_food, delete_food, add_user_food,
+# the /add_ingredient and /delete-ingredient routes, bulk writes) bump the
+# version without having to remember to. An inventory's version is the
+# highest change seq logged for it: "food" for the shared inventory and
+# "user:<id>" for a user's personal one.
+#
+# That gives us strong ETags (version + calendar day + request URL, since
+# days_until_expiry changes at midnight) for cheap 304s, and a delta feed
+# of the changes after a client's last seen version.
+#
+# The log is pruned on write: every PRUNE_EVERY-th entry a trigger drops all
+# but the newest KEEP_CHANGES, so it stays bounded whichever module writes.
+# A client whose version predates the retained log gets reset=True.
+
+CHANGES_PAGE_SIZE = 500
+KEEP_CHANGES = 50000  # log entries kept (between KEEP_CHANGES and KEEP_CHANGES + PRUNE_EVERY)
+PRUNE_EVERY = 1000  # log entries written between prunes
+
+
+def ensure_change_log(conn):
+    """Create the change log and its triggers for every inventory table that exists."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS inventory_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        inventory TEXT NOT NULL,
+        op TEXT NOT NULL,
+        item_id INTEGER,
+        name TEXT,
+        category TEXT,
+        expires_on TEXT
+    )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_inventory_changes_inventory_seq ON inventory_changes (inventory, seq)"
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS inventory_changes_prune AFTER INSERT ON inventory_changes
+        WHEN NEW.seq % {PRUNE_EVERY} = 0 BEGIN
+            DELETE FROM inventory_changes WHERE seq <= NEW.seq - {KEEP_CHANGES};
+        END
+    """)
+    tables = {
+        "food": ("'food'", "id", "name", "category"),
+        "user_food": ("'user:' || {row}.user_id", "rowid", "food_name", "nutrition"),
+    }
+    for table, (inventory, key, name, category) in tables.items():
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            continue
+        for event, op, row in (("INSERT", "insert", "new"), ("UPDATE", "update", "new"), ("DELETE", "delete", "old")):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_change_{op} AFTER {event} ON {table} BEGIN
+                    INSERT INTO inventory_changes (inventory, op, item_id, name, category, expires_on)
+                    VALUES ({inventory.format(row=row)}, '{op}', {row}.{key}, {row}.{name}, {row}.{category}, {row}.expires_on);
+                END
+            """)
+
+
+database.register_schema(ensure_change_log, on_tables=True)
+
+
+def inventory_name(user_id=None):
+    return f"user:{user_id}" if user_id else "food"
+
+
+def current_version(inventory="food"):
+    with database.connection() as conn:
+        row = conn.execute(
+            "SELECT MAX(seq) FROM inventory_changes WHERE inventory = ?", (inventory,)
+        ).fetchone()
+    return row[0] or 0
+
+
+def changes_since(inventory="food", since=0, limit=CHANGES_PAGE_SIZE):
+    """
+    Changes logged for `inventory` after version `since`, oldest first.
+
+    Returns:
+        dict with `version` (the inventory's current version), `changes`,
+        `has_more` (call again with since=<last seq>) and `reset`, which is
+        True when `since` predates the retained log and the client must refetch.
+    """
+    with database.connection() as conn:
+        version = conn.execute(
+            "SELECT MAX(seq) FROM inventory_changes WHERE inventory = ?", (inventory,)
+        ).fetchone()[0] or 0
+        oldest = conn.execute("SELECT MIN(seq) FROM inventory_changes").fetchone()[0]
+        rows = conn.execute(
+            "SELECT seq, op, item_id, name, category, expires_on FROM inventory_changes "
+            "WHERE inventory = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (inventory, since, limit + 1)
+        ).fetchall()
+    changes = [
+        {"seq": seq, "op": op, "id": item_id, "name": name, "category": category, "expiration": expires_on}
+        for seq, op, item_id, name, category, expires_on in rows[:limit]
+    ]
+    return {
+        "version": version,
+        "changes": changes,
+        "has_more": len(rows) > limit,
+        "reset": bool(since and oldest and since < oldest - 1),
+    }
+
+
+def prune_changes(keep=KEEP_CHANGES):
+    """Drop all but the newest `keep` log entries now, e.g. after lowering KEEP_CHANGES; clients older than that get reset=True."""
+    with database.connection() as conn:
+        conn.execute(
+            "DELETE FROM inventory_changes WHERE seq <= (SELECT MAX(seq) FROM inventory_changes) - ?", (keep,)
+        )
+
+
+def etag_for(inventory="food", *parts):
+    """Strong ETag value for a representation of `inventory` built today from `parts`."""
+    digest = hashlib.sha1()
+    for part in (inventory, current_version(inventory), datetime.now().strftime("%Y-%m-%d")) + parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:20]
+
+
+def conditional(inventory="food"):
+    """
+    Decorator for GET views over an inventory: answers If-None-Match with a
+    bare 304 before the view runs, and tags fresh responses with an ETag.
+    `inventory` may be a name or a callable returning one for the current request.
+    """
+    from flask import make_response, request
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            name = inventory() if callable(inventory) else inventory
+            etag = etag_for(name, request.full_path)
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,57 @@
+import sqlite3
+import sys
+import database
+
+# Adds a materialized, indexed `expires_on` (YYYY-MM-DD) column to the food and
+# user_food tables so expiry filters and sorts run as index range scans in SQL
+# instead of re-parsing date_added + expire_days for every row in Python.
+# Invariant kept by every writer: expires_on = date_added + expire_days.
+
+EXPIRES_ON_SQL = "date(date_added, printf('%+d days', expire_days))"
+
+INDEXES = {
+    "food": [
+        "CREATE INDEX IF NOT EXISTS idx_food_expires_on ON food (expires_on)",
+        "CREATE INDEX IF NOT EXISTS idx_food_category_expires_on ON food (category, expires_on)",
+    ],
+    "user_food": [
+        "CREATE INDEX IF NOT EXISTS idx_user_food_user_expires_on ON user_food (user_id, expires_on)",
+    ],
+}
+
+
+def migrate(conn):
+    """Add, backfill and index expires_on on every table that exists. Safe to run repeatedly."""
+    for table, index_statements in INDEXES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if not columns:
+            continue  # table not created yet
+        if "expires_on" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN expires_on TEXT")
+        for index_sql in index_statements:
+            conn.execute(index_sql)
+        conn.execute(
+            f"UPDATE {table} SET expires_on = {EXPIRES_ON_SQL} "
+            "WHERE expires_on IS NULL AND expire_days IS NOT NULL"
+        )
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else database.FOOD_DB
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        conn.commit()
+        for table in INDEXES:
+            try:
+                total, filled = conn.execute(
+                    f"SELECT COUNT(*), COUNT(expires_on) FROM {table}"
+                ).fetchone()
+                print(f"✅ {table}: {filled}/{total} rows have expires_on")
+            except sqlite3.OperationalError:
+                print(f"ℹ️ {table}: table does not exist, skipped")
+    except sqlite3.OperationalError as e:
+        print(f"❌ Migration failed: {e}")
+    finally:
+        conn.close()
+    print("\n🎉 Database migration complete!")
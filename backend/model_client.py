@@ -0,0 +1,394 @@
+import base64
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from scan_response import response_text
+
+# Model clients for the scanner and recipe paths.
+#
+# scanner.model and recipe_maker.model used to be genai.GenerativeModel
+# instances, so /photo_scanner and /generate-recipe couldn't run (or be
+# load-tested) without the live API. Both are now created by load(), which
+# picks a client from EXPIREASE_MODEL_CLIENT:
+#
+#   gemini   GeminiClient around the real model (default)
+#   fake     FakeModel in-process: canned answers after a simulated latency
+#   stub     HttpModel talking to the HTTP stub in fake_gemini.py (or any
+#            server speaking the Gemini REST API) at EXPIREASE_MODEL_STUB_URL
+#   record   the real model, every answer also saved to EXPIREASE_MODEL_FIXTURES
+#   replay   the answers saved by `record`, no network
+#
+# Every client has the one method the app calls, generate_content(contents,
+# generation_config=None, stream=False, request_options=None), and answers
+# in the shape of a Gemini response: .candidates[0].finish_reason and
+# .candidates[0].content.parts[].text (streamed: an iterator of those).
+# Latencies for the fake and the stub are distributions, see latency_sampler().
+
+CLIENT = os.getenv("EXPIREASE_MODEL_CLIENT", "gemini")
+STUB_URL = os.getenv("EXPIREASE_MODEL_STUB_URL", "http://127.0.0.1:8765")
+FIXTURES_DIR = os.getenv("EXPIREASE_MODEL_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_fixtures"))
+FAKE_LATENCY = os.getenv("EXPIREASE_MODEL_LATENCY", "0")
+FAKE_ERROR_RATE = float(os.getenv("EXPIREASE_MODEL_ERROR_RATE", "0"))
+
+STOP = 1
+SAFETY = 3
+FINISH_REASONS = {"STOP": 1, "MAX_TOKENS": 2, "SAFETY": 3, "RECITATION": 4, "OTHER": 5}
+
+# Canned answers per model, in the format each caller asks for
+CANNED = {
+    "scanner": [
+        json.dumps({"items": [
+            {"name": "Milk", "expiration": None, "days": 7, "category": "Dairy", "confidence": 0.95},
+            {"name": "Apple", "expiration": None, "days": 14, "category": "Fruit", "confidence": 0.9},
+            {"name": "Spinach", "expiration": None, "days": 5, "category": "Vegetable", "confidence": 0.85},
+        ]}),
+    ],
+    "recipe": [
+        "**Quick Pantry Skillet**\n\n**Servings:** 2 | **Prep:** 10 min | **Cook:** 15 min\n\n"
+        "**INGREDIENTS:**\n• Whatever is expiring first, chopped\n• 1 tbsp olive oil\n• Salt and pepper\n\n"
+        "**INSTRUCTIONS:**\n1. Heat the oil in a skillet over medium heat.\n"
+        "2. Add the firmest ingredients first and cook for 5 minutes.\n"
+        "3. Add the rest, season, and cook until tender.\n\n**TIP:** Finish with a squeeze of lemon.",
+    ],
+}
+
+
+class ModelError(RuntimeError):
+    """A model call failed (simulated error, stub HTTP error, or no recorded answer)."""
+
+
+def response(text, finish_reason=STOP):
+    """A Gemini-shaped response (or streamed chunk) with `text`."""
+    parts = [SimpleNamespace(text=text)] if text else []
+    candidate = SimpleNamespace(finish_reason=finish_reason, content=SimpleNamespace(parts=parts))
+    return SimpleNamespace(candidates=[candidate], text=text)
+
+
+def latency_sampler(spec, rng=random):
+    """
+    A sampler for a latency distribution, in seconds:
+        "0.2"                     fixed
+        "uniform:0.1,0.5"         uniform between the two
+        "normal:0.5,0.1"          mean, standard deviation (never below 0)
+        "lognormal:0.5,0.6"       median, sigma: the long right tail of real model calls
+        "spike:0.3,5,0.05"        base, slow, share: `share` of calls take `slow`
+    """
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        fixed = float(kind)
+        return lambda: fixed
+    values = [float(v) for v in args.split(",")]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "spike":
+        return lambda: values[1] if rng.random() < values[2] else values[0]
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def split_chunks(text, chunks):
+    """`text` in `chunks` roughly equal pieces, split on spaces where possible."""
+    if chunks <= 1 or len(text) < chunks:
+        return [text]
+    size = len(text) // chunks
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = text.find(" ", start + size)
+        end = len(text) if end == -1 or len(pieces) == chunks - 1 else end + 1
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+class ModelClient:
+    """What scanner and recipe_maker need from a model."""
+
+    name = "model"
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        """A response, or with stream=True an iterator of response chunks; raises on failure."""
+        raise NotImplementedError
+
+
+class GeminiClient(ModelClient):
+    """The real model: a genai.GenerativeModel, passed through."""
+
+    def __init__(self, model, name="gemini"):
+        self.model = model
+        self.name = name
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        kwargs = {"stream": stream}
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        if request_options is not None:
+            kwargs["request_options"] = request_options
+        return self.model.generate_content(contents, **kwargs)
+
+
+class FakeModel(ModelClient):
+    """
+    In-process stand-in: answers with the canned `responses` (in turn, or
+    responses(contents) -> text) after a latency drawn from `latency`; a
+    share of calls fail (`error_rate`) or come back blocked (`blocked_rate`).
+    A call longer than its request_options timeout fails at the timeout.
+    """
+
+    def __init__(self, name="recipe", responses=None, latency=FAKE_LATENCY, error_rate=FAKE_ERROR_RATE,
+                 blocked_rate=0.0, chunks=8, seed=None):
+        self.name = name
+        self.responses = responses if responses is not None else CANNED.get(name, CANNED["recipe"])
+        self.rng = random.Random(seed)
+        self.latency = latency if callable(latency) else latency_sampler(latency, self.rng)
+        self.error_rate = error_rate
+        self.blocked_rate = blocked_rate
+        self.chunks = chunks
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, contents):
+        """(text, finish_reason, seconds) for one call; finish_reason None for a simulated error."""
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+            seconds = self.latency()
+            roll = self.rng.random()
+        if roll < self.error_rate:
+            return None, None, seconds
+        if roll < self.error_rate + self.blocked_rate:
+            return "", SAFETY, seconds
+        if callable(self.responses):
+            text = self.responses(contents)
+        else:
+            text = self.responses[(n - 1) % len(self.responses)]
+        return text, STOP, seconds
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        text, finish_reason, seconds = self._answer(contents)
+        timeout = (request_options or {}).get("timeout")
+        if stream:
+            return self._stream(text, finish_reason, seconds, timeout)
+        self._wait(seconds, timeout)
+        if finish_reason is None:
+            raise ModelError(f"{self.name}: simulated model error")
+        return response(text, finish_reason)
+
+    def _wait(self, seconds, timeout):
+        if timeout is not None and seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.name}: no answer within {timeout:g}s")
+        time.sleep(seconds)
+
+    def _stream(self, text, finish_reason, seconds, timeout):
+        pieces = split_chunks(text or "", self.chunks)
+        # The first chunk takes a third of the call, the rest arrive evenly
+        first = seconds / 3
+        self._wait(first, timeout)
+        if finish_reason is None:
+            raise ModelError(f"{self.name}: simulated model error")
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep((seconds - first) / max(1, len(pieces) - 1))
+            yield response(piece, finish_reason if i == len(pieces) - 1 else 0)
+
+
+def to_request(contents, generation_config=None):
+    """The Gemini REST request body for `contents` (text, {"text"} and {"mime_type", "data"} parts)."""
+    parts = []
+    for item in contents if isinstance(contents, (list, tuple)) else [contents]:
+        if isinstance(item, str):
+            parts.append({"text": item})
+        elif "text" in item:
+            parts.append({"text": item["text"]})
+        else:
+            data = item["data"]
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                data = base64.b64encode(bytes(data)).decode()
+            parts.append({"inline_data": {"mime_type": item["mime_type"], "data": data}})
+    body = {"contents": [{"role": "user", "parts": parts}]}
+    if generation_config:
+        body["generationConfig"] = {
+            "responseMimeType" if key == "response_mime_type" else key: value
+            for key, value in dict(generation_config).items()
+        }
+    return body
+
+
+def from_json(payload):
+    """A Gemini REST response (or stream event) as a response()."""
+    candidates = payload.get("candidates") or [{}]
+    candidate = candidates[0]
+    text = "".join(part.get("text", "") for part in (candidate.get("content") or {}).get("parts", []))
+    reason = candidate.get("finishReason")
+    return response(text, FINISH_REASONS.get(reason, 0) if isinstance(reason, str) else (reason or 0))
+
+
+class HttpModel(ModelClient):
+    """A model behind the Gemini REST API: the stub in fake_gemini.py, for load tests without the live API."""
+
+    def __init__(self, name, url=None, model_id=None):
+        self.name = name
+        self.url = (url or STUB_URL).rstrip("/")
+        self.model_id = model_id or name
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _post(self, method, body, stream, timeout):
+        import requests
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+        url = f"{self.url}/v1beta/models/{self.model_id}:{method}"
+        try:
+            reply = self._session.post(url, params={"alt": "sse"} if stream else None, json=body,
+                                       stream=stream, timeout=timeout)
+        except requests.Timeout as e:
+            raise TimeoutError(f"{self.name}: no answer within {timeout}s") from e
+        if reply.status_code != 200:
+            raise ModelError(f"{self.name}: HTTP {reply.status_code} {reply.text[:200]}")
+        return reply
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        body = to_request(contents, generation_config)
+        timeout = (request_options or {}).get("timeout")
+        if not stream:
+            return from_json(self._post("generateContent", body, False, timeout).json())
+        return self._stream(self._post("streamGenerateContent", body, True, timeout))
+
+    def _stream(self, reply):
+        with reply:
+            for line in reply.iter_lines(decode_unicode=True):
+                if line and line.startswith("data:"):
+                    payload = json.loads(line[len("data:"):])
+                    if "error" in payload:
+                        raise ModelError(f"{self.name}: {payload['error'].get('message')}")
+                    yield from_json(payload)
+
+
+def request_key(name, contents, generation_config=None):
+    """Fixture key of a request: images by their hash, so fixtures stay small."""
+    body = to_request(contents, generation_config)
+    for part in body["contents"][0]["parts"]:
+        if "inline_data" in part:
+            part["inline_data"]["data"] = hashlib.sha256(part["inline_data"]["data"].encode()).hexdigest()
+    canonical = json.dumps({"model": name, "request": body}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:20]
+
+
+class RecordingModel(ModelClient):
+    """Passes calls to `inner` and saves each answer (text, finish reason, timing) as a fixture for ReplayModel."""
+
+    def __init__(self, inner, name, fixtures_dir=None):
+        self.inner = inner
+        self.name = name
+        self.fixtures_dir = fixtures_dir or FIXTURES_DIR
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        key = request_key(self.name, contents, generation_config)
+        start = time.monotonic()
+        result = self.inner.generate_content(contents, generation_config=generation_config,
+                                             stream=stream, request_options=request_options)
+        if not stream:
+            self._save(key, [(time.monotonic() - start, result)])
+            return result
+        return self._record_stream(key, start, result)
+
+    def _record_stream(self, key, start, result):
+        chunks = []
+        for chunk in result if hasattr(result, "__iter__") else [result]:
+            chunks.append((time.monotonic() - start, chunk))
+            yield chunk
+        self._save(key, chunks)
+
+    def _save(self, key, chunks):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        fixture = {
+            "model": self.name,
+            "chunks": [
+                {"at": round(at, 4), "text": response_text(chunk),
+                 "finish_reason": int(getattr(chunk.candidates[0], "finish_reason", 0) or 0) if chunk.candidates else 0}
+                for at, chunk in chunks
+            ],
+        }
+        path = os.path.join(self.fixtures_dir, f"{self.name}-{key}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=1)
+        print(f"Recorded model answer to {path}")
+
+
+class ReplayModel(ModelClient):
+    """
+    Answers from fixtures saved by RecordingModel: the one recorded for the
+    same request, or else (prompts carry today's date) one of the model's
+    fixtures picked by the request key, so replays are repeatable. With
+    timing=True the recorded chunk timings are replayed too.
+    """
+
+    def __init__(self, name, fixtures_dir=None, timing=False):
+        self.name = name
+        self.fixtures_dir = fixtures_dir or FIXTURES_DIR
+        self.timing = timing
+        self._fixtures = None
+
+    def _fixture(self, key):
+        if self._fixtures is None:
+            self._fixtures = {}
+            for path in sorted(glob.glob(os.path.join(self.fixtures_dir, f"{self.name}-*.json"))):
+                with open(path, encoding="utf-8") as f:
+                    self._fixtures[os.path.basename(path)[len(self.name) + 1:-len(".json")]] = json.load(f)
+        if key in self._fixtures:
+            return self._fixtures[key]
+        if not self._fixtures:
+            raise ModelError(f"{self.name}: no recorded answers in {self.fixtures_dir}")
+        keys = sorted(self._fixtures)
+        return self._fixtures[keys[int(key, 16) % len(keys)]]
+
+    def _chunks(self, fixture):
+        start = time.monotonic()
+        for chunk in fixture["chunks"]:
+            if self.timing:
+                time.sleep(max(0.0, chunk["at"] - (time.monotonic() - start)))
+            yield response(chunk["text"], chunk["finish_reason"])
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None):
+        fixture = self._fixture(request_key(self.name, contents, generation_config))
+        if stream:
+            return self._chunks(fixture)
+        chunks = list(self._chunks(fixture))
+        finish_reason = chunks[-1].candidates[0].finish_reason if chunks else 0
+        return response("".join(c.text for c in chunks), finish_reason)
+
+
+def load(name, gemini):
+    """
+    The model client for `name` ("scanner" or "recipe") per CLIENT; gemini()
+    builds the real genai model (None without an API key). None when there
+    is no usable model.
+    """
+    if CLIENT == "fake":
+        print(f"Using the in-process fake {name} model (latency {FAKE_LATENCY})")
+        return FakeModel(name)
+    if CLIENT == "stub":
+        print(f"Using the stub {name} model at {STUB_URL}")
+        return HttpModel(name)
+    if CLIENT == "replay":
+        print(f"Replaying recorded {name} model answers from {FIXTURES_DIR}")
+        return ReplayModel(name, timing=os.getenv("EXPIREASE_MODEL_REPLAY_TIMING") == "1")
+    model = gemini()
+    if model is None:
+        return None
+    client = GeminiClient(model, name)
+    if CLIENT == "record":
+        print(f"Recording {name} model answers to {FIXTURES_DIR}")
+        return RecordingModel(client, name)
+    return client
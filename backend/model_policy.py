@@ -0,0 +1,283 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Deadline, hedging and circuit breaker around the recipe model calls.
+#
+# make_recipe used to wait out the full 20 s model timeout before falling
+# back to the template recipe, and kept calling the model while it was
+# failing or blocking every recipe. Model calls now go through call() (or
+# stream() for the streamed form):
+#
+# Deadline: each request has a budget (DEADLINE_SECONDS, or the caller's);
+# the model call runs on a worker thread and the request stops waiting for
+# it when the budget is spent. The abandoned call finishes in the
+# background; its request timeout is the budget, so it doesn't linger.
+# A streamed answer is checked between chunks and cut off with TimeoutError
+# once the budget is spent, so the caller can switch to the template.
+#
+# Circuit breaker: BREAKER_FAILURES consecutive failures (errors, blocked
+# finish reasons, deadlines) open the circuit, and for BREAKER_COOLDOWN
+# seconds requests go straight to the template without calling the model.
+# After that one request is let through as a probe: success closes the
+# circuit, failure opens it again.
+#
+# Hedging (EXPIREASE_RECIPE_HEDGE=1): when a call is still running at the
+# p95 of recent model latencies, a second identical request is sent and the
+# first answer wins. At most HEDGE_BUDGET of calls are hedged, so a slow
+# model isn't sent twice the traffic.
+#
+# stats() counts the path that served each call: model, hedged (the second
+# request won), or the reason the template was used: breaker_open,
+# deadline, blocked, error.
+
+MODEL_TIMEOUT = 20.0  # what the model calls used to wait; no budget goes beyond it
+DEADLINE_SECONDS = float(os.getenv("EXPIREASE_RECIPE_DEADLINE", "10"))
+BREAKER_FAILURES = int(os.getenv("EXPIREASE_RECIPE_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("EXPIREASE_RECIPE_BREAKER_COOLDOWN", "30"))
+HEDGE = os.getenv("EXPIREASE_RECIPE_HEDGE", "0") == "1"
+HEDGE_BUDGET = float(os.getenv("EXPIREASE_RECIPE_HEDGE_BUDGET", "0.1"))
+HEDGE_MIN_SAMPLES = 20  # latencies needed before the p95 means anything
+MAX_WORKERS = int(os.getenv("EXPIREASE_RECIPE_WORKERS", "8"))
+
+PATHS = ("model", "hedged", "breaker_open", "deadline", "blocked", "error")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="recipe-model")
+        return _executor
+
+
+def parse_deadline(value):
+    """A request's `deadline` in seconds: None for the default, else a number in (0, MODEL_TIMEOUT]."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        deadline = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("deadline must be a number of seconds")
+    if not math.isfinite(deadline) or not 0 < deadline <= MODEL_TIMEOUT:
+        raise ValueError(f"deadline must be more than 0 and at most {MODEL_TIMEOUT:g} seconds")
+    return deadline
+
+
+class ModelBlocked(RuntimeError):
+    """The model answered without a usable recipe (safety or another non-STOP finish reason)."""
+
+
+class CircuitOpen(RuntimeError):
+    """The model has been failing; the circuit breaker is not letting calls through."""
+
+
+class ModelPolicy:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = "closed"  # closed | open | half_open
+            self.failures = 0  # consecutive
+            self.trips = 0
+            self.opened_at = 0.0
+            self._probing = False
+            self.calls = 0
+            self.hedges = 0
+            self.served = dict.fromkeys(PATHS, 0)
+            self._latencies = deque(maxlen=200)  # seconds of recent successful model calls
+
+    def _budget(self, budget):
+        return min(DEADLINE_SECONDS if budget is None else budget, MODEL_TIMEOUT)
+
+    def admit(self):
+        """Whether a model call may go ahead; False while the circuit is open."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < BREAKER_COOLDOWN:
+                    return False
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    return False
+                self._probing = True
+            self.calls += 1
+            return True
+
+    def record(self, path):
+        """Count the path that served a call and update the breaker: model/hedged succeeded, the rest failed."""
+        with self._lock:
+            self.served[path] += 1
+            if path == "breaker_open":
+                return
+            self._probing = False
+            if path in ("model", "hedged"):
+                self.failures = 0
+                self.state = "closed"
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= BREAKER_FAILURES:
+                if self.state != "open":
+                    self.trips += 1
+                    print(f"Recipe model circuit opened after {self.failures} consecutive failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A call was abandoned without an outcome (the client went away); free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def _percentile(self, fraction):
+        latencies = sorted(self._latencies)
+        return latencies[int(fraction * (len(latencies) - 1))] if latencies else None
+
+    def hedge_after(self):
+        """Seconds after which a call is hedged, or None (hedging off, too few samples, or over budget)."""
+        with self._lock:
+            if not HEDGE or len(self._latencies) < HEDGE_MIN_SAMPLES or self.hedges >= HEDGE_BUDGET * self.calls:
+                return None
+            return self._percentile(0.95)
+
+    def _timed(self, attempt, timeout):
+        start = time.monotonic()
+        result = attempt(timeout)
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return result
+
+    def call(self, attempt, budget=None):
+        """
+        Run attempt(timeout) -> result under the policy, within `budget`
+        seconds (default DEADLINE_SECONDS). attempt raises ModelBlocked for
+        a blocked answer and any other exception for a failure.
+
+        Returns the result, or None when the template should be used
+        instead (circuit open, deadline passed, blocked or failed).
+        """
+        budget = self._budget(budget)
+        if budget <= 0:  # spent before the model was asked: not the model's failure
+            with self._lock:
+                self.served["deadline"] += 1
+            return None
+        if not self.admit():
+            self.record("breaker_open")
+            return None
+        start = time.monotonic()
+        deadline = start + budget
+        hedge_after = self.hedge_after()
+        hedge_at = start + hedge_after if hedge_after is not None and hedge_after < budget else None
+        executor = get_executor()
+        pending = {executor.submit(self._timed, attempt, budget): "model"}
+        failure = "error"
+
+        while pending:
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, _ = wait(pending, timeout=max(0, until - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    result = future.result()
+                except ModelBlocked as e:
+                    print(f"✗ {e}, using fallback")
+                    failure = "blocked"
+                except Exception as e:
+                    print(f"✗ AI generation error: {e}")
+                else:
+                    self.record(path)
+                    return result
+            now = time.monotonic()
+            if pending and now >= deadline:
+                print(f"✗ AI recipe missed its {budget:.1f}s deadline, using fallback")
+                failure = "deadline"
+                break
+            if pending and hedge_at is not None and now >= hedge_at:
+                print(f"Recipe model slower than p95 ({hedge_after:.2f}s), sending a hedged request")
+                with self._lock:
+                    self.hedges += 1
+                pending[executor.submit(self._timed, attempt, deadline - now)] = "hedged"
+                hedge_at = None
+        self.record(failure)
+        return None
+
+    def stream(self, start, budget=None):
+        """
+        call() for a streamed answer: start(timeout) returns an iterator of
+        chunks, which are yielded as they come. Raises CircuitOpen while the
+        circuit is open, TimeoutError once `budget` seconds (default
+        DEADLINE_SECONDS) are spent, checked between chunks, and whatever
+        the stream raises. Hedging doesn't apply to streams.
+        """
+        budget = self._budget(budget)
+        if budget <= 0:  # spent before the model was asked: not the model's failure
+            with self._lock:
+                self.served["deadline"] += 1
+            raise TimeoutError("Recipe deadline passed before the model was asked")
+        if not self.admit():
+            self.record("breaker_open")
+            raise CircuitOpen("Recipe model circuit is open")
+        began = time.monotonic()
+        deadline = began + budget
+        path = None
+        chunks = None
+        try:
+            chunks = start(budget)  # may raise (connection, auth): still a failure the breaker counts
+            for chunk in chunks:
+                if time.monotonic() > deadline:
+                    print(f"✗ AI recipe stream missed its {budget:.1f}s deadline, using fallback")
+                    path = "deadline"
+                    raise TimeoutError(f"Recipe stream missed its {budget:.1f}s deadline")
+                yield chunk
+            path = "model"
+        except ModelBlocked:
+            path = "blocked"
+            raise
+        except Exception:
+            path = path or "error"
+            raise
+        finally:
+            close = getattr(chunks, "close", None) if chunks is not None else None
+            if close is not None:
+                close()  # stop reading the model's stream we gave up on
+            if path is None:
+                self.release()
+            else:
+                if path == "model":
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - began)
+                self.record(path)
+
+    def stats(self):
+        with self._lock:
+            p50, p95 = self._percentile(0.5), self._percentile(0.95)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "served": dict(self.served),
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "deadline_seconds": DEADLINE_SECONDS,
+                "hedging": HEDGE,
+            }
+
+
+_policy = ModelPolicy()
+
+call = _policy.call
+stream = _policy.stream
+hedge_after = _policy.hedge_after
+stats = _policy.stats
+reset = _policy.reset
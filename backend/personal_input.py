@@ -1,34 +1,41 @@
 from flask import Flask, request, jsonify
-from datetime import datetime, timedelta
-import sqlite3
-import os
+from datetime import datetime
 from flask_cors import CORS
+import database
+import expiry_cache
+import inventory_sync
 
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
-BASE_DIR = os.path.dirname(__file__)
-DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
+# Same foodapp.db (and user_food table) as user_info and the main server, so
+# EXPIREASE_FOOD_DB, the schema setups and the expiry cache all apply here too
+DB_NAME = database.FOOD_DB
 
 # ====== DATABASE HELPERS ======
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Borrow a pooled connection to foodapp.db (use as a context manager)."""
+    return database.connection()
 
-def init_db():
-    conn = get_connection()
+# Run by database.ensure_schema() before foodapp.db is first used (or by database.bootstrap())
+def ensure_schema(conn):
     cursor = conn.cursor()
 
-    # 用户食材表
+    # 用户食材表 (user_info's table, plus the category this app records)
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS user_food (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id INTEGER,
         food_name TEXT,
-        category TEXT,
         date_added TEXT,
-        expire_days INTEGER
+        expire_days INTEGER,
+        nutrition TEXT,
+        expires_on TEXT,
+        category TEXT
     )
     """)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(user_food)")]
+    if "category" not in columns:
+        cursor.execute("ALTER TABLE user_food ADD COLUMN category TEXT")
 
     # 食材分类表（可固定）
     cursor.execute("""
@@ -38,8 +45,7 @@ def init_db():
     )
     """)
 
-    conn.commit()
-    conn.close()
+database.register_schema(ensure_schema)
 
 def init_common_categories():
     categories = [
@@ -47,12 +53,8 @@ def init_common_categories():
         "Grain", "Nut", "Snack", "Beverage", "Condiment",
         "Frozen Food", "Canned Food", "Spice", "Pastry"
     ]
-    conn = get_connection()
-    cursor = conn.cursor()
-    for cat in categories:
-        cursor.execute("INSERT OR IGNORE INTO food_category (name) VALUES (?)", (cat,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        conn.executemany("INSERT OR IGNORE INTO food_category (name) VALUES (?)", [(cat,) for cat in categories])
 
 # ====== ROUTES ======
 @app.route("/add_ingredient", methods=["POST"])
@@ -66,24 +68,21 @@ def add_ingredient():
     if not all([user_id, name, category, exp_date]):
         return jsonify({"error": "Missing fields"}), 400
 
-    # 检查类别是否存在
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM food_category WHERE name=?", (category,))
-    if not cursor.fetchone():
-        conn.close()
-        return jsonify({"error": "Invalid category"}), 400
-
-    # 计算 expire_days
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    expire_days = (datetime.strptime(exp_date, "%Y-%m-%d") - datetime.strptime(today_str, "%Y-%m-%d")).days
-
-    cursor.execute(
-        "INSERT INTO user_food (user_id, food_name, category, date_added, expire_days) VALUES (?, ?, ?, ?, ?)",
-        (user_id, name, category, today_str, expire_days)
-    )
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        # 检查类别是否存在
+        if not conn.execute("SELECT 1 FROM food_category WHERE name=?", (category,)).fetchone():
+            return jsonify({"error": "Invalid category"}), 400
+
+        # 计算 expire_days
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        expire_days = (datetime.strptime(exp_date, "%Y-%m-%d") - datetime.strptime(today_str, "%Y-%m-%d")).days
+
+        conn.execute(
+            "INSERT INTO user_food (user_id, food_name, category, date_added, expire_days, expires_on) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, name, category, today_str, expire_days, exp_date)
+        )
+    expiry_cache.invalidate(inventory_sync.inventory_name(user_id))
 
     return jsonify({"success": True})
 
@@ -93,18 +92,14 @@ def my_foods():
     if not user_id:
         return jsonify({"error": "Missing user_id"}), 400
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT food_name, category, date_added, expire_days FROM user_food WHERE user_id=?", 
-        (user_id,)
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT food_name, category, expires_on FROM user_food WHERE user_id=?",
+            (user_id,)
+        ).fetchall()
 
     result = []
-    for name, category, date_added, expire_days in rows:
-        expire_date = (datetime.strptime(date_added, "%Y-%m-%d") + timedelta(days=expire_days)).strftime("%Y-%m-%d")
+    for name, category, expire_date in rows:
         result.append({
             "name": name,
             "category": category,
@@ -114,7 +109,7 @@ def my_foods():
 
 # ====== RUN ======
 if __name__ == "__main__":
-    init_db()
+    database.bootstrap()
     init_common_categories()
     print("Database initialized with common categories.")
     app.run(host="0.0.0.0", port=8080, debug=True)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+import database
+
+# Cache of AI-generated recipes for /generate-recipe.
+#
+# make_recipe used to call the model on every request, even when the
+# inventory and options were the same as a minute ago. Recipes are stored
+# in the recipe_cache table (food DB) under recipe_key(): a SHA-256 of the
+# top ingredients and the expiring-soon items (as sets, so their order
+# doesn't matter) and the normalized recipe_size / dietary_restrictions /
+# cuisine_preference. A repeat request is answered from SQLite instead of a
+# model round trip.
+#
+# Variety: a key holds up to `variety` different recipes. While it has
+# fewer, a request generates a new one and adds it; once the pool is full,
+# requests rotate through it (least recently served first). variety=1 is a
+# plain cache. Only model recipes are cached; the template fallback is
+# cheap and shouldn't stop the model being asked once it is back.
+#
+# Entries expire after TTL_SECONDS or at local midnight (the recipe names
+# what is expiring "in 2 days"); beyond MAX_ENTRIES recipes the least
+# recently used are evicted.
+
+TTL_SECONDS = int(os.getenv("EXPIREASE_RECIPE_CACHE_TTL", str(6 * 60 * 60)))
+MAX_ENTRIES = int(os.getenv("EXPIREASE_RECIPE_CACHE_SIZE", "500"))
+VARIETY = int(os.getenv("EXPIREASE_RECIPE_VARIETY", "1"))
+
+
+def ensure_recipe_cache(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS recipe_cache (
+        recipe_key TEXT NOT NULL,
+        variant INTEGER NOT NULL,
+        recipe TEXT NOT NULL,
+        recipe_day TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER DEFAULT 0,
+        PRIMARY KEY (recipe_key, variant)
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_recipe_cache_last_used ON recipe_cache (last_used)")
+
+
+database.register_schema(ensure_recipe_cache)
+
+
+def _canonical(text):
+    return re.sub(r"\s+", " ", (text or "").strip().casefold())
+
+
+def recipe_key(ingredients, expiring, recipe_size="medium", dietary_restrictions="", cuisine_preference=""):
+    """Cache key for a recipe request: ingredient and expiring-soon names are compared as sets."""
+    canonical = {
+        "ingredients": sorted({_canonical(name) for name in ingredients}),
+        "expiring": sorted({_canonical(name) for name in expiring}),
+        "size": _canonical(recipe_size),
+        "diet": _canonical(dietary_restrictions),
+        "cuisine": _canonical(cuisine_preference),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class RecipeCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.seconds_saved = 0.0
+        self._generate_seconds = []  # recent generation times, for seconds_saved
+
+    def _fresh(self, conn, key):
+        """(variant, recipe) rows of `key` still valid today, least recently served first."""
+        now = time.time()
+        today = datetime.now().strftime("%Y-%m-%d")
+        conn.execute(
+            "DELETE FROM recipe_cache WHERE recipe_key = ? AND (recipe_day != ? OR created_at < ?)",
+            (key, today, now - TTL_SECONDS)
+        )
+        return conn.execute(
+            "SELECT variant, recipe FROM recipe_cache WHERE recipe_key = ? ORDER BY last_used, variant", (key,)
+        ).fetchall()
+
+    def _serve(self, conn, key, variant, recipe):
+        conn.execute(
+            "UPDATE recipe_cache SET last_used = ?, hits = hits + 1 WHERE recipe_key = ? AND variant = ?",
+            (time.time(), key, variant)
+        )
+        with self._lock:
+            self.hits += 1
+            if self._generate_seconds:
+                self.seconds_saved += sum(self._generate_seconds) / len(self._generate_seconds)
+        return recipe
+
+    def _store(self, key, recipe):
+        now = time.time()
+        with database.connection() as conn:
+            conn.execute(
+                "INSERT INTO recipe_cache (recipe_key, variant, recipe, recipe_day, created_at, last_used) "
+                "VALUES (?, (SELECT COALESCE(MAX(variant), -1) + 1 FROM recipe_cache WHERE recipe_key = ?), ?, ?, ?, ?)",
+                (key, key, recipe, datetime.now().strftime("%Y-%m-%d"), now, now)
+            )
+            conn.execute(
+                "DELETE FROM recipe_cache WHERE rowid IN ("
+                "SELECT rowid FROM recipe_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (MAX_ENTRIES,)
+            )
+        with self._lock:
+            self.stored += 1
+
+    def get_or_generate(self, key, generate, variety=None):
+        """
+        Return (recipe, cached) for `key`. While the key has fewer than
+        `variety` (default VARIETY) recipes, generate() is called for a new
+        one; it returns the recipe text, or None when it couldn't make one,
+        in which case a cached recipe is served if there is any.
+        (None, False) when there is neither.
+        """
+        variety = max(1, int(variety or VARIETY))
+        with database.connection() as conn:
+            pool = self._fresh(conn, key)
+            if len(pool) >= variety:
+                return self._serve(conn, key, *pool[0]), True
+        with self._lock:
+            self.misses += 1
+        start = time.perf_counter()
+        recipe = generate()
+        if recipe:
+            with self._lock:
+                self._generate_seconds = (self._generate_seconds + [time.perf_counter() - start])[-50:]
+            self._store(key, recipe)
+            return recipe, False
+        if pool:
+            with database.connection() as conn:
+                return self._serve(conn, key, *pool[0]), True
+        return None, False
+
+    def iter_or_generate(self, key, stream, variety=None):
+        """
+        Streaming get_or_generate(): yields (text, cached) pieces of the
+        recipe. On a miss, stream() must return a generator of text chunks
+        that raises when it can't produce a recipe; its chunks are passed on
+        as they come and the recipe is stored once it finishes, so a stream
+        abandoned or failing halfway is not cached. If it fails before its
+        first chunk, a cached recipe for the key is served when there is one;
+        otherwise the error propagates.
+        """
+        variety = max(1, int(variety or VARIETY))
+        with database.connection() as conn:
+            pool = self._fresh(conn, key)
+            recipe = self._serve(conn, key, *pool[0]) if len(pool) >= variety else None
+        if recipe is not None:
+            yield recipe, True
+            return
+        with self._lock:
+            self.misses += 1
+        start = time.perf_counter()
+        parts = []
+        try:
+            for text in stream():
+                parts.append(text)
+                yield text, False
+        except Exception:
+            if parts or not pool:
+                raise
+            with database.connection() as conn:
+                recipe = self._serve(conn, key, *pool[0])
+            yield recipe, True
+            return
+        with self._lock:
+            self._generate_seconds = (self._generate_seconds + [time.perf_counter() - start])[-50:]
+        self._store(key, "".join(parts))
+
+    def clear(self):
+        with database.connection() as conn:
+            conn.execute("DELETE FROM recipe_cache")
+        with self._lock:
+            self.hits = self.misses = self.stored = 0
+            self.seconds_saved = 0.0
+            self._generate_seconds = []
+
+    def stats(self):
+        with database.connection() as conn:
+            entries, keys = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT recipe_key) FROM recipe_cache"
+            ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "keys": keys,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored": self.stored,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "model_seconds_saved": round(self.seconds_saved, 2),
+            }
+
+
+_cache = RecipeCache()
+
+get_or_generate = _cache.get_or_generate
+iter_or_generate = _cache.iter_or_generate
+clear = _cache.clear
+stats = _cache.stats
@@ -0,0 +1,256 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from PIL import Image
+import database
+
+# Result cache for photo scans, keyed by the photo's content.
+#
+# Retries, double taps and flaky networks make clients upload the same
+# fridge photo again; without this every copy re-ran the model call and
+# re-added the same items. Parsed item lists are stored in the scan_cache
+# table (food DB) under the SHA-256 of the uploaded bytes, so a repeat scan
+# returns in milliseconds, and scanner marks the items as cached so they
+# aren't inserted into the inventory a second time.
+#
+# With EXPIREASE_SCAN_CACHE_PHASH=1 a 64-bit difference hash (dHash) of the
+# picture also matches copies that were re-encoded or resized on the way
+# (messaging apps, screenshots) within PHASH_MAX_DISTANCE differing bits.
+#
+# Entries expire after TTL_SECONDS or at local midnight, whichever comes
+# first, because the model answers "5 days" relative to the scan date.
+# Beyond MAX_ENTRIES the least recently used entries are evicted.
+# Concurrent scans of the same photo in this process share one model call;
+# a caller that has waited WAIT_SECONDS for it scans the photo itself.
+
+TTL_SECONDS = int(os.getenv("EXPIREASE_SCAN_CACHE_TTL", str(6 * 60 * 60)))
+MAX_ENTRIES = int(os.getenv("EXPIREASE_SCAN_CACHE_SIZE", "500"))
+USE_PHASH = os.getenv("EXPIREASE_SCAN_CACHE_PHASH", "0") == "1"
+PHASH_MAX_DISTANCE = 4
+WAIT_SECONDS = float(os.getenv("EXPIREASE_SCAN_CACHE_WAIT", "60"))  # for a duplicate scan in flight
+
+
+def ensure_scan_cache(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS scan_cache (
+        content_hash TEXT PRIMARY KEY,
+        phash TEXT,
+        items TEXT NOT NULL,
+        model_bytes INTEGER,
+        scan_day TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER DEFAULT 0
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_cache_last_used ON scan_cache (last_used)")
+
+
+database.register_schema(ensure_scan_cache)
+
+
+def content_hash(data):
+    """SHA-256 of the photo: bytes-like, or a seekable binary file read in chunks."""
+    if not hasattr(data, "read"):
+        return hashlib.sha256(data).hexdigest()
+    data.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: data.read(1024 * 1024), b""):
+        digest.update(chunk)
+    data.seek(0)
+    return digest.hexdigest()
+
+
+def perceptual_hash(data):
+    """dHash: compares neighbouring pixels of a 9x8 grayscale thumbnail; 16 hex digits."""
+    if hasattr(data, "read"):
+        data.seek(0)
+        im = Image.open(data)
+    else:
+        im = Image.open(io.BytesIO(data))
+    im.draft("L", (64, 64))
+    small = im.convert("L").resize((9, 8), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def _distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class ScanCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # content hash -> Event set when the first scan finishes
+        self.hits = 0
+        self.phash_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.wait_timeouts = 0
+        self.bytes_saved = 0
+
+    def _lookup(self, key, phash):
+        now = time.time()
+        today = datetime.now().strftime("%Y-%m-%d")
+        with database.connection() as conn:
+            row = conn.execute(
+                "SELECT content_hash, items, model_bytes, created_at, scan_day FROM scan_cache WHERE content_hash = ?",
+                (key,)
+            ).fetchone()
+            matched_by_phash = False
+            if row is None and phash:
+                fresh = conn.execute(
+                    "SELECT content_hash, items, model_bytes, created_at, scan_day, phash FROM scan_cache "
+                    "WHERE phash IS NOT NULL AND scan_day = ? AND created_at > ?",
+                    (today, now - TTL_SECONDS)
+                ).fetchall()
+                near = [r for r in fresh if _distance(r[5], phash) <= PHASH_MAX_DISTANCE]
+                if near:
+                    row = min(near, key=lambda r: _distance(r[5], phash))[:5]
+                    matched_by_phash = True
+            if row is None:
+                return None, False
+            cached_key, items, model_bytes, created_at, scan_day = row
+            if scan_day != today or now - created_at > TTL_SECONDS:
+                conn.execute("DELETE FROM scan_cache WHERE content_hash = ?", (cached_key,))
+                return None, False
+            conn.execute(
+                "UPDATE scan_cache SET last_used = ?, hits = hits + 1 WHERE content_hash = ?", (now, cached_key)
+            )
+        with self._lock:
+            self.hits += 1
+            self.phash_hits += matched_by_phash
+            self.bytes_saved += model_bytes or 0
+        return json.loads(items), True
+
+    def _store(self, key, phash, items, model_bytes):
+        now = time.time()
+        with database.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scan_cache "
+                "(content_hash, phash, items, model_bytes, scan_day, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, phash, json.dumps(items), model_bytes, datetime.now().strftime("%Y-%m-%d"), now, now)
+            )
+            conn.execute(
+                "DELETE FROM scan_cache WHERE content_hash IN ("
+                "SELECT content_hash FROM scan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (MAX_ENTRIES,)
+            )
+
+    def _claim(self, key, phash):
+        """
+        (items, owner): the cached items for the photo, or (None, True) once
+        this caller owns its scan (call _release after), or (None, False)
+        when the scan it waited on took longer than WAIT_SECONDS and this
+        caller should scan the photo without owning it.
+        """
+        while True:
+            items, cached = self._lookup(key, phash)
+            if cached:
+                return items, False
+            with self._lock:
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    return None, True
+                self.coalesced += 1
+            # The same photo is being scanned right now; reuse its result
+            if not waiting.wait(WAIT_SECONDS):
+                with self._lock:
+                    self.wait_timeouts += 1
+                    self.misses += 1
+                print(f"Duplicate scan still running after {WAIT_SECONDS:g}s, scanning again")
+                return None, False
+
+    def _release(self, key, owner):
+        if owner:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def get_or_scan(self, data, scan, keep=None):
+        """
+        Return (items, cached) for the photo `data` (see content_hash). On a miss, scan()
+        must return (items, model_bytes); non-empty results are stored, unless
+        keep() says no once the scan is done (its caller gave up on it).
+        """
+        key = content_hash(data)
+        phash = perceptual_hash(data) if USE_PHASH else None
+        items, owner = self._claim(key, phash)
+        if items is not None:
+            return items, True
+        try:
+            items, model_bytes = scan()
+            if items and (keep is None or keep()):
+                self._store(key, phash, items, model_bytes)
+            return items, False
+        finally:
+            self._release(key, owner)
+
+    def iter_or_scan(self, data, scan, keep=None):
+        """
+        Streaming get_or_scan(): yields (item, cached) pairs. On a miss,
+        scan() must return a generator that yields items and returns
+        model_bytes; its items are passed on as they come and stored once
+        it finishes, so a scan abandoned halfway is not cached. Nor is one
+        that ran to the end after its caller gave up: keep() returning False.
+        """
+        key = content_hash(data)
+        phash = perceptual_hash(data) if USE_PHASH else None
+        items, owner = self._claim(key, phash)
+        if items is not None:
+            for item in items:
+                yield item, True
+            return
+        try:
+            items = []
+            scanning = scan()
+            while True:
+                try:
+                    item = next(scanning)
+                except StopIteration as done:
+                    model_bytes = done.value
+                    break
+                items.append(item)
+                yield item, False
+            if items and (keep is None or keep()):
+                self._store(key, phash, items, model_bytes)
+        finally:
+            self._release(key, owner)
+
+    def clear(self):
+        with database.connection() as conn:
+            conn.execute("DELETE FROM scan_cache")
+
+    def stats(self):
+        with database.connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM scan_cache").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "phash_hits": self.phash_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "wait_timeouts": self.wait_timeouts,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+
+_cache = ScanCache()
+
+get_or_scan = _cache.get_or_scan
+iter_or_scan = _cache.iter_or_scan
+clear = _cache.clear
+stats = _cache.stats
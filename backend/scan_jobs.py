@@ -0,0 +1,294 @@
+import json
+import os
+import threading
+import time
+import uuid
+import database
+import scan_pipeline
+
+# Durable queue of photo-scan jobs for /photo_scanner.
+#
+# A multi-photo scan used to hold a Flask worker thread for every model
+# round trip. Now the request stores the uploaded photos in scan_job_images
+# (food DB), gets a job id back at once, and a small pool of background
+# workers (JobQueue) claims queued jobs, analyses their photos on the
+# shared scan pool (scan_pipeline.stream_images) and records each photo's
+# items as it finishes, so /scan-jobs/<id> can report progress while the
+# job runs. Photo bytes are dropped once a job is finished.
+#
+# Jobs live in SQLite, so they survive a restart: start() puts jobs left
+# "running" by a dead process back in the queue, and only photos without a
+# recorded result are analysed again (their items were already saved).
+# That assumes one process runs the workers.
+#
+# stats() reports queue depth plus wait (enqueue -> start) and processing
+# (start -> finish) times over the last STATS_WINDOW finished jobs.
+
+WORKERS = int(os.getenv("EXPIREASE_SCAN_JOB_WORKERS", "2"))
+POLL_SECONDS = 2.0          # also pick up jobs queued by other processes
+KEEP_SECONDS = 24 * 60 * 60  # finished jobs are pruned after this
+STATS_WINDOW = 200
+
+
+def ensure_scan_jobs(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS scan_jobs (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        images_total INTEGER NOT NULL,
+        images_done INTEGER NOT NULL DEFAULT 0,
+        items_found INTEGER NOT NULL DEFAULT 0,
+        max_concurrency INTEGER,
+        error TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_jobs_status_created ON scan_jobs (status, created_at)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS scan_job_images (
+        job_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        filename TEXT,
+        data BLOB,
+        result TEXT,
+        seconds REAL,
+        PRIMARY KEY (job_id, idx)
+    )
+    """)
+
+
+database.register_schema(ensure_scan_jobs)
+
+
+def enqueue(images, max_concurrency=None):
+    """Queue a scan of `images` ((filename, bytes) pairs); returns the job id."""
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with database.connection() as conn:
+        conn.execute(
+            "INSERT INTO scan_jobs (id, status, images_total, max_concurrency, created_at) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, len(images), max_concurrency, now)
+        )
+        conn.executemany(
+            "INSERT INTO scan_job_images (job_id, idx, filename, data) VALUES (?, ?, ?, ?)",
+            [(job_id, index, filename, data) for index, (filename, data) in enumerate(images)]
+        )
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Status of one job, or None if there is no such job.
+
+    Returns:
+        dict with job_id, status (queued/running/done/failed), images,
+        images_done, items_found, wait_seconds, processing_seconds, error and
+        results: one entry per photo in upload order, its items, an
+        [{'item': 'Error', 'error': ...}] entry, or None while pending.
+    """
+    with database.connection() as conn:
+        job = conn.execute(
+            "SELECT status, images_total, images_done, items_found, error, created_at, started_at, finished_at "
+            "FROM scan_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if job is None:
+            return None
+        rows = conn.execute(
+            "SELECT result FROM scan_job_images WHERE job_id = ? ORDER BY idx", (job_id,)
+        ).fetchall()
+    status, total, done, found, error, created_at, started_at, finished_at = job
+    now = time.time()
+    results = []
+    for (result,) in rows:
+        result = json.loads(result) if result else None
+        if isinstance(result, dict):
+            result = [{'item': 'Error', 'error': result['error']}]
+        results.append(result)
+    return {
+        "job_id": job_id,
+        "status": status,
+        "images": total,
+        "images_done": done,
+        "items_found": found,
+        "wait_seconds": round((started_at or now) - created_at, 3),
+        "processing_seconds": round((finished_at or now) - started_at, 3) if started_at else None,
+        "error": error,
+        "results": results,
+    }
+
+
+def stats():
+    with database.connection() as conn:
+        depth = dict(conn.execute("SELECT status, COUNT(*) FROM scan_jobs GROUP BY status").fetchall())
+        finished = conn.execute(
+            "SELECT started_at - created_at, finished_at - started_at FROM scan_jobs "
+            "WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?", (STATS_WINDOW,)
+        ).fetchall()
+
+    def summary(values):
+        if not values:
+            return {"avg": None, "p50": None, "p95": None, "max": None}
+        values = sorted(values)
+        return {
+            "avg": round(sum(values) / len(values), 3),
+            "p50": round(values[len(values) // 2], 3),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            "max": round(values[-1], 3),
+        }
+
+    return {
+        "queued": depth.get("queued", 0),
+        "running": depth.get("running", 0),
+        "done": depth.get("done", 0),
+        "failed": depth.get("failed", 0),
+        "wait_seconds": summary([row[0] for row in finished]),
+        "processing_seconds": summary([row[1] for row in finished]),
+    }
+
+
+def _claim():
+    """Mark the oldest queued job running and return its (id, max_concurrency), or None."""
+    with database.connection() as conn:
+        return conn.execute(
+            "UPDATE scan_jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+            "WHERE id = (SELECT id FROM scan_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+            "AND status = 'queued' RETURNING id, max_concurrency",
+            (time.time(),)
+        ).fetchone()
+
+
+def _prune():
+    with database.connection() as conn:
+        conn.execute(
+            "DELETE FROM scan_job_images WHERE job_id IN "
+            "(SELECT id FROM scan_jobs WHERE finished_at < ?)", (time.time() - KEEP_SECONDS,)
+        )
+        conn.execute("DELETE FROM scan_jobs WHERE finished_at < ?", (time.time() - KEEP_SECONDS,))
+
+
+class JobQueue:
+    """
+    Background workers for queued scan jobs.
+
+    analyze_iter(data) yields the items of a photo's bytes
+    (scanner.iter_analyze_image with save=False); save_items(items) adds one photo's items to the
+    inventory once the photo is finished.
+    """
+
+    def __init__(self, analyze_iter, save_items, workers=WORKERS):
+        self.analyze_iter = analyze_iter
+        self.save_items = save_items
+        self.workers = workers
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._finished = threading.Condition(self._lock)
+        self._finished_count = 0
+        self._stopping = False
+
+    def start(self):
+        """Start the workers (once), re-queueing jobs a previous process left running."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            with database.connection() as conn:
+                requeued = conn.execute("UPDATE scan_jobs SET status = 'queued' WHERE status = 'running'").rowcount
+            if requeued:
+                print(f"Re-queued {requeued} interrupted scan jobs")
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"scan-job-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        with self._lock:
+            self._stopping = True
+            self._wake.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, images, max_concurrency=None):
+        """enqueue() and wake a worker; returns the job id."""
+        self.start()
+        job_id = enqueue(images, max_concurrency)
+        with self._lock:
+            self._wake.notify()
+        return job_id
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job is done or failed (or timeout passes); returns get_job()."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                finished_before = self._finished_count
+            job = get_job(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            with self._lock:
+                if self._finished_count == finished_before:  # nothing finished since we looked
+                    self._finished.wait(POLL_SECONDS if remaining is None else min(remaining, POLL_SECONDS))
+
+    def _work(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+            claimed = _claim()
+            if claimed is None:
+                with self._lock:
+                    if not self._stopping:
+                        self._wake.wait(POLL_SECONDS)
+                continue
+            job_id, max_concurrency = claimed
+            try:
+                self._run(job_id, max_concurrency)
+                status, error = "done", None
+            except Exception as e:
+                print(f"Scan job {job_id} failed: {e}")
+                status, error = "failed", str(e)
+            with database.connection() as conn:
+                conn.execute(
+                    "UPDATE scan_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, error, time.time(), job_id)
+                )
+                conn.execute("UPDATE scan_job_images SET data = NULL WHERE job_id = ?", (job_id,))
+            with self._lock:
+                self._finished_count += 1
+                self._finished.notify_all()
+            _prune()
+
+    def _run(self, job_id, max_concurrency):
+        with database.connection() as conn:
+            pending = conn.execute(
+                "SELECT idx, data FROM scan_job_images WHERE job_id = ? AND result IS NULL ORDER BY idx", (job_id,)
+            ).fetchall()
+        indexes = [index for index, _ in pending]
+        items = {index: [] for index in indexes}
+        events = scan_pipeline.stream_images([data for _, data in pending], self.analyze_iter,
+                                             max_concurrency=max_concurrency)
+        for event in events:
+            index = indexes[event["index"]]
+            if event["event"] == "item":
+                items[index].append(event["item"])
+                continue
+            if "error" in event:
+                result = {"error": event["error"]}
+            else:
+                result = items[index]
+                self.save_items(result)
+            with database.connection() as conn:
+                conn.execute(
+                    "UPDATE scan_job_images SET result = ?, seconds = ? WHERE job_id = ? AND idx = ?",
+                    (json.dumps(result), event["seconds"], job_id, index)
+                )
+                conn.execute(
+                    "UPDATE scan_jobs SET images_done = images_done + 1, items_found = items_found + ? WHERE id = ?",
+                    (len(result) if isinstance(result, list) else 0, job_id)
+                )
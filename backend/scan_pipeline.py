@@ -0,0 +1,193 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Parallel photo analysis for /photo_scanner.
+#
+# Each photo costs one blocking model call, so a multi-photo upload used to
+# take the sum of the model latencies. scan_images() fans the photos of one
+# request out over a process-wide thread pool and gathers the results back
+# in upload order, so the request takes roughly as long as its slowest photo.
+#
+# Two limits apply: MAX_WORKERS bounds model calls in flight across every
+# request in the process, and PER_REQUEST_LIMIT stops one big upload from
+# taking all of them. A photo whose analysis runs longer than the timeout is
+# reported as an error; its worker thread can't be interrupted and finishes
+# in the background, which is why analysis runs with save=False and callers
+# only save the results they actually return. Code running inside it can
+# ask abandoned() (scanner does, so the scan cache doesn't keep results
+# nobody saved).
+#
+# stream_images() is the streaming form for /photo_scanner/stream: each
+# photo's items are passed on the moment its analysis yields them, so the
+# first detection reaches the client after one photo's latency instead of
+# the whole batch's. A photo that times out stops at its next item.
+
+MAX_WORKERS = int(os.getenv("EXPIREASE_SCAN_WORKERS", "8"))
+PER_REQUEST_LIMIT = int(os.getenv("EXPIREASE_SCAN_PER_REQUEST", "4"))
+IMAGE_TIMEOUT = float(os.getenv("EXPIREASE_SCAN_TIMEOUT", "60"))
+QUEUED_POLL_SECONDS = 0.5  # how often to look for queued photos that have started
+
+_executor = None
+_executor_lock = threading.Lock()
+_current = threading.local()  # the state dict of the analysis running on this worker thread
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="photo-scan")
+        return _executor
+
+
+def abandoned():
+    """True inside an analysis the pipeline has given up on (timed out, or its client went away)."""
+    state = getattr(_current, "state", None)
+    return bool(state and state.get("cancelled"))
+
+
+def _run(analyze, source, started):
+    started["at"] = time.monotonic()
+    _current.state = started
+    try:
+        return analyze(source)
+    finally:
+        _current.state = None
+
+
+def scan_images(sources, analyze, max_concurrency=None, timeout=IMAGE_TIMEOUT):
+    """
+    Call analyze(source) for every source on the shared scan pool, with at
+    most `max_concurrency` (default PER_REQUEST_LIMIT) running for this call.
+
+    Returns:
+        one dict per source, in input order: {"index", "items", "seconds"} on
+        success or {"index", "error", "seconds"} if analyze raised or ran past
+        `timeout` seconds (None waits forever).
+    """
+    limit = max(1, min(max_concurrency or PER_REQUEST_LIMIT, MAX_WORKERS))
+    executor = get_executor()
+    results = [None] * len(sources)
+    queued = deque(enumerate(sources))
+    running = {}  # future -> (index, {"at": start time once a worker picks it up})
+
+    while queued or running:
+        while queued and len(running) < limit:
+            index, source = queued.popleft()
+            started = {}
+            running[executor.submit(_run, analyze, source, started)] = (index, started)
+
+        wait_for = None
+        if timeout is not None:
+            now = time.monotonic()
+            deadlines = [s["at"] + timeout for _, s in running.values() if "at" in s]
+            wait_for = max(0, min(deadlines) - now) if deadlines else timeout
+            if len(deadlines) < len(running):
+                wait_for = min(wait_for, QUEUED_POLL_SECONDS)
+        done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for future in done:
+            index, started = running.pop(future)
+            seconds = round(now - started.get("at", now), 3)
+            try:
+                results[index] = {"index": index, "items": future.result(), "seconds": seconds}
+            except Exception as e:
+                print(f"Error analysing image {index + 1}: {e}")
+                results[index] = {"index": index, "error": str(e), "seconds": seconds}
+
+        if timeout is not None:
+            for future, (index, started) in list(running.items()):
+                if "at" in started and now - started["at"] >= timeout:
+                    print(f"Image {index + 1} timed out after {timeout:g}s")
+                    started["cancelled"] = True
+                    del running[future]
+                    results[index] = {"index": index, "error": f"Timed out after {timeout:g}s",
+                                      "seconds": round(now - started["at"], 3)}
+    return results
+
+
+def _run_streaming(analyze_iter, index, source, state, events):
+    state["at"] = time.monotonic()
+    _current.state = state
+    items = analyze_iter(source)
+    try:
+        for item in items:
+            if state["cancelled"]:
+                break
+            events.put((index, "item", item))
+        events.put((index, "done", None))
+    except Exception as e:
+        events.put((index, "error", e))
+    finally:
+        close = getattr(items, "close", None)
+        if close:
+            close()
+        _current.state = None
+
+
+def stream_images(sources, analyze_iter, max_concurrency=None, timeout=IMAGE_TIMEOUT):
+    """
+    scan_images() for an analyze_iter(source) that yields items one by one.
+
+    Yields events as they happen, across photos in completion order:
+        {"event": "item", "index", "item"} for every item, and once per
+        source {"event": "image", "index", "items": <count>, "seconds"} or
+        {"event": "image", "index", "error", "seconds"}.
+    """
+    limit = max(1, min(max_concurrency or PER_REQUEST_LIMIT, MAX_WORKERS))
+    executor = get_executor()
+    events = queue.Queue()
+    queued = deque(enumerate(sources))
+    running = {}  # index -> {"at": start time once a worker picks it up, "cancelled", "items"}
+
+    try:
+        while queued or running:
+            while queued and len(running) < limit:
+                index, source = queued.popleft()
+                running[index] = state = {"cancelled": False, "items": 0}
+                executor.submit(_run_streaming, analyze_iter, index, source, state, events)
+
+            wait_for = None
+            if timeout is not None:
+                now = time.monotonic()
+                deadlines = [s["at"] + timeout for s in running.values() if "at" in s]
+                wait_for = max(0, min(deadlines) - now) if deadlines else timeout
+                if len(deadlines) < len(running):
+                    wait_for = min(wait_for, QUEUED_POLL_SECONDS)
+            try:
+                index, kind, payload = events.get(timeout=wait_for)
+            except queue.Empty:
+                pass
+            else:
+                state = running.get(index)
+                if state is not None:  # otherwise it already timed out
+                    if kind == "item":
+                        state["items"] += 1
+                        yield {"event": "item", "index": index, "item": payload}
+                    else:
+                        del running[index]
+                        seconds = round(time.monotonic() - state.get("at", time.monotonic()), 3)
+                        if kind == "error":
+                            print(f"Error analysing image {index + 1}: {payload}")
+                            yield {"event": "image", "index": index, "error": str(payload), "seconds": seconds}
+                        else:
+                            yield {"event": "image", "index": index, "items": state["items"], "seconds": seconds}
+
+            if timeout is not None:
+                now = time.monotonic()
+                for index, state in list(running.items()):
+                    if "at" in state and now - state["at"] >= timeout:
+                        print(f"Image {index + 1} timed out after {timeout:g}s")
+                        state["cancelled"] = True
+                        del running[index]
+                        yield {"event": "image", "index": index, "error": f"Timed out after {timeout:g}s",
+                               "seconds": round(now - state["at"], 3)}
+    finally:
+        # The client went away (or we're done): stop photos still being analysed at their next item
+        for state in running.values():
+            state["cancelled"] = True
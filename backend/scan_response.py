@@ -0,0 +1,178 @@
+import json
+from datetime import datetime, timedelta
+
+# Reading the scanner model's answer.
+#
+# In JSON mode (scanner.SCAN_OUTPUT) the model is asked for
+#   {"items": [{"name", "expiration", "days", "category", "confidence"}, ...]}
+# and streamed. ItemStream tracks string/escape state and bracket depth as
+# the chunks arrive and hands back each item object the moment its closing
+# brace does, so nothing waits for the end of the response and a reply cut
+# off mid-list still gives the items before the cut. Code fences or prose
+# around the JSON are skipped; a bare array of items works too.
+#
+# When no item comes out of the JSON (text mode, or a model that ignored the
+# instructions) the whole text goes through parse_text_items(), the
+# "Item: / Expiration: / Category:" line format the scanner always used.
+
+NO_DATE = {"", "none", "null", "unknown", "n/a", "not visible", "no label"}
+
+
+def response_text(response):
+    """Text of one response (or streamed chunk); "" when it has none."""
+    if not response or not getattr(response, "candidates", None):
+        return ""
+    # defensive access to parts
+    parts = getattr(response.candidates[0].content, "parts", None)
+    if not parts:
+        return ""
+    return "".join(getattr(part, "text", "") or "" for part in parts)
+
+
+def iter_text(response):
+    """Text chunks of a streamed response, or the single text of a plain one."""
+    if not hasattr(response, "__iter__"):
+        yield response_text(response)
+        return
+    for chunk in response:
+        yield response_text(chunk)
+
+
+def normalize_item(obj, today=None):
+    """
+    Scanner entry for one item object; None when it has no name.
+
+    `days` fills in the expiration when the model gave no date, so those
+    items need no shelf-life lookup later.
+    """
+    if not isinstance(obj, dict):
+        return None
+    name = obj.get("name") or obj.get("item")
+    if not isinstance(name, str) or not name.strip():
+        return None
+    expiration = obj.get("expiration") or obj.get("expiration_date")
+    if not isinstance(expiration, str) or expiration.strip().lower() in NO_DATE:
+        expiration = None
+    days = obj.get("days", obj.get("days_until_expiry"))
+    try:
+        days = int(days) if days is not None else None
+    except (TypeError, ValueError):
+        days = None
+    if expiration is None and days is not None:
+        expiration = ((today or datetime.today()) + timedelta(days=max(days, 0))).strftime("%Y-%m-%d")
+    entry = {
+        "item": name.strip(),
+        "expiration": expiration.strip() if expiration else None,
+        "category": obj.get("category") or None,
+    }
+    if days is not None:
+        entry["days"] = days
+    try:
+        entry["confidence"] = float(obj["confidence"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return entry
+
+
+def parse_text_items(text):
+    """Items from the "Item: <name> / Expiration: <text> / Category: <category>" line format."""
+    items = []
+    current = None
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip().lstrip("-*#0123456789. ").lower()
+        value = value.strip().strip("*").strip()
+        if key.startswith("item") or key == "name":
+            if current:
+                items.append(current)
+            current = {"item": value, "expiration": None, "category": None}
+        elif current and key.startswith("expiration"):
+            current["expiration"] = value or None
+        elif current and key.startswith("category"):
+            current["category"] = value or None
+    if current:
+        items.append(current)
+    return [item for item in items if item["item"]]
+
+
+class ItemStream:
+    """Incremental parser: feed() text chunks, get back the items completed so far."""
+
+    def __init__(self, today=None):
+        self.today = today
+        self.text = ""
+        self.items = 0
+        self._stack = []       # open "{" / "[" of the JSON being read
+        self._in_string = False
+        self._escape = False
+        self._item = None      # characters of the item object being read
+        self._item_depth = 0
+
+    def feed(self, chunk):
+        found = []
+        self.text += chunk
+        for ch in chunk:
+            if self._item is not None:
+                self._item.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = bool(self._stack)  # quotes in prose around the JSON don't count
+            elif ch in "{[":
+                if ch == "{" and self._item is None and self._stack and self._stack[-1] == "[":
+                    self._item = [ch]
+                    self._item_depth = len(self._stack)
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if self._item is not None and len(self._stack) == self._item_depth:
+                    entry = self._finish("".join(self._item))
+                    self._item = None
+                    if entry:
+                        found.append(entry)
+        self.items += len(found)
+        return found
+
+    def _finish(self, raw):
+        try:
+            return normalize_item(json.loads(raw), self.today)
+        except ValueError:
+            return None
+
+    def close(self):
+        """Items only the end of the response can give: a lone object, or the text fallback."""
+        if self.items:
+            return []
+        body = self.text.strip()
+        if body.startswith("```"):
+            body = body.strip("`").removeprefix("json").strip()
+        try:
+            obj = json.loads(body)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            entry = normalize_item(obj, self.today)
+            if entry:
+                self.items = 1
+                return [entry]
+            if isinstance(obj.get("items"), list):
+                return []  # a valid, empty answer
+        items = parse_text_items(self.text)
+        self.items = len(items)
+        return items
+
+
+def iter_items(chunks, today=None):
+    """Items from a stream of text chunks, each yielded as soon as it is complete."""
+    stream = ItemStream(today)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
@@ -1,85 +1,182 @@
 import os
-from dotenv import load_dotenv
-from PIL import Image
-import google.generativeai as genai
+import threading
 from datetime import datetime, timedelta
-from shelf_life_api import estimate_expiration
+from shelf_life_api import estimate_expirations
+from image_prep import prepare_image
+import scan_cache
+import scan_pipeline
+import catalog_index
+import date_text
+import scan_response
+import uploads
+import model_client
 from food_data import add_food, check_food_status
 
-# Load environment variables from .env file
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+# The Gemini client is created by get_model() on the first scan, not at
+# import: google.generativeai is the slowest import in the server, and a
+# worker that never scans shouldn't pay for it. Tests assign a stub to
+# `model` directly.
+model = None
+_model_loaded = False
+_model_lock = threading.Lock()
 
-# Initialize Gemini client
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+
+def get_model():
+    """The scanner's model client (None without GEMINI_API_KEY), created once, on first use."""
+    global model, _model_loaded
+    if model is None and not _model_loaded:
+        with _model_lock:
+            if model is None and not _model_loaded:
+                model = _load_model()
+                _model_loaded = True
+    return model
+
+
+def _load_model():
+    # The real model unless EXPIREASE_MODEL_CLIENT picks a fake, stub or replay (see model_client.py)
+    return model_client.load("scanner", _load_gemini)
+
+
+def _load_gemini():
+    from dotenv import load_dotenv
+    # Load environment variables from .env file
+    load_dotenv()
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        print("Warning: No GEMINI_API_KEY found. Image analysis will not work.")
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
     print("Photo scanner AI model initialized successfully (gemini-2.0-flash-exp)")
-else:
-    model = None
-    print("Warning: No GEMINI_API_KEY found. Image analysis will not work.")
+    return genai.GenerativeModel('gemini-2.0-flash-exp')
+
+
+# "json": ask for a JSON list of items and read it as it streams in (see
+# scan_response); "text": the older "Item: / Expiration: / Category:" lines.
+# Either way a reply that isn't valid JSON is read with the line parser.
+SCAN_OUTPUT = os.getenv("EXPIREASE_SCAN_OUTPUT", "json")
+JSON_CONFIG = {"response_mime_type": "application/json"}
+
+def analyze_image(image, save=True):
+    """
+    Identify the food items in one photo: a path, bytes, bytearray,
+    memoryview, or a binary stream such as an uploaded FileStorage (read
+    in memory, see uploads.image_data). With save=False the items are only
+    returned, so callers analysing several photos in parallel can add them
+    to the database afterwards, in upload order, with save_items().
+
+    A photo scanned recently is answered from the scan cache without a model
+    call; its items come back with cached=True and are not added again.
+    """
+    return list(iter_analyze_image(image, save))
+
+
+def iter_analyze_image(image, save=True):
+    """analyze_image() as a generator: each item is yielded (and saved) as soon as it is identified."""
+    hits = 0
+    with uploads.image_data(image) as data:
+        # A scan the pipeline timed out isn't cached: nobody saved its items, so a retry must
+        scans = scan_cache.iter_or_scan(data, lambda: _iter_scan(data), lambda: not scan_pipeline.abandoned())
+        for entry, cached in scans:
+            entry = dict(entry)
+            if cached:
+                hits += 1
+                entry['cached'] = True
+            if save:
+                save_items([entry])
+            yield entry
+    if hits:
+        print(f"Scan cache hit: {hits} items, skipping the model call")
+
+
+def _iter_scan(data):
+    """
+    Run the model on one photo, yielding items as the response streams in;
+    returns the number of bytes sent to the model.
 
-def analyze_image(image_path):
-    # Open image and convert to bytes
-    im = Image.open(image_path)
+    Items with an expiration (from the model or the catalog) come out right
+    away; the rest wait for one batched shelf-life lookup at the end.
+    """
+    # Downscale, orient and re-encode the photo before it goes to the model
+    image_blob, prep_report = prepare_image(data)
+    print(f"Image prep: {prep_report['bytes_before']} -> {prep_report['bytes_after']} bytes, "
+          f"{prep_report['size_before']} -> {prep_report['size_after']}, timings ms {prep_report['timings_ms']}")
     today_str = datetime.today().strftime('%Y-%m-%d')
     print(f"Today's date: {today_str}")
     # Send prompt and image to Gemini for analysis
-    prompt = {
-        "text": (
-            f"Today's date is {today_str}. "
-            "Identify all food items in the image. For each item, extract:\n"
-            "- The item name\n"
-            "- The labeled expiration date (if present) in the format YYYY-MM-DD or as '<n> days'\n"
-            "- The number of days until the product expires (from today)\n"
-            "- The food category (e.g., Fruit, Vegetable, Meat, Dairy, etc.)\n"
-            "If no label is present, estimate the number of days for the non-labeled items to expire. "
-            "For each item, respond in the format:\n"
-            "Item: <item>\nExpiration: <expiration text>\nCategory: <category>\n"
-            "List each item on a new line."
-        )
-    }
-
-    response = model.generate_content(contents=[prompt, im])
-    items = []
-
-    # Parse Gemini response text
-    if response and response.candidates:
-        # defensive access to parts
-        parts = getattr(response.candidates[0].content, "parts", None)
-        if parts and len(parts) > 0:
-            text = parts[0].text
+    if SCAN_OUTPUT == "json":
+        prompt = {
+            "text": (
+                f"Today's date is {today_str}. "
+                "Identify all food items in the image. Respond with JSON only, in this shape:\n"
+                '{"items": [{"name": <item name>, '
+                '"expiration": <labeled expiration date as YYYY-MM-DD, or null if there is no label>, '
+                '"days": <number of days from today until the item expires; estimate it if there is no label>, '
+                '"category": <food category, e.g. Fruit, Vegetable, Meat, Dairy>, '
+                '"confidence": <0 to 1, how sure you are of the name>}]}'
+            )
+        }
+        response = get_model().generate_content(contents=[prompt, image_blob], generation_config=JSON_CONFIG, stream=True)
+    else:
+        prompt = {
+            "text": (
+                f"Today's date is {today_str}. "
+                "Identify all food items in the image. For each item, extract:\n"
+                "- The item name\n"
+                "- The labeled expiration date (if present) in the format YYYY-MM-DD or as '<n> days'\n"
+                "- The number of days until the product expires (from today)\n"
+                "- The food category (e.g., Fruit, Vegetable, Meat, Dairy, etc.)\n"
+                "If no label is present, estimate the number of days for the non-labeled items to expire. "
+                "For each item, respond in the format:\n"
+                "Item: <item>\nExpiration: <expiration text>\nCategory: <category>\n"
+                "List each item on a new line."
+            )
+        }
+        response = get_model().generate_content(contents=[prompt, image_blob])
+
+    # Items come out of the stream as soon as each one is complete
+    stream = scan_response.ItemStream()
+    unlabeled = []
+    for chunk in scan_response.iter_text(response):
+        for entry in stream.feed(chunk):
+            if _fill_from_catalog(entry):
+                yield entry
+            else:
+                unlabeled.append(entry)
+    for entry in stream.close():
+        if _fill_from_catalog(entry):
+            yield entry
         else:
-            text = ""
-        print("Gemini raw response:\n", text)  # Debugging
-        current_item = None
-        current_exp = None
-        current_cat = None
-        for line in text.splitlines():
-            if 'item' in line.lower():
-                if current_item:
-                    items.append({'item': current_item, 'expiration': current_exp, 'category': current_cat})
-                current_item = line.split(':', 1)[-1].strip()
-                current_exp = None
-                current_cat = None
-            elif 'expiration' in line.lower():
-                current_exp = line.split(':', 1)[-1].strip()
-            elif 'category' in line.lower():
-                current_cat = line.split(':', 1)[-1].strip()
-        if current_item:
-            items.append({'item': current_item, 'expiration': current_exp, 'category': current_cat})
-
-    # Fallback estimates / defaults
-    for entry in items:
-        if not entry.get('expiration') and entry.get('item'):
-            expiry_info = estimate_expiration(entry['item'])
-            entry['expiration'] = expiry_info
-            print(f"Estimated expiry for {entry['item']}: {expiry_info}")
-        if not entry.get('category'):
-            entry['category'] = "Unknown"
-
-    # Calculate days left and add to DB
+            unlabeled.append(entry)
+    print("Gemini raw response:\n", stream.text)  # Debugging
+
+    # Shelf-life estimates for the rest, looked up all at once
+    for entry, expiry_info in zip(unlabeled, estimate_expirations([entry['item'] for entry in unlabeled])):
+        entry['expiration'] = expiry_info
+        print(f"Estimated expiry for {entry['item']}: {expiry_info}")
+        yield entry
+
+    return len(image_blob['data'])
+
+
+def _fill_from_catalog(entry):
+    """Default the category and, for an unlabeled item, use the catalog's shelf life; False if it still has no expiration."""
+    if not entry.get('category'):
+        entry['category'] = "Unknown"
+    if not entry.get('expiration'):
+        days = catalog_index.lookup(entry['item'])
+        if days is None:
+            return False
+        entry['expiration'] = (datetime.today() + timedelta(days=days)).strftime('%Y-%m-%d')
+        print(f"Catalog default for {entry['item']}: {days} days")
+    return True
+
+
+def save_items(items):
+    """Calculate days left for each analysed item and add it to the DB."""
     for entry in items:
+        if entry.get('cached'):
+            continue  # added when this photo was first scanned
         raw_exp = entry.get('expiration')
         print(f"Raw expiration string for '{entry['item']}': {raw_exp!r}")
         parsed_date = parse_expiration(raw_exp)
@@ -97,66 +194,11 @@ def analyze_image(image_path):
         print(f"Category: {entry['category']}")
         add_food(entry['item'], days_left, entry['category'])
 
-    return items
-
 
 def parse_expiration(expiration_text):
-    """Parse expiration text and return a datetime object."""
-    if not expiration_text:
-        return None
-    
-    today = datetime.today()
-    expiration_text = expiration_text.lower().strip()
-    
-    import re
-    
-    try:
-        # Handle formats like "2025-10-05 (7 days)" - extract the date part
-        if '(' in expiration_text and ')' in expiration_text:
-            # Extract the part before the parentheses
-            date_part = expiration_text.split('(')[0].strip()
-            # Try to parse the date part
-            for date_format in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
-                try:
-                    return datetime.strptime(date_part, date_format)
-                except ValueError:
-                    continue
-        
-        # Try to parse standard date formats
-        for date_format in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']:
-            try:
-                return datetime.strptime(expiration_text, date_format)
-            except ValueError:
-                continue
-        
-        # Parse "X days" format - extract number and add to today
-        if 'day' in expiration_text:
-            numbers = re.findall(r'\d+', expiration_text)
-            if numbers:
-                days = int(numbers[0])
-                return today + timedelta(days=days)
-        
-        # Parse month abbreviations (e.g., "Oct 15", "Dec 2025")
-        month_patterns = {
-            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-            'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-        }
-        
-        for month_name, month_num in month_patterns.items():
-            if month_name in expiration_text:
-                numbers = re.findall(r'\d+', expiration_text)
-                if len(numbers) >= 1:
-                    day = int(numbers[0]) if len(numbers) >= 1 else 1
-                    year = int(numbers[1]) if len(numbers) >= 2 else today.year
-                    try:
-                        return datetime(year, month_num, day)
-                    except ValueError:
-                        pass
-        
-    except (ValueError, TypeError):
-        pass
-    
-    return None
+    """Parse expiration text and return a datetime object (see date_text.parse for the formats)."""
+    parsed = date_text.parse(expiration_text)
+    return parsed["date"] if parsed else None
 
 
 if __name__ == '__main__':
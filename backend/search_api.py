@@ -9,8 +9,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import scanner
+import uploads
 
 app = Flask(__name__)
+app.request_class = uploads.SpooledRequest  # keep photo uploads in memory
 CORS(app)
 
 @app.route("/test", methods=["GET"])
@@ -1,35 +1,112 @@
+import os
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import re
+import shelf_life_store
+
+# Point at a local stand-in (see fake_stilltasty.py) for tests and benchmarks
+STILLTASTY_BASE_URL = os.getenv("EXPIREASE_STILLTASTY_URL", "https://www.stilltasty.com")
+
+# Remote lookups share one keep-alive session, so only the first pays for
+# DNS, TCP and TLS setup, and at most MAX_CONCURRENT_FETCHES run at once
+# process-wide. Connection errors, 429s and 5xx responses are retried
+# FETCH_RETRIES times with exponential backoff (urllib3 backoff_factor FETCH_BACKOFF).
+# Lookups for the same food already in flight share one fetch.
+MAX_CONCURRENT_FETCHES = int(os.getenv("EXPIREASE_SHELF_LIFE_CONCURRENCY", "6"))
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 0.3
+FETCH_TIMEOUT = 10
+
+# Only the nodes we read are parsed: the search-results block of the search
+# page and the answer/summary nodes of the item page. lxml is used when it
+# is installed (EXPIREASE_HTML_PARSER overrides); html.parser otherwise.
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = "lxml"
+except ImportError:
+    DEFAULT_HTML_PARSER = "html.parser"
+HTML_PARSER = os.getenv("EXPIREASE_HTML_PARSER", DEFAULT_HTML_PARSER)
+SEARCH_RESULTS_ONLY = SoupStrainer(class_="search-results")
+ANSWER_ONLY = SoupStrainer(class_=["answer", "summary"])
+
+_session = None
+_session_lock = threading.Lock()
+_fetch_slots = threading.BoundedSemaphore(MAX_CONCURRENT_FETCHES)
+_executor = None
+_inflight = {}  # normalized name -> {"done": Event, "result": (days, info)} of the fetch underway
+_inflight_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=FETCH_RETRIES,
+                backoff_factor=FETCH_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+            )
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_CONCURRENT_FETCHES, max_retries=retry)
+            session = requests.Session()
+            session.headers["User-Agent"] = "Mozilla/5.0"
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _get(url):
+    with _fetch_slots:
+        resp = get_session().get(url, timeout=FETCH_TIMEOUT)
+    resp.raise_for_status()
+    return resp
+
+
+def extract_result_path(html, parser=None):
+    """Path of the first search result on a StillTasty search page, or None."""
+    soup = BeautifulSoup(html, parser or HTML_PARSER, parse_only=SEARCH_RESULTS_ONLY)
+    result_link = soup.select_one(".search-results .media-body a")
+    if not result_link or not result_link.get("href"):
+        return None
+    return result_link.get("href")
+
+def extract_answer(html, parser=None):
+    """Storage answer text on a StillTasty item page (the summary as a fallback), or None."""
+    soup = BeautifulSoup(html, parser or HTML_PARSER, parse_only=ANSWER_ONLY)
+    answer = soup.select_one(".answer")
+    if answer:
+        return answer.get_text(strip=True)
+    summary = soup.select_one(".summary")
+    if summary:
+        return summary.get_text(strip=True)
+    return None
+
+def fetch_from_stilltasty(food_name):
+    """
+    Fetches expiry text for a food item from StillTasty.com.
+    Returns the text, or None if StillTasty has no entry; network errors raise.
+    """
+    search_url = f"{STILLTASTY_BASE_URL}/searchitems/search?search={food_name.replace(' ', '+')}"
+    search_resp = _get(search_url)
+    result_path = extract_result_path(search_resp.text)
+    if not result_path:
+        return None
+    food_resp = _get(STILLTASTY_BASE_URL + result_path)
+    return extract_answer(food_resp.text)
 
 def get_expiry_from_stilltasty(food_name):
     """
     Fetches expiry information for a given food item from StillTasty.com.
     Returns a string with the expiry info, or None if not found.
     """
-    search_url = f"https://www.stilltasty.com/searchitems/search?search={food_name.replace(' ', '+')}"
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
     try:
-        search_resp = requests.get(search_url, headers=headers, timeout=10)
-        search_resp.raise_for_status()
-        soup = BeautifulSoup(search_resp.text, "html.parser")
-        result_link = soup.select_one(".search-results .media-body a")
-        if not result_link or not result_link.get("href"):
-            return None
-        food_url = "https://www.stilltasty.com" + result_link.get("href")
-        food_resp = requests.get(food_url, headers=headers, timeout=10)
-        food_resp.raise_for_status()
-        food_soup = BeautifulSoup(food_resp.text, "html.parser")
-        answer = food_soup.select_one(".answer")
-        if answer:
-            return answer.get_text(strip=True)
-        summary = food_soup.select_one(".summary")
-        if summary:
-            return summary.get_text(strip=True)
-        return None
+        return fetch_from_stilltasty(food_name)
     except Exception as e:
         print(f"Error fetching from StillTasty: {e}")
         return None
@@ -47,17 +124,64 @@ def parse_days_from_text(text):
         return avg_days
     return None
 
+def lookup_shelf_life(item):
+    """
+    Shelf-life answer for an item: the local store first, StillTasty only on
+    a miss or expired entry (the answer, or its absence, is then stored).
+    Returns (days, info); both None when nothing is known.
+    """
+    cached = shelf_life_store.lookup(item)
+    if cached is not None:
+        return cached["days"], cached["info"]
+
+    key = shelf_life_store.normalize_name(item)
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        owner = pending is None
+        if owner:
+            pending = _inflight[key] = {"done": threading.Event(), "result": (None, None)}
+    if not owner:
+        pending["done"].wait()  # someone is fetching this food right now; share their answer
+        return pending["result"]
+
+    try:
+        try:
+            info = fetch_from_stilltasty(item)
+        except Exception as e:
+            print(f"Error fetching from StillTasty: {e}")
+            return None, None  # don't cache an outage as "not found"
+        days = parse_days_from_text(info) if info else None
+        shelf_life_store.store(item, days, info)
+        pending["result"] = (days, info)
+        return days, info
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        pending["done"].set()
+
 def estimate_expiration(item):
     """
-    Estimates the expiration date for any food using StillTasty.
+    Estimates the expiration date for any food using the shelf-life store and StillTasty.
     Returns a date string (YYYY-MM-DD) if possible, otherwise a descriptive string or None.
     """
     today = datetime.today()
-    stilltasty_info = get_expiry_from_stilltasty(item)
+    days, stilltasty_info = lookup_shelf_life(item)
+    if days:
+        return (today + timedelta(days=days)).strftime('%Y-%m-%d')
     if stilltasty_info:
-        days = parse_days_from_text(stilltasty_info)
-        if days:
-            return (today + timedelta(days=days)).strftime('%Y-%m-%d')
         return stilltasty_info  # fallback to text if parsing fails
     # Fallback default if nothing found
-    return (today + timedelta(days=7)).strftime('%Y-%m-%d')
\ No newline at end of file
+    return (today + timedelta(days=7)).strftime('%Y-%m-%d')
+
+def estimate_expirations(items):
+    """
+    estimate_expiration() for a batch of item names, fetching the uncached
+    ones concurrently. Returns the estimates in the same order as `items`.
+    """
+    global _executor
+    if len(items) <= 1:
+        return [estimate_expiration(item) for item in items]
+    with _session_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES, thread_name_prefix="shelf-life")
+    return list(_executor.map(estimate_expiration, items))
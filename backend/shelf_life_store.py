@@ -0,0 +1,139 @@
+import csv
+import os
+import re
+import time
+import database
+
+# Persistent shelf-life store consulted by shelf_life_api.estimate_expiration
+# before it goes to StillTasty.
+#
+# The shelf_life table (food DB) is keyed by a normalized food name and is
+# seeded from food_catalog and food_data.csv, so common foods never need a
+# web request. Remote answers are kept for TTL_SECONDS, and "not found"
+# answers are cached too (for NEGATIVE_TTL_SECONDS) so an unknown item costs
+# one lookup a day rather than one per scan. Seeded rows never expire.
+
+TTL_SECONDS = int(os.getenv("EXPIREASE_SHELF_LIFE_TTL", str(30 * 24 * 60 * 60)))
+NEGATIVE_TTL_SECONDS = int(os.getenv("EXPIREASE_SHELF_LIFE_NEGATIVE_TTL", str(24 * 60 * 60)))
+CSV_FILE = os.path.join(database.BASE_DIR, "food_data.csv")
+
+SEED_SOURCES = ("catalog", "csv")
+
+
+def normalize_name(name):
+    """'  Roma TOMATOES!' -> 'roma tomato': lowercase, punctuation dropped, last word singular."""
+    words = re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).split()
+    if not words:
+        return ""
+    last = words[-1]
+    if len(last) > 4 and last.endswith("ies"):
+        last = last[:-3] + "y"
+    elif len(last) > 4 and last.endswith(("oes", "ches", "shes", "sses", "xes")):
+        last = last[:-2]
+    elif len(last) > 3 and last.endswith("s") and not last.endswith(("ss", "us", "is")):
+        last = last[:-1]
+    words[-1] = last
+    return " ".join(words)
+
+
+def ensure_shelf_life_store(conn):
+    """
+    Create the store and, the first time, seed it from food_catalog and
+    food_data.csv. Later catalog changes arrive through add_catalog_entry()
+    and upsert_catalog_entries(), so startup never rescans a large catalog.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS shelf_life (
+        name_key TEXT PRIMARY KEY,
+        name TEXT,
+        days INTEGER,
+        info TEXT,
+        source TEXT NOT NULL,
+        fetched_at REAL
+    )
+    """)
+    if conn.execute(f"SELECT 1 FROM shelf_life WHERE source IN {SEED_SOURCES} LIMIT 1").fetchone():
+        return
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='food_catalog'").fetchone():
+        return  # food_data not imported yet; this runs again when it is
+    seeds = [
+        (normalize_name(name), name, days, "catalog")
+        for name, days in conn.execute("SELECT name, default_expire_days FROM food_catalog")
+        if days is not None
+    ]
+    if os.path.exists(CSV_FILE):
+        with open(CSV_FILE, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    seeds.append((normalize_name(row["name"]), row["name"].strip(), int(row["default_expire_days"]), "csv"))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    conn.executemany(
+        "INSERT OR IGNORE INTO shelf_life (name_key, name, days, source) VALUES (?, ?, ?, ?)",
+        [seed for seed in seeds if seed[0]]
+    )
+
+
+database.register_schema(ensure_shelf_life_store, on_tables=True)
+
+
+def add_catalog_entry(conn, name, days):
+    """Seed one food_catalog row added at runtime (see food_data.add_to_catalog)."""
+    if normalize_name(name) and days is not None:
+        conn.execute(
+            "INSERT OR IGNORE INTO shelf_life (name_key, name, days, source) VALUES (?, ?, ?, 'catalog')",
+            (normalize_name(name), name, days)
+        )
+
+
+def upsert_catalog_entries(conn, rows):
+    """Catalog (name, days) rows from a bulk import; they replace whatever the store had for those names."""
+    conn.executemany(
+        "INSERT INTO shelf_life (name_key, name, days, info, source, fetched_at) VALUES (?, ?, ?, NULL, 'catalog', NULL) "
+        "ON CONFLICT(name_key) DO UPDATE SET name = excluded.name, days = excluded.days, "
+        "info = NULL, source = 'catalog', fetched_at = NULL",
+        [(key, name, days) for name, days in rows for key in (normalize_name(name),) if key]
+    )
+
+
+def lookup(name):
+    """
+    Stored answer for `name`, or None when there is none or it has expired.
+
+    Returns:
+        dict with `days` (None when only free text is known), `info`,
+        `source` and `found` (False for a cached "not found").
+    """
+    key = normalize_name(name)
+    if not key:
+        return None
+    with database.connection() as conn:
+        row = conn.execute(
+            "SELECT days, info, source, fetched_at FROM shelf_life WHERE name_key = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    days, info, source, fetched_at = row
+    if source not in SEED_SOURCES:
+        ttl = TTL_SECONDS if source != "miss" else NEGATIVE_TTL_SECONDS
+        if fetched_at is None or time.time() - fetched_at > ttl:
+            return None
+    return {"days": days, "info": info, "source": source, "found": source != "miss"}
+
+
+def store(name, days, info, source="stilltasty"):
+    """Remember a remote answer; days and info both None records a "not found"."""
+    key = normalize_name(name)
+    if not key:
+        return
+    if days is None and info is None:
+        source = "miss"
+    with database.connection() as conn:
+        # Never let a remote answer (or a miss) replace a seeded catalog value
+        conn.execute(
+            "INSERT INTO shelf_life (name_key, name, days, info, source, fetched_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name_key) DO UPDATE SET name = excluded.name, days = excluded.days, "
+            "info = excluded.info, source = excluded.source, fetched_at = excluded.fetched_at "
+            f"WHERE shelf_life.source NOT IN {SEED_SOURCES}",
+            (key, name, days, info, source, time.time())
+        )
@@ -0,0 +1,83 @@
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from flask import Request
+
+# Uploaded photos, handed to the scanner without temp-file round trips.
+#
+# scanner.analyze_image takes a photo as a path, bytes/bytearray/memoryview,
+# or a binary stream such as a Werkzeug FileStorage. image_data() turns any
+# of those into what the scan needs: the bytes when the photo is in memory,
+# or a seekable file when it is too big to hold there.
+#
+# SpooledRequest keeps multipart uploads in memory up to SPOOL_MAX_BYTES
+# each (Werkzeug's default writes anything over 500 KB to a temp file) and
+# spills only bigger ones to disk. Nothing is written under a fixed name,
+# so concurrent requests can't overwrite each other's photos.
+
+SPOOL_MAX_BYTES = int(os.getenv("EXPIREASE_UPLOAD_SPOOL_MB", "16")) * 1024 * 1024
+
+
+class SpooledRequest(Request):
+    """Flask request class whose file uploads stay in memory up to SPOOL_MAX_BYTES."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+
+
+def detach(file_storage):
+    """
+    Take the stream out of an uploaded FileStorage so it stays open after
+    the view returns (Flask closes the request's files then, before a
+    streamed response has been sent). The caller closes it.
+    """
+    stream = file_storage.stream
+    file_storage.stream = io.BytesIO()
+    return stream
+
+
+def _in_memory(stream):
+    """The BytesIO holding `stream`'s data when it lives in memory, else None."""
+    if isinstance(stream, io.BytesIO):
+        return stream
+    held = getattr(stream, "_file", None)  # SpooledTemporaryFile that hasn't rolled over
+    return held if isinstance(held, io.BytesIO) else None
+
+
+@contextmanager
+def image_data(source):
+    """
+    The photo in `source` as a bytes-like object, or as a seekable binary
+    file (positioned at 0) when it is bigger than SPOOL_MAX_BYTES and not
+    already in memory. Files opened here are closed on exit.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= SPOOL_MAX_BYTES:
+                yield f.read()
+            else:
+                yield f
+        return
+
+    stream = getattr(source, "stream", source)  # FileStorage wraps the real stream
+    held = _in_memory(stream)
+    if held is not None:
+        # getvalue() rather than getbuffer(): a view would stop Werkzeug
+        # closing the upload while an abandoned (timed out) scan still runs
+        yield held.getvalue()
+        return
+    if stream.seekable():
+        stream.seek(0)
+        yield stream
+        return
+    # A one-way stream (e.g. a raw request body): keep it in memory if it's small enough
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        shutil.copyfileobj(stream, spool)
+        spool.seek(0)
+        held = _in_memory(spool)
+        yield spool if held is None else held.getvalue()
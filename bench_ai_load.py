@@ -0,0 +1,106 @@
+"""
+Benchmark: throughput and tail latency of the AI paths under concurrent
+load, offline: POST /generate-recipe and POST /photo_scanner against
+the Gemini stand-in in fake_gemini.py (over HTTP, like the real API),
+with a configurable model latency distribution and error rate.
+
+Every request has its own cache key (a distinct cuisine, a distinct photo),
+so each one reaches the model. Reports requests/s and p50/p95/p99 per path,
+and which path served the recipes (model_policy.stats()).
+
+    python bench_ai_load.py [--requests 40] [--concurrency 8]
+                            [--latency lognormal:0.5,0.6] [--error-rate 0.02]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import model_client  # noqa: E402
+import model_policy  # noqa: E402
+import recipe_maker  # noqa: E402
+from backend import food_data  # noqa: E402
+from fake_gemini import FakeGemini  # noqa: E402
+
+
+def photo(n):
+    """A small PNG unique to request n, so the scan cache never answers it."""
+    im = Image.new("RGB", (64, 64), (n % 256, (n // 256) % 256, 40))
+    buf = io.BytesIO()
+    im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def recipe_request(n):
+    body = {"recipe_size": "medium", "cuisine_preference": f"Benchmark {n}"}
+    response = server.app.test_client().post("/generate-recipe", json=body)
+    return response.status_code == 200 and response.get_json()["success"]
+
+
+def scan_request(n):
+    response = server.app.test_client().post(
+        "/photo_scanner", data={"image": (io.BytesIO(photo(n)), f"photo-{n}.png")},
+        content_type="multipart/form-data",
+    )
+    return response.status_code == 200
+
+
+def load(request, requests, concurrency):
+    """(latencies, failures, wall seconds) of `requests` calls of request(n), `concurrency` at a time."""
+    def timed(n):
+        start = time.perf_counter()
+        ok = request(n)
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    return sorted(seconds for seconds, _ in results), sum(not ok for _, ok in results), wall
+
+
+def percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="requests per path")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:0.5,0.6", help="model latency, see model_client.latency_sampler")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(20):
+            food_data.add_food(f"Food {i}", 1 + i % 10, "Vegetable")
+
+    with FakeGemini(args.latency, args.error_rate, seed=11) as stub:
+        recipe_maker.model = model_client.HttpModel("recipe", stub.url)
+        server.scanner.model = model_client.HttpModel("scanner", stub.url)
+
+        print(f"{args.requests} requests per path, {args.concurrency} concurrent, "
+              f"model latency {args.latency}, error rate {args.error_rate}")
+        print(f"{'path':<22}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'failed':>8}")
+        for label, request in (("/generate-recipe", recipe_request), ("/photo_scanner", scan_request)):
+            with contextlib.redirect_stdout(io.StringIO()):  # both paths print per request
+                latencies, failures, wall = load(request, args.requests, args.concurrency)
+            print(f"{label:<22}{args.requests / wall:>8.1f}{statistics.median(latencies) * 1000:>10.1f}"
+                  f"{percentile(latencies, 0.95):>10.1f}{percentile(latencies, 0.99):>10.1f}{failures:>8}")
+        print(f"stub: {stub.hits} model calls, {stub.errors} failed, at most {stub.max_in_flight} in flight")
+        print(f"recipes served by: {model_policy.stats()['served']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: inserting N ingredients one at a time vs. in one bulk request.
+
+  per-item   food_data.add_food() per row (one transaction + commit each),
+             and one POST /add_ingredient per row through server.py
+  bulk       bulk_ingredients.apply_bulk() with all rows (one transaction,
+             one commit), and one POST /ingredients/bulk as JSON and NDJSON
+
+Every run starts from an empty food table in a throwaway database, so the
+change-log triggers and search index are paid for identically on both sides.
+
+    python bench_bulk_insert.py [--items 1000] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import database  # noqa: E402
+import bulk_ingredients  # noqa: E402
+from backend import food_data  # noqa: E402
+
+CATEGORIES = ["Fruit", "Vegetable", "Meat", "Dairy", "Grain", "Snack"]
+
+
+def make_items(n):
+    return [
+        {"op": "add", "name": f"Item {i}", "category": CATEGORIES[i % len(CATEGORIES)], "expire_days": 1 + i % 30}
+        for i in range(n)
+    ]
+
+
+def reset():
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food")
+        conn.execute("DELETE FROM inventory_changes")
+
+
+def per_item_function(items):
+    for item in items:
+        food_data.add_food(item["name"], item["expire_days"], item["category"])
+
+
+def per_item_http(client, items):
+    for item in items:
+        client.post("/add_ingredient", json={"name": item["name"], "category": item["category"]})
+
+
+def bulk_function(items):
+    bulk_ingredients.apply_bulk(items)
+
+
+def bulk_http_json(client, items):
+    client.post("/ingredients/bulk", json=items)
+
+
+def bulk_http_ndjson(client, items):
+    body = "\n".join(json.dumps(item) for item in items)
+    client.post("/ingredients/bulk", data=body, content_type="application/x-ndjson")
+
+
+def timed(fn, items, repeat):
+    best = None
+    for _ in range(repeat):
+        reset()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the routes print per request
+            fn(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        with database.connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM food").fetchone()[0]
+        assert count == len(items), f"{fn.__name__} inserted {count} rows, expected {len(items)}"
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    client = server.app.test_client()
+    cases = [
+        ("add_food() per item", per_item_function, None),
+        ("apply_bulk()", bulk_function, "add_food() per item"),
+        ("POST /add_ingredient per item", lambda i: per_item_http(client, i), None),
+        ("POST /ingredients/bulk (JSON)", lambda i: bulk_http_json(client, i), "POST /add_ingredient per item"),
+        ("POST /ingredients/bulk (NDJSON)", lambda i: bulk_http_ndjson(client, i), "POST /add_ingredient per item"),
+    ]
+
+    print(f"{args.items} inserts, best of {args.repeat}")
+    print(f"{'path':<34}{'total ms':>10}{'rows/s':>12}{'speedup':>9}")
+    timings = {}
+    for label, fn, baseline in cases:
+        seconds = timed(fn, items, args.repeat)
+        timings[label] = seconds
+        speedup = f"{timings[baseline] / seconds:.1f}x" if baseline else ""
+        print(f"{label:<34}{seconds * 1000:>10.1f}{args.items / seconds:>12.0f}{speedup:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: expiration-text parsing throughput.
+
+  legacy     scanner.parse_expiration as it was: strptime over a list of
+             formats (catching each ValueError), then a month-name scan
+  date_text  the single precompiled pattern in backend/date_text.py
+
+Both parse the same mixed corpus of model/label phrasings. Also reports
+how many lines each one could turn into a date.
+
+    python bench_date_parse.py [--lines 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import date_text  # noqa: E402
+
+TEMPLATES = [
+    "{iso}", "{iso} (7 days)", "{us}", "{eu}", "Best by {mon} {day}", "{mon} {day}, {year}",
+    "Dec {year}", "{n} days", "Expires in {n} days", "{n}-{m} days", "2 weeks", "tomorrow",
+    "Use within 3-5 days after opening", "No label visible", "about a week",
+]
+
+
+def legacy_parse_expiration(expiration_text):
+    """Copy of scanner.parse_expiration before date_text replaced it."""
+    if not expiration_text:
+        return None
+    today = datetime.today()
+    expiration_text = expiration_text.lower().strip()
+    try:
+        if '(' in expiration_text and ')' in expiration_text:
+            date_part = expiration_text.split('(')[0].strip()
+            for date_format in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
+                try:
+                    return datetime.strptime(date_part, date_format)
+                except ValueError:
+                    continue
+        for date_format in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']:
+            try:
+                return datetime.strptime(expiration_text, date_format)
+            except ValueError:
+                continue
+        if 'day' in expiration_text:
+            numbers = re.findall(r'\d+', expiration_text)
+            if numbers:
+                return today + timedelta(days=int(numbers[0]))
+        month_patterns = {
+            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+            'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+        }
+        for month_name, month_num in month_patterns.items():
+            if month_name in expiration_text:
+                numbers = re.findall(r'\d+', expiration_text)
+                if len(numbers) >= 1:
+                    day = int(numbers[0])
+                    year = int(numbers[1]) if len(numbers) >= 2 else today.year
+                    try:
+                        return datetime(year, month_num, day)
+                    except ValueError:
+                        pass
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        date = datetime(2025, 1, 1) + timedelta(days=rng.randrange(730))
+        lines.append(rng.choice(TEMPLATES).format(
+            iso=date.strftime("%Y-%m-%d"), us=date.strftime("%m/%d/%Y"), eu=date.strftime("%d/%m/%Y"),
+            mon=date.strftime("%b"), day=date.day, year=date.year, n=rng.randint(1, 30), m=rng.randint(31, 40),
+        ))
+    return lines
+
+
+def best_seconds(fn, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = make_corpus(args.lines)
+    parsers = (("legacy", legacy_parse_expiration), ("date_text", date_text.parse))
+    print(f"{'parser':<12}{'lines/s':>12}{'us/line':>10}{'parsed':>9}")
+    baseline = None
+    for name, fn in parsers:
+        seconds = best_seconds(fn, lines, args.repeat)
+        baseline = baseline or seconds
+        parsed = sum(1 for line in lines if fn(line) is not None)
+        print(f"{name:<12}{len(lines) / seconds:>12,.0f}{seconds / len(lines) * 1e6:>10.2f}"
+              f"{parsed / len(lines):>9.0%}   {baseline / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: requests/sec for /all-ingredients and /add_ingredient in server.py,
+with per-request sqlite3.connect() ("before") vs. the pooled WAL connections
+in backend/database.py ("after"), at 1, 8 and 32 concurrent clients.
+
+Runs against throwaway copies of the database, never the checked-in foodapp.db.
+
+    python bench_db_pool.py [--seconds 3] [--rows 300]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import requests
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import database  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+CONCURRENCY = (1, 8, 32)
+
+
+def seed_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            date_added TEXT,
+            expire_days INTEGER,
+            category TEXT
+        )
+    """)
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn.executemany(
+        "INSERT INTO food (name, date_added, expire_days, category) VALUES (?, ?, ?, ?)",
+        [(f"Item {i}", today, i % 30, "Fruit") for i in range(rows)],
+    )
+    conn.commit()
+    conn.close()
+
+
+@contextmanager
+def legacy_connection(path=None):
+    """The old behaviour: open, use, commit and close a fresh connection per call."""
+    conn = sqlite3.connect(path or database.FOOD_DB)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_clients(url, clients, seconds, method):
+    expiration = (datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d")
+    deadline = time.perf_counter() + seconds
+
+    def client(_):
+        session = requests.Session()
+        done = 0
+        while time.perf_counter() < deadline:
+            if method == "GET":
+                resp = session.get(url)
+            else:
+                resp = session.post(url, json={"name": "Bench Apple", "category": "Fruit",
+                                               "expiration_date": expiration})
+            resp.raise_for_status()
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        total = sum(pool.map(client, range(clients)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each measurement")
+    parser.add_argument("--rows", type=int, default=300, help="rows seeded into the food table")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_port}"
+
+    modes = {
+        "before": (os.path.join(BENCH_DIR, "before.db"), legacy_connection),
+        "after": (os.path.join(BENCH_DIR, "after.db"), database.connection),
+    }
+    results = {}
+    real_stdout = sys.stdout
+    for mode, (path, connection) in modes.items():
+        seed_db(path, args.rows)
+        database.FOOD_DB = path
+        database.connection = connection
+        sys.stdout = open(os.devnull, "w")  # the routes print debug lines on every hit
+        try:
+            for endpoint, method in (("/all-ingredients", "GET"), ("/add_ingredient", "POST")):
+                for clients in CONCURRENCY:
+                    results[(endpoint, clients, mode)] = run_clients(base + endpoint, clients, args.seconds, method)
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    httpd.shutdown()
+    print(f"{'endpoint':<18}{'clients':>8}{'before req/s':>14}{'after req/s':>14}{'speedup':>10}")
+    for endpoint in ("/all-ingredients", "/add_ingredient"):
+        for clients in CONCURRENCY:
+            before = results[(endpoint, clients, "before")]
+            after = results[(endpoint, clients, "after")]
+            print(f"{endpoint:<18}{clients:>8}{before:>14.1f}{after:>14.1f}{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
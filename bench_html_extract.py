@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: extracting the search-result link and the storage answer
+from the saved StillTasty pages in fixtures/stilltasty/.
+
+  full      the old approach: a complete BeautifulSoup tree, then select_one
+  strained  shelf_life_api.extract_result_path / extract_answer, which only
+            build the nodes matched by a SoupStrainer
+
+each with html.parser and, when installed, lxml. Reports the best time per
+page and the peak memory allocated while parsing (tracemalloc).
+
+    python bench_html_extract.py [--repeat 50]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import shelf_life_api  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stilltasty")
+
+
+def full_extract(html, parser, is_search):
+    """What get_expiry_from_stilltasty did before: parse everything, read one node."""
+    soup = BeautifulSoup(html, parser)
+    if is_search:
+        link = soup.select_one(".search-results .media-body a")
+        return link.get("href") if link else None
+    node = soup.select_one(".answer") or soup.select_one(".summary")
+    return node.get_text(strip=True) if node else None
+
+
+def strained_extract(html, parser, is_search):
+    if is_search:
+        return shelf_life_api.extract_result_path(html, parser)
+    return shelf_life_api.extract_answer(html, parser)
+
+
+def best_ms(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def peak_kb(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        print("lxml not installed; html.parser only\n")
+
+    pages = sorted(glob.glob(os.path.join(FIXTURES, "*.html")))
+    print(f"{'page':<20}{'KB':>6}  {'mode':<22}{'best ms':>9}{'peak KB':>10}{'speedup':>9}  result")
+    for path in pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.basename(path)
+        is_search = name.startswith("search")
+        baseline = None
+        for html_parser in parsers:
+            for mode, extract in (("full", full_extract), ("strained", strained_extract)):
+                run = lambda: extract(html, html_parser, is_search)  # noqa: E731
+                result = run()
+                ms = best_ms(run, args.repeat)
+                baseline = baseline or ms
+                print(f"{name:<20}{len(html) / 1024:>6.0f}  {mode + ' ' + html_parser:<22}{ms:>9.2f}"
+                      f"{peak_kb(run):>10.0f}{baseline / ms:>8.1f}x  {str(result)[:30]}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: what backend/image_prep.py saves on the photos in pictures/.
+
+For every image, prints the bytes the model would have received before
+(the untouched file, which is what the SDK sends for a PIL image opened from
+disk) and after preprocessing, the sizes, the per-stage timings, and how long
+the same downscale takes without Image.draft() (full decode, then resize).
+
+    python bench_image_prep.py [--max-edge 1536] [--format JPEG|WEBP] [--quality 85] [--repeat 5] [images...]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import image_prep  # noqa: E402
+
+PICTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pictures")
+
+
+def without_draft(path, max_edge):
+    im = Image.open(path)
+    im.load()
+    im.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=None)
+    return im
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--max-edge", type=int, default=image_prep.MAX_EDGE)
+    parser.add_argument("--format", default=image_prep.FORMAT)
+    parser.add_argument("--quality", type=int, default=image_prep.QUALITY)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    paths = args.images or sorted(glob.glob(os.path.join(PICTURES, "*.jpg")))
+
+    print(f"max edge {args.max_edge}, {args.format} q{args.quality}, best of {args.repeat}\n")
+    print(f"{'image':<24}{'size before':>13}{'size after':>12}{'KB before':>11}{'KB after':>10}"
+          f"{'saved':>7}{'prep ms':>9}{'no-draft ms':>13}  stages ms")
+    total_before = total_after = 0
+    for path in paths:
+        prep_ms, (_, report) = best_of(
+            lambda: image_prep.prepare_image(path, args.max_edge, args.format, args.quality), args.repeat)
+        plain_ms, _ = best_of(lambda: without_draft(path, args.max_edge), args.repeat)
+        before, after = report["bytes_before"], report["bytes_after"]
+        total_before += before
+        total_after += after
+        stages = " ".join(f"{k}={v:g}" for k, v in report["timings_ms"].items())
+        print(f"{os.path.basename(path):<24}{'x'.join(map(str, report['size_before'])):>13}"
+              f"{'x'.join(map(str, report['size_after'])):>12}{before / 1024:>11.1f}{after / 1024:>10.1f}"
+              f"{1 - after / before:>7.0%}{prep_ms:>9.1f}{plain_ms:>13.1f}  {stages}")
+    if total_before:
+        print(f"\n{'total':<24}{'':>25}{total_before / 1024:>11.1f}{total_after / 1024:>10.1f}"
+              f"{1 - total_after / total_before:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
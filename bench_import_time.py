@@ -0,0 +1,80 @@
+"""
+Benchmark: cold-start cost of importing server.py (what every worker spawn
+and every test run pays before serving anything).
+
+Each run imports the module in a fresh interpreter with `python -X importtime`
+against throwaway databases, and reports the wall time of the import, the
+import time Python measured per top-level package (self time, summed over
+its submodules), slowest first.
+--root points at another checkout (e.g. a `git worktree` of an older commit)
+to compare before and after.
+
+    python bench_import_time.py [--module server] [--repeat 5] [--top 10] [--root PATH]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Wall time of the import itself, without interpreter startup
+PROBE = (
+    "import sys, time; sys.path.insert(0, 'backend'); start = time.perf_counter(); "
+    "import {module}; print('WALL', time.perf_counter() - start, file=sys.stderr)"
+)
+
+
+def run_once(root, module):
+    with tempfile.TemporaryDirectory(prefix="expirease-import-") as tmp:
+        env = dict(os.environ,
+                   EXPIREASE_FOOD_DB=os.path.join(tmp, "foodapp.db"),
+                   EXPIREASE_USER_DB=os.path.join(tmp, "users.db"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+            cwd=root, env=env, capture_output=True, text=True,
+        )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed in {root}:\n{result.stderr[-2000:]}")
+    wall = None
+    packages = {}  # top-level package -> self microseconds
+    for line in result.stderr.splitlines():
+        if line.startswith("WALL "):
+            wall = float(line.split()[1])
+        elif line.startswith("import time:") and "|" in line:
+            own, _, name = line[len("import time:"):].split("|")
+            if own.strip().isdigit():
+                package = name.strip().split(".")[0]
+                packages[package] = packages.get(package, 0) + int(own)
+    return wall, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--root", default=ROOT, help="checkout to measure (default: this one)")
+    args = parser.parse_args()
+
+    walls = []
+    totals = {}
+    for _ in range(args.repeat):
+        wall, packages = run_once(os.path.abspath(args.root), args.module)
+        walls.append(wall)
+        for package, micros in packages.items():
+            totals.setdefault(package, []).append(micros)
+
+    print(f"import {args.module} ({args.root}), {args.repeat} cold starts")
+    print(f"  wall: median {statistics.median(walls) * 1000:.0f} ms, "
+          f"min {min(walls) * 1000:.0f} ms, max {max(walls) * 1000:.0f} ms")
+    print("  slowest packages (median self ms):")
+    medians = sorted(((statistics.median(v) / 1000, k) for k, v in totals.items()), reverse=True)
+    for ms, package in medians[:args.top]:
+        print(f"    {ms:8.1f}  {package}")
+
+
+if __name__ == "__main__":
+    main()
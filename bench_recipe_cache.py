@@ -0,0 +1,91 @@
+"""
+Benchmark: POST /generate-recipe latency with and without the recipe cache
+(backend/recipe_cache.py), against a stub model that answers after
+--latency seconds (a stand-in for the Gemini round trip).
+
+  uncached   the cache is cleared before every request, so each one pays
+             for a model call, as every request did before the cache
+  repeat     the same inventory and options again: served from SQLite
+  variety    variety=3: three model calls fill the pool, then it rotates
+
+    python bench_recipe_cache.py [--requests 20] [--latency 1.0] [--foods 40]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+from backend import food_data  # noqa: E402
+
+
+class SlowModel:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        text = f"**Benchmark Recipe {self.calls}**\n" + "Chop, stir and simmer. " * 40
+        candidate = SimpleNamespace(finish_reason=1, content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+        return SimpleNamespace(candidates=[candidate])
+
+
+def run(client, requests, body, clear_each):
+    latencies = []
+    for _ in range(requests):
+        if clear_each:
+            recipe_cache.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the recipe path prints per request
+            response = client.post("/generate-recipe", json=body)
+        latencies.append(time.perf_counter() - start)
+        assert response.get_json()["success"], response.get_json()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per stub model call")
+    parser.add_argument("--foods", type=int, default=40, help="items in the inventory")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.foods):
+            food_data.add_food(f"Food {i}", 1 + i % 10, "Vegetable")
+    model = SlowModel(args.latency)
+    recipe_maker.model = model
+    client = server.app.test_client()
+    body = {"recipe_size": "medium", "dietary_restrictions": "vegetarian", "cuisine_preference": "Italian"}
+
+    cases = [
+        ("uncached", body, True),
+        ("repeat", body, False),
+        ("variety=3", dict(body, variety=3, cuisine_preference="Thai"), False),
+    ]
+    print(f"{args.requests} requests each, stub model latency {args.latency * 1000:.0f} ms")
+    print(f"{'case':<12}{'p50 ms':>10}{'p95 ms':>10}{'model calls':>13}")
+    for label, request_body, clear_each in cases:
+        calls_before = model.calls
+        latencies = sorted(run(client, args.requests, request_body, clear_each))
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label:<12}{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+              f"{model.calls - calls_before:>13}")
+    print(recipe_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
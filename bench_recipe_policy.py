@@ -0,0 +1,112 @@
+"""
+Benchmark: POST /generate-recipe latency when the model degrades, with the
+model call policy (backend/model_policy.py) off and on, against a stub model
+(a stand-in for Gemini; --hang plays the part of the 20 s model timeout).
+
+  healthy   every call answers in ~--latency seconds
+  slow      --slow-share of calls hang for --hang seconds, then answer
+  failing   every call hangs for --hang seconds, then errors
+
+  policy off   no deadline short of the hang, no breaker, no hedging (as before)
+  policy on    --deadline, breaker after 5 failures, hedging past the p95
+
+The recipe cache is cleared before every request so each one asks the model.
+
+    python bench_recipe_policy.py [--requests 30] [--latency 0.2] [--hang 2.0] [--deadline 1.0]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import model_policy  # noqa: E402
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+from backend import food_data  # noqa: E402
+
+
+class DegradedModel:
+    def __init__(self, latency, hang, slow_share, fail):
+        self.latency = latency
+        self.hang = hang
+        self.slow_share = slow_share
+        self.fail = fail
+        self.random = random.Random(7)
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        timeout = (request_options or {}).get("timeout", self.hang)
+        if self.fail or self.random.random() < self.slow_share:
+            time.sleep(min(self.hang, timeout))
+            if self.fail or timeout < self.hang:
+                raise TimeoutError("model timed out")
+        else:
+            time.sleep(self.latency * self.random.uniform(0.8, 1.2))
+        text = "**Benchmark Recipe**\n" + "Chop, stir and simmer. " * 40
+        candidate = SimpleNamespace(finish_reason=1, content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+        return SimpleNamespace(candidates=[candidate])
+
+
+def configure(policy_on, args):
+    model_policy.reset()
+    model_policy.DEADLINE_SECONDS = args.deadline if policy_on else args.hang + 1
+    model_policy.BREAKER_FAILURES = 5 if policy_on else 10 ** 9
+    model_policy.BREAKER_COOLDOWN = 30
+    model_policy.HEDGE = policy_on
+    if policy_on:  # enough healthy history for the p95 the hedges are timed from
+        for _ in range(model_policy.HEDGE_MIN_SAMPLES):
+            model_policy.call(lambda timeout: time.sleep(args.latency) or "warm-up")
+
+
+def run(client, requests):
+    latencies = []
+    for _ in range(requests):
+        recipe_cache.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the recipe path prints per request
+            response = client.post("/generate-recipe", json={"recipe_size": "medium"})
+        latencies.append(time.perf_counter() - start)
+        assert response.get_json()["success"], response.get_json()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds of a healthy model call")
+    parser.add_argument("--hang", type=float, default=2.0, help="seconds a degraded call hangs")
+    parser.add_argument("--slow-share", type=float, default=0.2, help="share of calls that hang in the slow case")
+    parser.add_argument("--deadline", type=float, default=1.0, help="per-request model budget with the policy on")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(20):
+            food_data.add_food(f"Food {i}", 1 + i % 10, "Vegetable")
+    client = server.app.test_client()
+
+    print(f"{args.requests} requests each, healthy {args.latency * 1000:.0f} ms, hang {args.hang * 1000:.0f} ms")
+    print(f"{'case':<10}{'policy':<8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}   served")
+    for label, slow_share, fail in (("healthy", 0.0, False), ("slow", args.slow_share, False), ("failing", 0.0, True)):
+        for policy_on in (False, True):
+            recipe_maker.model = DegradedModel(args.latency, args.hang, slow_share, fail)
+            with contextlib.redirect_stdout(io.StringIO()):
+                configure(policy_on, args)
+            before = model_policy.stats()["served"]
+            latencies = run(client, args.requests)
+            served = {path: n - before[path] for path, n in model_policy.stats()["served"].items() if n - before[path]}
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{label:<10}{'on' if policy_on else 'off':<8}{statistics.median(latencies) * 1000:>10.1f}"
+                  f"{p99 * 1000:>10.1f}{latencies[-1] * 1000:>10.1f}   {served}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: time to first byte of a recipe, POST /generate-recipe (the whole
+recipe in one JSON response) against POST /generate-recipe/stream (NDJSON
+events as the model writes), with a stub streaming model that sends
+--chunks pieces over --latency seconds (a stand-in for Gemini). The recipe
+cache is cleared before every request so each one pays for the model.
+
+    first byte    the response has started (the stream's `start` event)
+    first text    the first piece of the recipe is on screen
+    complete      the whole recipe has arrived
+
+    python bench_recipe_stream.py [--requests 10] [--latency 4.0] [--chunks 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+
+import server  # noqa: E402  (must come after the env vars above)
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+from backend import food_data  # noqa: E402
+
+
+class StreamingModel:
+    def __init__(self, latency, chunks):
+        self.latency = latency
+        self.chunks = chunks
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        pieces = self._pieces()
+        if stream:
+            return pieces
+        parts = [SimpleNamespace(text=c.candidates[0].content.parts[0].text) for c in pieces]
+        return SimpleNamespace(candidates=[SimpleNamespace(finish_reason=1, content=SimpleNamespace(parts=parts))])
+
+    def _pieces(self):
+        for n in range(self.chunks):
+            time.sleep(self.latency / self.chunks)
+            text = "**Benchmark Recipe**\n" if n == 0 else "Chop, stir and simmer. " * 2
+            candidate = SimpleNamespace(finish_reason=1 if n == self.chunks - 1 else 0,
+                                        content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+            yield SimpleNamespace(candidates=[candidate])
+
+
+def timings(client, path):
+    """(first byte, first text, complete) seconds of one request."""
+    recipe_cache.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the recipe path prints per request
+        response = client.post(path, json={"recipe_size": "medium"}, buffered=False)
+        first_byte = first_text = None
+        for piece in response.response:
+            now = time.perf_counter() - start
+            first_byte = first_byte if first_byte is not None else now
+            if first_text is None and (b'"chunk"' in piece or b'"recipe"' in piece):
+                first_text = now
+        response.close()
+    return first_byte, first_text, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=4.0, help="seconds for the stub model's whole recipe")
+    parser.add_argument("--chunks", type=int, default=20, help="pieces the stub model streams the recipe in")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(20):
+            food_data.add_food(f"Food {i}", 1 + i % 10, "Vegetable")
+    recipe_maker.model = StreamingModel(args.latency, args.chunks)
+    client = server.app.test_client()
+
+    print(f"{args.requests} requests each, stub model {args.latency * 1000:.0f} ms in {args.chunks} chunks")
+    print(f"{'endpoint':<40}{'first byte':>12}{'first text':>12}{'complete':>12}   (p50 ms)")
+    for path in ("/generate-recipe", "/generate-recipe/stream?format=ndjson"):
+        runs = [timings(client, path) for _ in range(args.requests)]
+        medians = [statistics.median(run[i] for run in runs) * 1000 for i in range(3)]
+        print(f"{path:<40}" + "".join(f"{ms:>12.1f}" for ms in medians))
+
+
+if __name__ == "__main__":
+    main()
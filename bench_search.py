@@ -0,0 +1,111 @@
+"""
+Benchmark: /search lookups over a synthetic inventory of up to 100k rows.
+
+Compares the old approach (load every row via get_user_foods, linear
+`query in name` scan) with backend/ingredient_search.py (trigram FTS5 index,
+NOCASE prefix index, fuzzy re-ranking) at several inventory sizes, to show
+that indexed lookups stay roughly flat as the inventory grows.
+
+    python bench_search.py [--sizes 1000 10000 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import ingredient_search  # noqa: E402
+import migrate_expires_on  # noqa: E402
+
+WORDS = ["apple", "banana", "cherry", "grape", "lemon", "mango", "melon", "peach", "pear", "plum",
+         "carrot", "celery", "garlic", "onion", "pepper", "potato", "spinach", "tomato", "yogurt",
+         "cheddar", "chicken", "salmon", "tofu", "bread", "rice", "pasta", "oat", "milk", "butter"]
+STYLES = ["Organic", "Fresh", "Frozen", "Sliced", "Smoked", "Roasted", "Greek", "Wild", "Baby", "Red"]
+CATEGORIES = ["Fruit", "Vegetable", "Meat", "Seafood", "Dairy", "Grain", "Snack"]
+
+QUERIES = {
+    "prefix (2 chars)": "ch",
+    "prefix (1 char)": "f",
+    "substring": "smoked salm",
+    "exact word": "spinach",
+    "typo": "bananna",
+    "no match": "xylophone",
+}
+
+
+def build_db(path, rows):
+    rng = random.Random(rows)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE food (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            date_added TEXT,
+            expire_days INTEGER,
+            category TEXT,
+            expires_on TEXT
+        )
+    """)
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn.executemany(
+        "INSERT INTO food (name, date_added, expire_days, category) VALUES (?, ?, ?, ?)",
+        [(f"{rng.choice(STYLES)} {rng.choice(WORDS)} {rng.choice(WORDS)} #{i}", today,
+          rng.randint(1, 60), rng.choice(CATEGORIES)) for i in range(rows)],
+    )
+    migrate_expires_on.migrate(conn)
+    start = time.perf_counter()
+    ingredient_search.ensure_search_index(conn)
+    conn.commit()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def linear_search(query):
+    """The previous /search implementation: load everything, first substring hit."""
+    with database.connection() as conn:
+        rows = conn.execute("SELECT name, date_added, expire_days, category FROM food").fetchall()
+    for row in rows:
+        datetime.strptime(row[1], "%Y-%m-%d")  # get_user_foods parsed every row
+        if query.lower() in row[0].lower():
+            return row
+    return None
+
+
+def timed(fn, repeat):
+    fn()  # warm the page cache and statement cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'query':<18}{'linear ms':>11}{'indexed ms':>12}{'hits':>6}")
+    for rows in args.sizes:
+        path = os.path.join(BENCH_DIR, f"search_{rows}.db")
+        build_seconds = build_db(path, rows)
+        database.FOOD_DB = path
+        for label, query in QUERIES.items():
+            linear_ms = timed(lambda: linear_search(query), max(1, args.repeat // 4))
+            indexed_ms = timed(lambda: ingredient_search.search(query, limit=10), args.repeat)
+            hits = len(ingredient_search.search(query, limit=10))
+            print(f"{rows:>8}  {label:<18}{linear_ms:>11.2f}{indexed_ms:>12.2f}{hits:>6}")
+        print(f"{rows:>8}  (index build {build_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
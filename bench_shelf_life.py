@@ -0,0 +1,92 @@
+"""
+Benchmark: per-item estimate_expiration() latency with a cold vs. warm
+shelf-life store, against the local StillTasty stand-in with a simulated
+network round trip.
+
+  cold    store holds only the food_catalog/food_data.csv seeds; items not
+          seeded cost a search + item page fetch (misses are cached too)
+  warm    the same items again, answered from the shelf_life table
+  seeded  items from food_data.csv, which never go to the network
+  batch   cold again, but through estimate_expirations() (concurrent
+          fetches over the keep-alive session); per-item = total / items
+
+    python bench_shelf_life.py [--latency-ms 80] [--items 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="expirease-bench-")
+os.environ["EXPIREASE_FOOD_DB"] = os.path.join(BENCH_DIR, "foodapp.db")
+os.environ["EXPIREASE_USER_DB"] = os.path.join(BENCH_DIR, "users.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import food_data  # noqa: E402,F401  (creates food_catalog, which seeds the shelf_life table)
+import shelf_life_api  # noqa: E402
+from fake_stilltasty import FakeStillTasty  # noqa: E402
+
+SEEDED = ["tomato", "potatoes", "juice", "dragonfruit", "Tomatoes"]
+
+
+def remote_items(n):
+    """n item names the seeds don't cover: half known to the site, half unknown."""
+    foods = {f"artisan item {i}": f"Keeps {3 + i % 5}-{6 + i % 5} days refrigerated" for i in range(n // 2)}
+    unknown = [f"unlisted item {i}" for i in range(n - len(foods))]
+    return foods, list(foods) + unknown
+
+
+def run(items):
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        shelf_life_api.estimate_expiration(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def clear_remote_answers():
+    with database.connection() as conn:
+        conn.execute("DELETE FROM shelf_life WHERE source NOT IN ('catalog', 'csv')")
+
+
+def run_batch(items):
+    start = time.perf_counter()
+    shelf_life_api.estimate_expirations(items)
+    return [(time.perf_counter() - start) * 1000 / len(items)] * len(items)
+
+
+def report(label, timings, site, hits_before):
+    print(f"{label:<8}{len(timings):>6}{statistics.mean(timings):>11.2f}{statistics.median(timings):>11.2f}"
+          f"{max(timings):>10.2f}{sum(timings):>11.1f}{site.hits - hits_before:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+
+    foods, items = remote_items(args.items)
+    with FakeStillTasty(foods, latency=args.latency_ms / 1000) as site:
+        shelf_life_api.STILLTASTY_BASE_URL = site.url
+        clear_remote_answers()
+
+        print(f"simulated round trip {args.latency_ms:g} ms\n")
+        print(f"{'cache':<8}{'items':>6}{'mean ms':>11}{'median ms':>11}{'max ms':>10}{'total ms':>11}{'requests':>10}")
+        hits = site.hits
+        report("cold", run(items), site, hits)
+        hits = site.hits
+        report("warm", run(items), site, hits)
+        hits = site.hits
+        report("seeded", run(SEEDED), site, hits)
+        clear_remote_answers()
+        hits = site.hits
+        report("batch", run_batch(items), site, hits)
+
+
+if __name__ == "__main__":
+    main()
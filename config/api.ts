@@ -27,11 +27,13 @@ export const API_BASE_URL = getBaseUrl();
 export const API_ENDPOINTS = {
   EXPIRING_INGREDIENTS: `${API_BASE_URL}/expiring-ingredients`,
   GENERATE_RECIPE: `${API_BASE_URL}/generate-recipe`,
+  GENERATE_RECIPE_STREAM: `${API_BASE_URL}/generate-recipe/stream?format=ndjson`,
   ALL_INGREDIENTS: `${API_BASE_URL}/all-ingredients`,
   SEARCH: `${API_BASE_URL}/search`,
   ADD_INGREDIENT: `${API_BASE_URL}/add_ingredient`,
   DELETE_INGREDIENT: `${API_BASE_URL}/delete-ingredient`,
   PHOTO_SCANNER: `${API_BASE_URL}/photo_scanner`,
+  PHOTO_SCANNER_STREAM: `${API_BASE_URL}/photo_scanner/stream?format=ndjson`,
 } as const;
 
 // Utility function for making API calls with error handling
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Point every module at throwaway databases so running the test suite never
+# touches (or switches the journal mode of) the checked-in foodapp.db/users.db.
+_test_db_dir = tempfile.mkdtemp(prefix="expirease-tests-")
+os.environ.setdefault("EXPIREASE_FOOD_DB", os.path.join(_test_db_dir, "foodapp.db"))
+os.environ.setdefault("EXPIREASE_USER_DB", os.path.join(_test_db_dir, "users.db"))
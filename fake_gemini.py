@@ -0,0 +1,182 @@
+"""
+Local stand-in for the Gemini API, for load tests and benchmarks of the AI
+paths (/photo_scanner, /generate-recipe) without the live model. Speaks
+enough of the REST API for model_client.HttpModel:
+
+    POST /v1beta/models/<model>:generateContent            one JSON response
+    POST /v1beta/models/<model>:streamGenerateContent?alt=sse   SSE chunks
+
+    with FakeGemini(latency="lognormal:0.8,0.5", error_rate=0.02) as stub:
+        model_client.STUB_URL = stub.url   # or EXPIREASE_MODEL_STUB_URL
+        ...
+        stub.hits  # requests served so far
+
+Answers come from a model_client.FakeModel per model name ("scanner" and
+"recipe" have canned answers), with its latency distribution and error and
+blocked rates; a simulated error is an HTTP 503. Run it on its own for a
+server started with EXPIREASE_MODEL_CLIENT=stub:
+
+    python fake_gemini.py [--port 8765] [--latency lognormal:0.8,0.5] [--error-rate 0.02]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import model_client  # noqa: E402
+
+REASON_NAMES = {value: name for name, value in model_client.FINISH_REASONS.items()}
+
+
+def candidate_json(chunk):
+    candidate = chunk.candidates[0]
+    return {"candidates": [{
+        "content": {"role": "model", "parts": [{"text": chunk.text}] if chunk.text else []},
+        "finishReason": REASON_NAMES.get(candidate.finish_reason, "FINISH_REASON_UNSPECIFIED"),
+    }]}
+
+
+class FakeGemini:
+    def __init__(self, latency="0", error_rate=0.0, blocked_rate=0.0, responses=None, chunks=8, seed=None, port=0):
+        self.settings = dict(latency=latency, error_rate=error_rate, blocked_rate=blocked_rate,
+                             chunks=chunks, seed=seed)
+        self.responses = responses or {}  # model name -> list of answers, over the canned ones
+        self.port = port
+        self.models = {}
+        self.hits = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def model(self, name):
+        with self._lock:
+            if name not in self.models:
+                self.models[name] = model_client.FakeModel(name, self.responses.get(name), **self.settings)
+            return self.models[name]
+
+    def _parse(self, path):
+        """(model name, method, streamed) of a request path, or None."""
+        route, _, query = path.partition("?")
+        prefix = "/v1beta/models/"
+        if not route.startswith(prefix) or ":" not in route:
+            return None
+        name, method = route[len(prefix):].split(":", 1)
+        if method not in ("generateContent", "streamGenerateContent"):
+            return None
+        return name, method, method == "streamGenerateContent"
+
+    def _enter(self):
+        with self._lock:
+            self.hits += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self, failed):
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                route = stub._parse(self.path)
+                if route is None:
+                    self._send(404, {"error": {"code": 404, "message": "Not found"}})
+                    return
+                name, _, streamed = route
+                contents = json.loads(body or b"{}").get("contents", [])
+                stub._enter()
+                failed = True
+                try:
+                    result = stub.model(name).generate_content(contents, stream=streamed)
+                    if not streamed:
+                        self._send(200, candidate_json(result))
+                        failed = False
+                        return
+                    self._stream(result)
+                    failed = False
+                except model_client.ModelError as e:
+                    self._send(503, {"error": {"code": 503, "message": str(e), "status": "UNAVAILABLE"}})
+                finally:
+                    stub._leave(failed)
+
+            def _stream(self, chunks):
+                # The first chunk may fail (a simulated error): send the headers only once it hasn't
+                first = next(chunks)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in _chain(first, chunks):
+                    data = f"data: {json.dumps(candidate_json(chunk))}\r\n\r\n".encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0", help="latency distribution, see model_client.latency_sampler")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--blocked-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    with FakeGemini(args.latency, args.error_rate, args.blocked_rate, port=args.port) as stub:
+        print(f"Fake Gemini on {stub.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
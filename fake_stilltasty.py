@@ -0,0 +1,150 @@
+"""
+Local stand-in for StillTasty.com, for tests and benchmarks that must not
+touch the real site. Serves the two pages shelf_life_api reads:
+
+    /searchitems/search?search=<name>   search results (.search-results .media-body a)
+    /fooditems/<slug>                   item page (.answer)
+
+    with FakeStillTasty({"sourdough bread": "5-7 days"}, latency=0.05) as site:
+        shelf_life_api.STILLTASTY_BASE_URL = site.url
+        ...
+        site.hits  # requests served so far
+
+fail_first=N answers the first N requests with 503s, for retry tests.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+DEFAULT_FOODS = {
+    "sourdough bread": "Sourdough bread lasts 5-7 days at room temperature",
+    "kimchi": "Kimchi keeps 90-180 days in the refrigerator once opened",
+    "hummus": "Hummus lasts 4-6 days in the refrigerator after opening",
+    "tempeh": "Tempeh lasts 3-5 days in the refrigerator after opening",
+    "ricotta cheese": "Ricotta cheese lasts 5-7 days after opening",
+    "fresh basil": "Fresh basil lasts 7-10 days in the refrigerator",
+    "smoked salmon": "Smoked salmon lasts 14 days unopened in the refrigerator",
+    "mystery sauce": "Keep refrigerated and use within a reasonable time",  # no number of days
+}
+
+NAV = "".join(f'<li class="nav-item"><a href="/category/{i}">Category {i}</a></li>' for i in range(40))
+FOOTER = "".join(f"<p class=\"footer-note\">Storage tip {i}: keep food cold and covered.</p>" for i in range(30))
+
+
+def page(body):
+    return (
+        "<!DOCTYPE html><html><head><title>StillTasty</title>"
+        '<meta charset="utf-8"><link rel="stylesheet" href="/static/site.css"></head><body>'
+        f'<header><ul class="nav">{NAV}</ul></header><main>{body}</main><footer>{FOOTER}</footer>'
+        "</body></html>"
+    )
+
+
+def search_page(slug, title):
+    if slug is None:
+        return page('<div class="search-results"><p>No results found.</p></div>')
+    return page(
+        '<div class="search-results"><div class="media">'
+        f'<div class="media-body"><a href="/fooditems/{slug}">{title}</a><p>Storage times</p></div>'
+        "</div></div>"
+    )
+
+
+def item_page(title, answer):
+    return page(
+        f'<h1>{title}</h1><div class="food-storage-left"><div class="food-inside">'
+        f'<span class="answer">{answer}</span></div></div>'
+    )
+
+
+class FakeStillTasty:
+    def __init__(self, foods=None, latency=0.0, fail_first=0):
+        self.foods = dict(DEFAULT_FOODS if foods is None else foods)
+        self.latency = latency
+        self.fail_first = fail_first  # answer the first N requests with HTTP 503
+        self.hits = 0
+        self.paths = []
+        self.connections = set()  # client (host, port) pairs; fewer than hits means keep-alive
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, path, client):
+        """(status, html) for one request path."""
+        with self._lock:
+            self.hits += 1
+            self.paths.append(path)
+            self.connections.add(client)
+            if self.hits <= self.fail_first:
+                return 503, "busy"
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return self._page_for(path)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _page_for(self, path):
+        url = urlparse(path)
+        if url.path == "/searchitems/search":
+            query = parse_qs(url.query).get("search", [""])[0].replace("+", " ").strip().lower()
+            return 200, search_page(quote(query) if query in self.foods else None, query.title())
+        if url.path.startswith("/fooditems/"):
+            name = unquote(url.path[len("/fooditems/"):])
+            if name in self.foods:
+                return 200, item_page(name.title(), self.foods[name])
+        return 404, page("<p>Not found</p>")
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+            wbufsize = 64 * 1024  # send headers and body in one write (no delayed-ACK stalls)
+
+            def do_GET(self):
+                status, html = site._respond(self.path, self.client_address)
+                body = html.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with FakeStillTasty() as site:
+        print(f"Fake StillTasty on {site.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -1,22 +1,60 @@
 import os
-import sqlite3
-from dotenv import load_dotenv
-import google.generativeai as genai
+import sys
+import threading
+import time
 from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(BASE_DIR, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
 
-# Load environment variables from .env file
-load_dotenv()
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+import database
+import expiry_cache
+import inventory_sync
+import model_client
+import model_policy
+import recipe_cache
+import scan_response
 
-# Initialize AI model if API key is available
+DB_NAME = database.FOOD_DB
+
+# The recipe model is created by get_model() on the first AI recipe, not at
+# import (google.generativeai is slow to import). Tests may assign `model`.
 model = None
-if GEMINI_API_KEY and GEMINI_API_KEY != 'your_gemini_api_key_here':
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The recipe model client, or None if there is no usable API key; created once, on first use."""
+    global model, _model_loaded
+    if model is None and not _model_loaded:
+        with _model_lock:
+            if model is None and not _model_loaded:
+                model = _load_model()
+                _model_loaded = True
+    return model
+
+
+def _load_model():
+    # The real model unless EXPIREASE_MODEL_CLIENT picks a fake, stub or replay (see backend/model_client.py)
+    return model_client.load("recipe", _load_gemini)
+
+def _load_gemini():
+    # Load environment variables from .env file
+    load_dotenv()
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key or api_key == 'your_gemini_api_key_here':
+        return None
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
+        import google.generativeai as genai
         from google.generativeai.types import HarmCategory, HarmBlockThreshold
-        
+        genai.configure(api_key=api_key)
+
         # Try gemini-1.5-pro for better recipe generation (different model than scanner)
-        model = genai.GenerativeModel(
+        recipe_model = genai.GenerativeModel(
             'gemini-1.5-pro',  # Pro model may have different safety filters
             generation_config={
                 'temperature': 1.2,      # High creativity for unique recipes
@@ -32,17 +70,12 @@ if GEMINI_API_KEY and GEMINI_API_KEY != 'your_gemini_api_key_here':
             }
         )
         print("Recipe AI model initialized successfully")
+        return recipe_model
     except Exception as e:
         print(f"Warning: Could not initialize Gemini API: {e}")
-        model = None
-
-BASE_DIR = os.path.dirname(__file__)
-DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
-
-def get_connection():
-    return sqlite3.connect(DB_NAME)
+        return None
 
-def get_user_foods(user_id=None, include_expiring_soon=True, days_threshold=3):
+def get_user_foods(user_id=None, include_expiring_soon=True, days_threshold=3, max_days_left=None):
     """
     Get food items from the database for recipe generation.
     
@@ -50,86 +83,54 @@ def get_user_foods(user_id=None, include_expiring_soon=True, days_threshold=3):
         user_id: If provided, gets user-specific foods. If None, gets general food inventory.
         include_expiring_soon: If True, prioritizes foods that are expiring soon
         days_threshold: Foods expiring within this many days are considered "expiring soon"
+        max_days_left: If provided, only returns foods with at most this many days left
     
     Returns:
         List of tuples: (food_name, days_until_expiry, category/nutrition_info)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    today = datetime.now()
-    
-    foods = []
+    # Served from the day's expiry cache; writers invalidate it, midnight rolls it over
+    foods = expiry_cache.get_or_load(
+        inventory_sync.inventory_name(user_id),
+        (include_expiring_soon, max_days_left),
+        lambda: _load_user_foods(user_id, include_expiring_soon, max_days_left),
+    )
+    return list(foods)
+
+def _load_user_foods(user_id, include_expiring_soon, max_days_left):
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
     
+    # days_left is (expires_on - now).days, so a food is still good while
+    # expires_on > today. Filtering and sorting both run on the expires_on index.
+    days_left_sql = "CAST(julianday(expires_on) - julianday(?) AS INTEGER) - 1"
     if user_id:
         # Get user-specific foods
-        cursor.execute(
-            "SELECT food_name, date_added, expire_days, nutrition FROM user_food WHERE user_id=?",
-            (user_id,)
-        )
+        query = (f"SELECT food_name, {days_left_sql}, COALESCE(nutrition, '') FROM user_food "
+                 "WHERE user_id = ? AND expires_on > ?")
+        params = [today, user_id, today]
     else:
         # Get general food inventory
-        cursor.execute("SELECT name, date_added, expire_days, category FROM food")
-    
-    rows = cursor.fetchall()
+        query = f"SELECT name, {days_left_sql}, COALESCE(category, '') FROM food WHERE expires_on > ?"
+        params = [today, today]
     
-    for row in rows:
-        name = row[0]
-        date_added = row[1]
-        expire_days = row[2]
-        extra_info = row[3] or ""
-        
-        try:
-            date_added_dt = datetime.strptime(date_added, "%Y-%m-%d")
-            expire_date = date_added_dt + timedelta(days=expire_days)
-            days_left = (expire_date - today).days
-            
-            # Only include foods that haven't expired
-            if days_left >= 0:
-                foods.append((name, days_left, extra_info))
-        except (ValueError, TypeError):
-            # Skip invalid dates
-            continue
-    
-    conn.close()
+    if max_days_left is not None:
+        query += " AND expires_on <= ?"
+        params.append((now + timedelta(days=max_days_left + 1)).strftime("%Y-%m-%d"))
     
     # Sort by expiration date if prioritizing expiring foods
-    if include_expiring_soon:
-        foods.sort(key=lambda x: x[1])  # Sort by days_left (ascending)
+    query += " ORDER BY expires_on, rowid" if include_expiring_soon else " ORDER BY rowid"
     
-    return foods
+    with database.connection() as conn:
+        return conn.execute(query, params).fetchall()
 
 def get_expiring_foods(user_id=None, days_threshold=3):
     """Get foods that are expiring within the specified threshold."""
-    all_foods = get_user_foods(user_id, include_expiring_soon=True)
-    return [food for food in all_foods if food[1] <= days_threshold]
+    return get_user_foods(user_id, include_expiring_soon=True, max_days_left=days_threshold)
 
-def make_recipe(food_items, recipe_size="medium", dietary_restrictions="", cuisine_preference=""):
-    """
-    Generate a recipe using the available food items.
-    Tries AI first for variety, falls back to template if AI fails.
-    """
-    if not food_items:
-        return "No available food items to create a recipe."
-    
-    # Prepare food list with expiration info
-    food_list = []
-    expiring_soon = []
-    
-    for name, days_left, extra_info in food_items:
-        if days_left <= 2:
-            expiring_soon.append(f"{name} (expires in {days_left} days)")
-        food_list.append(name)
-    
-    # Try AI generation first
-    if model:
-        try:
-            import random
-            
-            # Select up to 8 ingredients
-            ingredients = food_list[:8]
-            
-            # Create a simple, natural prompt that shouldn't trigger filters
-            prompt = f"""Create a delicious {recipe_size} serving meal using these ingredients: {', '.join(ingredients)}.
+def recipe_prompt(ingredients, expiring_soon, recipe_size="medium", dietary_restrictions="", cuisine_preference=""):
+    """The model prompt for a recipe from `ingredients`, using the `expiring_soon` ones first."""
+    # Create a simple, natural prompt that shouldn't trigger filters
+    prompt = f"""Create a delicious {recipe_size} serving meal using these ingredients: {', '.join(ingredients)}.
 
 Format your response exactly like this:
 
@@ -151,45 +152,185 @@ Format your response exactly like this:
 
 **Variations:** [2-3 ways to customize]"""
 
-            if dietary_restrictions:
-                prompt += f"\n\nDietary requirements: {dietary_restrictions}"
-            if cuisine_preference:
-                prompt += f"\nCuisine style: {cuisine_preference}"
-            if expiring_soon:
-                prompt += f"\n\nPriority: Use these ingredients first as they're expiring soon: {', '.join(expiring_soon[:3])}"
-            
-            print(f"Attempting AI recipe generation with {len(ingredients)} ingredients...")
-            
-            # Generate with timeout
-            response = model.generate_content(
-                prompt,
-                request_options={'timeout': 20}
-            )
-            
-            # Check response
-            if response and response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                
-                # Check if we got actual content
-                if candidate.finish_reason == 1 and candidate.content and candidate.content.parts:
-                    recipe = candidate.content.parts[0].text
-                    if recipe and len(recipe) > 100:  # Make sure we got a real recipe
-                        print(f"✓ AI recipe generated successfully ({len(recipe)} chars)")
-                        return recipe
-                    else:
-                        print("✗ AI response too short, using fallback")
-                else:
-                    print(f"✗ AI blocked (reason: {candidate.finish_reason}), using fallback")
-            else:
-                print("✗ No AI response, using fallback")
-                
-        except Exception as e:
-            print(f"✗ AI generation error: {e}")
+    if dietary_restrictions:
+        prompt += f"\n\nDietary requirements: {dietary_restrictions}"
+    if cuisine_preference:
+        prompt += f"\nCuisine style: {cuisine_preference}"
+    if expiring_soon:
+        prompt += f"\n\nPriority: Use these ingredients first as they're expiring soon: {', '.join(expiring_soon[:3])}"
+    return prompt
+
+def _request_recipe(recipe_model, prompt, timeout):
+    """One model call for a recipe; raises when it gives none (ModelBlocked for a non-STOP finish reason)."""
+    response = recipe_model.generate_content(
+        prompt,
+        request_options={'timeout': timeout}
+    )
+    if not (response and response.candidates):
+        raise RuntimeError("No AI response")
+    candidate = response.candidates[0]
+    # Check if we got actual content
+    if candidate.finish_reason != 1 or not (candidate.content and candidate.content.parts):
+        raise model_policy.ModelBlocked(f"AI blocked (reason: {candidate.finish_reason})")
+    recipe = candidate.content.parts[0].text
+    if not recipe or len(recipe) <= 100:  # Make sure we got a real recipe
+        raise RuntimeError("AI response too short")
+    return recipe
+
+def generate_ai_recipe(ingredients, expiring_soon, recipe_size="medium", dietary_restrictions="", cuisine_preference="", budget=None):
+    """
+    Ask the model for a recipe; returns its text, or None when the model is
+    unavailable or gave none. The call goes through model_policy: it is
+    given up after `budget` seconds, and skipped while the model keeps failing.
+    """
+    recipe_model = get_model()
+    if not recipe_model:
+        return None
+    prompt = recipe_prompt(ingredients, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference)
+    print(f"Attempting AI recipe generation with {len(ingredients)} ingredients...")
+    recipe = model_policy.call(lambda timeout: _request_recipe(recipe_model, prompt, timeout), budget)
+    if recipe:
+        print(f"✓ AI recipe generated successfully ({len(recipe)} chars)")
+    return recipe
+
+def _recipe_chunks(response):
+    """The text of a streamed model response, checked as it comes like _request_recipe() checks a whole one."""
+    length = 0
+    for chunk in response if hasattr(response, "__iter__") else [response]:
+        candidates = getattr(chunk, "candidates", None)
+        if candidates and candidates[0].finish_reason not in (None, 0, 1):  # 0: still going, 1: finished
+            raise model_policy.ModelBlocked(f"AI blocked (reason: {candidates[0].finish_reason})")
+        text = scan_response.response_text(chunk)
+        if text:
+            length += len(text)
+            yield text
+    if length <= 100:  # Make sure we got a real recipe
+        raise RuntimeError("AI response too short")
+
+def iter_ai_recipe(ingredients, expiring_soon, recipe_size="medium", dietary_restrictions="", cuisine_preference="", budget=None):
+    """
+    generate_ai_recipe() streamed: yields the recipe text as the model sends
+    it. Raises RuntimeError when there is no model or its circuit is open, or
+    when it blocks the recipe or answers too briefly, and TimeoutError when
+    `budget` seconds run out (possibly after some text was yielded).
+    """
+    recipe_model = get_model()
+    if not recipe_model:
+        raise RuntimeError("No recipe model available")
+    prompt = recipe_prompt(ingredients, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference)
+    print(f"Attempting streamed AI recipe generation with {len(ingredients)} ingredients...")
+
+    def start(timeout):
+        return _recipe_chunks(recipe_model.generate_content(
+            prompt,
+            stream=True,
+            request_options={'timeout': timeout}
+        ))
+
+    length = 0
+    for text in model_policy.stream(start, budget):
+        length += len(text)
+        yield text
+    print(f"✓ AI recipe streamed successfully ({length} chars)")
+
+def _prepare(food_items, recipe_size, dietary_restrictions, cuisine_preference):
+    """(food_list, expiring_soon, top ingredients, recipe cache key) for a recipe request."""
+    # Prepare food list with expiration info
+    food_list = []
+    expiring_soon = []
+    expiring_names = []
+    
+    for name, days_left, extra_info in food_items:
+        if days_left <= 2:
+            expiring_soon.append(f"{name} (expires in {days_left} days)")
+            expiring_names.append(name)
+        food_list.append(name)
+    
+    # Select up to 8 ingredients
+    ingredients = food_list[:8]
+    key = recipe_cache.recipe_key(ingredients, expiring_names[:3], recipe_size, dietary_restrictions, cuisine_preference)
+    return food_list, expiring_soon, ingredients, key
+
+def make_recipe(food_items, recipe_size="medium", dietary_restrictions="", cuisine_preference="", variety=None, deadline=None):
+    """
+    Generate a recipe using the available food items.
+    Tries AI first for variety, falls back to template if AI fails.
+
+    AI recipes are cached (see backend/recipe_cache.py): a repeat request
+    with the same top ingredients, expiring-soon items and options is
+    answered from the cache. `variety` is how many different recipes to
+    collect for such a request before serving from them.
+
+    `deadline` is the seconds the request may spend waiting for the model
+    (default model_policy.DEADLINE_SECONDS); past it the template is used.
+    """
+    if not food_items:
+        return "No available food items to create a recipe."
+    
+    deadline_at = time.monotonic() + (model_policy.DEADLINE_SECONDS if deadline is None else float(deadline))
+    food_list, expiring_soon, ingredients, key = _prepare(food_items, recipe_size, dietary_restrictions, cuisine_preference)
+    recipe, cached = recipe_cache.get_or_generate(
+        key,
+        lambda: generate_ai_recipe(ingredients, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference,
+                                   deadline_at - time.monotonic()),
+        variety,
+    )
+    if recipe:
+        if cached:
+            print("✓ Recipe served from the recipe cache")
+        return recipe
     
     # Fallback to template-based generator
     print(f"Using template recipe generator with {len(food_list)} ingredients")
     return generate_simple_recipe(food_list, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference)
 
+def stream_recipe(food_items, recipe_size="medium", dietary_restrictions="", cuisine_preference="", variety=None, deadline=None):
+    """
+    make_recipe() as a stream of events, sent as the recipe is written:
+        {"event": "chunk", "text"}  the next piece of the recipe
+        {"event": "reset"}          the model failed part-way; drop the text so far, the template follows
+        {"event": "done", "source": "ai" | "cache" | "template", "recipe"}  the whole recipe
+
+    `deadline` is as for make_recipe(): once it passes between chunks the
+    stream is reset and the template follows.
+    """
+    if not food_items:
+        recipe = "No available food items to create a recipe."
+        yield {"event": "chunk", "text": recipe}
+        yield {"event": "done", "source": "template", "recipe": recipe}
+        return
+    
+    deadline_at = time.monotonic() + (model_policy.DEADLINE_SECONDS if deadline is None else float(deadline))
+    food_list, expiring_soon, ingredients, key = _prepare(food_items, recipe_size, dietary_restrictions, cuisine_preference)
+    parts = []
+    source = "ai"
+    try:
+        stream = recipe_cache.iter_or_generate(
+            key,
+            lambda: iter_ai_recipe(ingredients, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference,
+                                   deadline_at - time.monotonic()),
+            variety,
+        )
+        for text, cached in stream:
+            if cached:
+                source = "cache"
+            parts.append(text)
+            yield {"event": "chunk", "text": text}
+        yield {"event": "done", "source": source, "recipe": "".join(parts)}
+        return
+    except Exception as e:
+        print(f"✗ AI generation error: {e}")
+        if parts:
+            yield {"event": "reset"}
+    
+    # Fallback to the template, a section at a time
+    print(f"Using template recipe generator with {len(food_list)} ingredients")
+    recipe = generate_simple_recipe(food_list, expiring_soon, recipe_size, dietary_restrictions, cuisine_preference)
+    sections = recipe.split("\n\n")
+    for i, section in enumerate(sections):
+        yield {"event": "chunk", "text": section if i == len(sections) - 1 else section + "\n\n"}
+    yield {"event": "done", "source": "template", "recipe": recipe}
+
 def generate_simple_recipe(food_list, expiring_soon, recipe_size="medium", dietary_restrictions="", cuisine_preference=""):
     """Generate a detailed recipe with specific measurements and instructions."""
     print(f"DEBUG: generate_simple_recipe called with {len(food_list) if food_list else 0} ingredients")
@@ -395,15 +536,20 @@ def generate_simple_recipe(food_list, expiring_soon, recipe_size="medium", dieta
     print(f"DEBUG: Recipe preview: {result[:200]}...")
     return result
 
-def make_recipe_for_user(user_id, recipe_size="medium", dietary_restrictions="", cuisine_preference="", prioritize_expiring=True):
+def make_recipe_for_user(user_id, recipe_size="medium", dietary_restrictions="", cuisine_preference="", prioritize_expiring=True, variety=None, deadline=None):
     """Generate a recipe specifically for a user's food inventory."""
     food_items = get_user_foods(user_id, include_expiring_soon=prioritize_expiring)
-    return make_recipe(food_items, recipe_size, dietary_restrictions, cuisine_preference)
+    return make_recipe(food_items, recipe_size, dietary_restrictions, cuisine_preference, variety, deadline)
 
-def make_recipe_from_general_inventory(recipe_size="medium", dietary_restrictions="", cuisine_preference="", prioritize_expiring=True):
+def make_recipe_from_general_inventory(recipe_size="medium", dietary_restrictions="", cuisine_preference="", prioritize_expiring=True, variety=None, deadline=None):
     """Generate a recipe from the general food inventory."""
     food_items = get_user_foods(None, include_expiring_soon=prioritize_expiring)
-    return make_recipe(food_items, recipe_size, dietary_restrictions, cuisine_preference)
+    return make_recipe(food_items, recipe_size, dietary_restrictions, cuisine_preference, variety, deadline)
+
+def stream_recipe_from_general_inventory(recipe_size="medium", dietary_restrictions="", cuisine_preference="", prioritize_expiring=True, variety=None, deadline=None):
+    """stream_recipe() for the general food inventory."""
+    food_items = get_user_foods(None, include_expiring_soon=prioritize_expiring)
+    return stream_recipe(food_items, recipe_size, dietary_restrictions, cuisine_preference, variety, deadline)
 
 if __name__ == '__main__':
     # Test the recipe generation
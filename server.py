@@ -1,7 +1,10 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime, timedelta
 import sqlite3
+import io
+import json
+import time
 import os
 import sys
 
@@ -12,17 +15,29 @@ if backend_path not in sys.path:
 
 # Import backend modules
 from backend import scanner, food_data
+import database
+import ingredient_search
+import inventory
+import inventory_sync
+import expiry_cache
+import bulk_ingredients
+import scan_pipeline
+import scan_cache
+import catalog_index
+import scan_jobs
+import recipe_cache
+import model_policy
+import uploads
 
 app = Flask(__name__)
+app.request_class = uploads.SpooledRequest  # keep photo uploads in memory
 CORS(app)
 
 # Authentication database setup
-AUTH_DB_NAME = "users.db"
+AUTH_DB_NAME = database.USER_DB
 
-def init_auth_db():
-    conn = sqlite3.connect(AUTH_DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("""
+def init_auth_db(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE,
@@ -30,10 +45,9 @@ def init_auth_db():
             password TEXT
         )
     """)
-    conn.commit()
-    conn.close()
 
-init_auth_db()
+# Created before users.db is first used; database.bootstrap() in __main__ does it up front
+database.register_schema(init_auth_db, AUTH_DB_NAME)
 
 # Authentication endpoints
 @app.route("/signup", methods=["POST"])
@@ -47,15 +61,12 @@ def signup():
         return jsonify({"error": "Missing fields"}), 400
 
     try:
-        conn = sqlite3.connect(AUTH_DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
-            (username, email, password),
-        )
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
+        with database.user_connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                (username, email, password),
+            )
+            user_id = cursor.lastrowid
         return jsonify({"user_id": user_id}), 200
     except sqlite3.IntegrityError:
         return jsonify({"error": "Username or email already exists"}), 400
@@ -72,14 +83,11 @@ def login():
         return jsonify({"error": "Missing username or password"}), 400
 
     try:
-        conn = sqlite3.connect(AUTH_DB_NAME)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ? AND password = ?",
-            (username, password),
-        )
-        row = cursor.fetchone()
-        conn.close()
+        with database.user_connection() as conn:
+            row = conn.execute(
+                "SELECT id FROM users WHERE username = ? AND password = ?",
+                (username, password),
+            ).fetchone()
 
         if row:
             return jsonify({"user_id": row[0]}), 200
@@ -92,9 +100,21 @@ def login():
 def logout():
     return jsonify({"message": "Logged out"}), 200
 
+# Background workers for queued photo scans (see backend/scan_jobs.py)
+scan_queue = scan_jobs.JobQueue(
+    lambda data: scanner.iter_analyze_image(data, save=False),
+    lambda items: scanner.save_items(items),
+)
+
 @app.route("/photo_scanner", methods=['POST'])
 def photo_scanner():
-    """Photo scanning endpoint for food recognition"""
+    """
+    Photo scanning endpoint for food recognition. The photos go through the
+    scan queue and the request waits for the job, answering with the results
+    as it always has. With ?async=1 (or a Prefer: respond-async header) it
+    answers 202 with a job id at once instead; poll /scan-jobs/<id> for
+    progress and results.
+    """
     print("=== PHOTO_SCANNER ENDPOINT HIT ===")
     print(f"Request method: {request.method}")
     print(f"Request files: {list(request.files.keys())}")
@@ -111,32 +131,21 @@ def photo_scanner():
             return jsonify({'error': 'No images uploaded', 'received_keys': list(request.files.keys())}), 400
         
         print(f"Found {len(image_files)} image files")
-        
-        # Process each image
-        results = []
-        for i, image_file in enumerate(image_files):
-            print(f"Processing image {i+1}: {image_file.filename}")
-            try:
-                # Save the uploaded file temporarily
-                temp_path = f"temp_upload_{i}.jpg"
-                image_file.save(temp_path)
-                
-                # Analyze the image and add to database
-                items = scanner.analyze_image(temp_path)
-                results.append(items)
-                
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                    
-            except Exception as e:
-                print(f"Error processing image {i+1}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                results.append([{'item': 'Error', 'error': str(e)}])
-        
+        job_id = scan_queue.submit(
+            [(image_file.filename, image_file.read()) for image_file in image_files],
+            max_concurrency=request.args.get('concurrency', type=int),
+        )
+        print(f"Queued scan job {job_id}")
+
+        respond_async = request.args.get('async', type=int) or 'respond-async' in request.headers.get('Prefer', '')
+        if respond_async:
+            return jsonify({'success': True, 'job_id': job_id, 'status_url': f'/scan-jobs/{job_id}'}), 202
+
+        job = scan_queue.wait(job_id, timeout=scan_pipeline.IMAGE_TIMEOUT * len(image_files) + 60)
+        if job['status'] != 'done':
+            return jsonify({'success': False, 'job_id': job_id, 'status': job['status'], 'error': job['error']}), 500
         print("Analysis complete, returning results")
-        return jsonify({"results": results, "success": True}), 200
+        return jsonify({"results": job['results'], "job_id": job_id, "success": True}), 200
         
     except Exception as e:
         print(f"Error in photo_scanner: {str(e)}")
@@ -144,6 +153,85 @@ def photo_scanner():
         traceback.print_exc()
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route("/scan-jobs/<job_id>", methods=['GET'])
+def scan_job_status(job_id):
+    """Progress and (partial) results of a queued photo scan"""
+    job = scan_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'No such scan job'}), 404
+    return jsonify({'success': True, **job}), 200
+
+@app.route("/stats/scan-jobs", methods=['GET'])
+def scan_job_stats():
+    """Queue depth and wait/processing times of the photo scan queue"""
+    return jsonify({'workers': scan_queue.workers, **scan_jobs.stats()}), 200
+
+def encode_event(event, payload, ndjson=False):
+    """One event of a streamed response: an SSE message, or an NDJSON line"""
+    if ndjson:
+        return json.dumps({'event': event, **payload}) + "\n"
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def event_stream(events, ndjson=False):
+    """Response streaming encoded events as they are produced (no buffering by proxies)"""
+    return Response(
+        events,
+        mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@app.route("/photo_scanner/stream", methods=['POST'])
+def photo_scanner_stream():
+    """
+    /photo_scanner, streamed: Server-Sent Events (or NDJSON with ?format=ndjson)
+    sent while the photos are analysed. Events: start {images}, item {index, item}
+    as soon as a photo yields it (already added to the DB), image {index, items
+    or error, seconds} when a photo is finished, done {images, items, seconds}.
+    """
+    print("=== PHOTO_SCANNER_STREAM ENDPOINT HIT ===")
+    if 'image' in request.files:
+        image_files = [request.files['image']]
+    elif 'images' in request.files:
+        image_files = request.files.getlist('images')
+    else:
+        return jsonify({'error': 'No images uploaded', 'received_keys': list(request.files.keys())}), 400
+
+    ndjson = request.args.get('format') == 'ndjson'
+    concurrency = request.args.get('concurrency', type=int)
+
+    def encode(event, payload):
+        return encode_event(event, payload, ndjson)
+
+    # The photos are analysed straight from the uploads (see uploads.py);
+    # keep them open after this view returns, while the response streams
+    photos = [uploads.detach(image_file) for image_file in image_files]
+
+    def generate():
+        started = time.monotonic()
+        found = 0
+        try:
+            yield encode('start', {'images': len(photos)})
+            events = scan_pipeline.stream_images(
+                photos,
+                lambda photo: scanner.iter_analyze_image(photo, save=False),
+                max_concurrency=concurrency,
+            )
+            for event in events:
+                if event['event'] == 'item':
+                    scanner.save_items([event['item']])
+                    found += 1
+                yield encode(event.pop('event'), event)
+            yield encode('done', {'images': len(photos), 'items': found,
+                                  'seconds': round(time.monotonic() - started, 3)})
+        except Exception as e:
+            print(f"Error in photo_scanner_stream: {str(e)}")
+            yield encode('error', {'error': str(e)})
+        finally:
+            for photo in photos:
+                photo.close()
+
+    return event_stream(generate(), ndjson)
+
 @app.route('/')
 def home():
     """Root endpoint to verify server is running"""
@@ -151,10 +239,11 @@ def home():
         "message": "ExpirEase API Server is running!",
         "endpoints": {
             "auth": ["/signup", "/login", "/logout"],
-            "recipes": ["/generate-recipe"],
-            "ingredients": ["/all-ingredients", "/expiring-ingredients", "/add_ingredient", "/delete-ingredient"],
-            "search": ["/search?q=<query>"],
-            "photo": ["/photo_scanner (POST)"]
+            "recipes": ["/generate-recipe (POST JSON, optional variety=<n>, deadline=<seconds>)", "/generate-recipe/stream (POST JSON, SSE or ?format=ndjson, deadline=<seconds>)"],
+            "ingredients": ["/all-ingredients?limit=<n>&cursor=<c>&fields=<f1,f2>&category=<c>", "/expiring-ingredients", "/add_ingredient", "/delete-ingredient", "/ingredients/bulk (POST JSON array or NDJSON)", "/inventory/changes?since=<version>"],
+            "search": ["/search?q=<query>&limit=<n>&source=food|catalog|user_food"],
+            "photo": ["/photo_scanner (POST, ?concurrency=<n>&async=1)", "/scan-jobs/<id>", "/photo_scanner/stream (POST, SSE or ?format=ndjson)"],
+            "stats": ["/stats/cache", "/stats/scan-cache", "/stats/scan-jobs", "/stats/recipe-cache", "/stats/recipe-model"]
         }
     }), 200
 
@@ -169,47 +258,111 @@ def generate_recipe_endpoint():
         dietary_restrictions = data.get('dietary_restrictions', '')
         cuisine_preference = data.get('cuisine_preference', '')
         prioritize_expiring = data.get('prioritize_expiring', True)
+        variety = data.get('variety')  # different recipes to collect per request before reusing them
+        try:
+            deadline = model_policy.parse_deadline(data.get('deadline'))  # seconds to wait for the model
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
         
         recipe = recipe_maker.make_recipe_from_general_inventory(
-            recipe_size, dietary_restrictions, cuisine_preference, prioritize_expiring
+            recipe_size, dietary_restrictions, cuisine_preference, prioritize_expiring, variety, deadline
         )
         return jsonify({'recipe': recipe, 'success': True})
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route('/generate-recipe/stream', methods=['POST'])
+def generate_recipe_stream():
+    """
+    /generate-recipe, streamed: Server-Sent Events (or NDJSON with ?format=ndjson)
+    sent as the model writes the recipe. Events: start, chunk {text}, reset (the
+    model failed part-way: drop the text so far, the template recipe follows),
+    done {source: ai | cache | template, recipe}, error {error}.
+    """
+    import recipe_maker
+
+    data = request.get_json(silent=True) or {}
+    ndjson = request.args.get('format') == 'ndjson'
+    try:
+        deadline = model_policy.parse_deadline(data.get('deadline'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    options = (
+        data.get('recipe_size', 'medium'),
+        data.get('dietary_restrictions', ''),
+        data.get('cuisine_preference', ''),
+        data.get('prioritize_expiring', True),
+        data.get('variety'),
+        deadline,
+    )
+
+    def generate():
+        try:
+            yield encode_event('start', {}, ndjson)  # first byte before the inventory query and the model
+            for event in recipe_maker.stream_recipe_from_general_inventory(*options):
+                yield encode_event(event.pop('event'), event, ndjson)
+        except Exception as e:
+            print(f"Error in generate_recipe_stream: {str(e)}")
+            yield encode_event('error', {'error': str(e)}, ndjson)
+
+    return event_stream(generate(), ndjson)
+
 @app.route('/all-ingredients', methods=['GET'])
+@inventory_sync.conditional()
 def all_ingredients():
-    """Get all ingredients from the database"""
+    """
+    Get non-expired ingredients from the database, soonest expiry first.
+    
+    Optional query args:
+        limit, cursor: keyset pagination; the response becomes {"items": [...], "next_cursor": ...}
+        fields: comma-separated subset of id,name,category,expiration,days_until_expiry
+        category: only return this category
+    """
     try:
-        from recipe_maker import get_user_foods
-        from datetime import datetime
-        ingredients_tuples = get_user_foods(None)  # Get all ingredients
+        fields = inventory.parse_fields(request.args.get('fields'))
+        category = request.args.get('category')
+        cursor = request.args.get('cursor')
+        paginate = 'limit' in request.args or cursor is not None
+        now = datetime.now()
         
-        print(f"DEBUG: Total ingredients retrieved from database: {len(ingredients_tuples)}")
-        
-        # Convert tuples to JSON objects
+        if not paginate and not category:
+            # The whole list, served from the day's expiry cache like get_user_foods
+            today = now.strftime('%Y-%m-%d')
+            rows = expiry_cache.get_or_load('food', ('all-ingredients',), lambda: inventory.food_page(today, None)[0])
+            next_cursor = None
+            print(f"DEBUG: Total ingredients retrieved from database: {len(rows)}")
+        else:
+            limit = inventory.parse_limit(request.args.get('limit', type=int)) if paginate else None
+            rows, next_cursor = inventory.food_page(now.strftime('%Y-%m-%d'), limit, cursor, category)
         ingredients = []
-        for name, days_left, category in ingredients_tuples:
-            ingredients.append({
-                'id': len(ingredients) + 1,
+        for food_id, name, food_category, expires_on in rows:
+            days_left = (datetime.strptime(expires_on, '%Y-%m-%d') - now).days
+            ingredients.append(inventory.project({
+                'id': food_id,
                 'name': name,
-                'category': category,
-                'expiration': (datetime.now() + timedelta(days=days_left)).strftime('%Y-%m-%d'),
+                'category': food_category or '',
+                'expiration': (now + timedelta(days=days_left)).strftime('%Y-%m-%d'),
                 'days_until_expiry': days_left
-            })
-        
-        print(f"DEBUG: Returning {len(ingredients)} ingredients to frontend")
+            }, fields))
+        if paginate:
+            return jsonify({'items': ingredients, 'next_cursor': next_cursor})
         return jsonify(ingredients)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/expiring-ingredients', methods=['GET'])  
+@app.route('/expiring-ingredients', methods=['GET'])
+@inventory_sync.conditional()
 def expiring_ingredients():
     """Get ingredients that are expiring soon"""
     try:
-        from recipe_maker import get_user_foods
-        from datetime import datetime, timedelta
-        ingredients_tuples = get_user_foods(None, include_expiring_soon=True)
+        from recipe_maker import get_user_foods, get_expiring_foods
+        days_threshold = request.args.get('days_threshold', type=int)
+        if days_threshold is None:
+            ingredients_tuples = get_user_foods(None, include_expiring_soon=True)
+        else:
+            ingredients_tuples = get_expiring_foods(None, days_threshold)
         
         # Convert tuples to JSON objects
         ingredients = []
@@ -225,26 +378,73 @@ def expiring_ingredients():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/inventory/changes', methods=['GET'])
+def inventory_changes():
+    """Inserts/updates/deletes since a client's last seen inventory version"""
+    since = request.args.get('since', default=0, type=int)
+    user_id = request.args.get('user_id', type=int)
+    try:
+        return jsonify(inventory_sync.changes_since(inventory_sync.inventory_name(user_id), since))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the day's expiry cache"""
+    return jsonify(expiry_cache.stats())
+
+@app.route('/stats/scan-cache', methods=['GET'])
+def scan_cache_stats():
+    """Hit ratio and bytes saved by the photo scan result cache"""
+    return jsonify(scan_cache.stats())
+
+@app.route('/stats/recipe-cache', methods=['GET'])
+def recipe_cache_stats():
+    """Hit ratio and model time saved by the recipe cache"""
+    return jsonify(recipe_cache.stats())
+
+@app.route('/stats/recipe-model', methods=['GET'])
+def recipe_model_stats():
+    """Circuit breaker state, latencies and the path (model, hedged, template fallback reason) of recipe model calls"""
+    return jsonify(model_policy.stats())
+
 @app.route('/search', methods=['GET'])
 def search_ingredient():
-    """Search for a specific ingredient"""
+    """Ranked ingredient search (prefix, substring and typo-tolerant)"""
     query = request.args.get('q', '')
     if not query:
         return jsonify({'error': 'No query provided'}), 400
+    source = request.args.get('source', 'food')
+    if source not in ingredient_search.SOURCES:
+        return jsonify({'error': f'Unknown source: {source}'}), 400
+    limit = request.args.get('limit', default=ingredient_search.DEFAULT_LIMIT, type=int)
+    user_id = request.args.get('user_id', type=int)
     
     try:
-        from recipe_maker import get_user_foods
-        ingredients_tuples = get_user_foods(None)
-        # Simple search - find ingredient by name
-        for name, days_left, category in ingredients_tuples:
-            if query.lower() in name.lower():
-                return jsonify({
-                    'name': name,
-                    'category': category,
-                    'expiration': (datetime.now() + timedelta(days=days_left)).strftime('%Y-%m-%d'),
-                    'days_until_expiry': days_left
-                })
-        return jsonify({'error': 'Ingredient not found'}), 404
+        matches = ingredient_search.search(
+            query, source=source, limit=limit, user_id=user_id, fresh_only=(source != 'catalog')
+        )
+        if not matches:
+            return jsonify({'error': 'Ingredient not found'}), 404
+        
+        now = datetime.now()
+        results = []
+        for match in matches:
+            if match.get('expires_on'):
+                days_left = (datetime.strptime(match['expires_on'], '%Y-%m-%d') - now).days
+            else:
+                days_left = match.get('default_expire_days') or 0
+            result = {
+                'name': match['name'],
+                'expiration': (now + timedelta(days=days_left)).strftime('%Y-%m-%d'),
+                'days_until_expiry': days_left,
+                'score': match['score'],
+            }
+            if 'category' in match:  # only inventory rows have one
+                result['category'] = match['category']
+            results.append(result)
+        # Best match stays at the top level for clients that expect a single item
+        return jsonify({**results[0], 'results': results})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -296,7 +496,8 @@ def add_ingredient():
             if expire_days < 0:
                 expire_days = 0
         else:
-            expire_days = 7
+            # No date given: the catalog's default shelf life for this name
+            expire_days = catalog_index.default_days(name, 7)
         
         print(f"Calculated expire_days: {expire_days}")
         add_food(name, expire_days, category)
@@ -309,6 +510,38 @@ def add_ingredient():
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 400
 
+# Bulk add/delete/update endpoint
+@app.route('/ingredients/bulk', methods=['POST'])
+def bulk_ingredients_route():
+    """Apply a JSON array (or NDJSON stream) of ingredient operations in one transaction"""
+    try:
+        print("=== INGREDIENTS_BULK ENDPOINT HIT ===")
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            # Buffered: readline() on the raw request stream reads a byte at a time
+            items = bulk_ingredients.parse_ndjson_items(io.BufferedReader(request.stream))
+        else:
+            items = bulk_ingredients.parse_json_items(request.get_data())
+        results, applied = bulk_ingredients.apply_bulk(items)
+        print(f"Applied {applied} of {len(items)} bulk operations")
+        return jsonify({
+            'success': applied == len(items),
+            'applied': applied,
+            'failed': len(items) - applied,
+            'results': results,
+        }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk_ingredients: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 if __name__ == '__main__':
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # In the reloader's serving process: create the tables now rather than
+        # on the first request, and pick up jobs queued before a restart
+        database.bootstrap()
+        scan_queue.start()
     print("Starting Flask server on port 5000...")
     app.run(host='0.0.0.0', port=5000, debug=True)
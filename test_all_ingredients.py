@@ -0,0 +1,88 @@
+"""
+Tests for GET /all-ingredients (server.py and backend/inventory.py): real
+row ids, keyset cursors, field projection and the category filter:
+
+    python -m pytest -q test_all_ingredients.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import food_data  # noqa: E402
+import inventory  # noqa: E402
+
+CATEGORY = "Trellisware"  # made up, so the filter only sees this test's rows
+FOODS = [(f"Trellis item {i}", 1 + i % 4) for i in range(7)]
+
+
+@pytest.fixture(autouse=True)
+def foods():
+    for name, days in FOODS:
+        food_data.add_food(name, days, CATEGORY)
+    yield
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food WHERE category = ?", (CATEGORY,))
+
+
+@pytest.fixture
+def client():
+    import server
+    return server.app.test_client()
+
+
+def stored_ids():
+    with database.connection() as conn:
+        return dict(conn.execute("SELECT name, id FROM food WHERE category = ?", (CATEGORY,)))
+
+
+def test_every_form_returns_the_real_row_ids(client):
+    ids = stored_ids()
+    everything = [item for item in client.get("/all-ingredients").get_json() if item["category"] == CATEGORY]
+    filtered = client.get(f"/all-ingredients?category={CATEGORY}").get_json()
+    paged = client.get(f"/all-ingredients?category={CATEGORY}&limit=50").get_json()["items"]
+    for items in (everything, filtered, paged):
+        assert {item["name"]: item["id"] for item in items} == ids
+
+
+def test_unpaginated_list_follows_writes(client):
+    client.get("/all-ingredients")  # fills the cache
+    food_data.add_food("Trellis late item", 2, CATEGORY)
+    names = [item["name"] for item in client.get("/all-ingredients").get_json()]
+    assert "Trellis late item" in names
+
+
+def test_cursor_walks_every_row_once_in_expiry_order(client):
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f"/all-ingredients?category={CATEGORY}&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url).get_json()
+        seen.extend(body["items"])
+        cursor, pages = body["next_cursor"], pages + 1
+        if cursor is None:
+            break
+    assert pages == 3 and len(seen) == len(FOODS)
+    assert sorted(item["name"] for item in seen) == sorted(name for name, _ in FOODS)
+    keys = [(item["expiration"], item["id"]) for item in seen]
+    assert keys == sorted(keys)
+
+
+def test_invalid_cursor_is_a_400(client):
+    for cursor in ("not-a-cursor", inventory.encode_cursor(None, 1), "WzEsMl0"):  # the last is [1,2]
+        response = client.get(f"/all-ingredients?cursor={cursor}")
+        assert response.status_code == 400 and response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_fields_projection(client):
+    items = client.get(f"/all-ingredients?category={CATEGORY}&fields=name,days_until_expiry").get_json()
+    assert items and all(set(item) == {"name", "days_until_expiry"} for item in items)
+    assert client.get("/all-ingredients?fields=name,colour").status_code == 400
+
+
+def test_category_filter(client):
+    items = client.get(f"/all-ingredients?category={CATEGORY}").get_json()
+    assert len(items) == len(FOODS) and {item["category"] for item in items} == {CATEGORY}
+    assert client.get("/all-ingredients?category=No such category").get_json() == []
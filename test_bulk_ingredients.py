@@ -0,0 +1,145 @@
+"""
+Tests for batched inventory writes (backend/bulk_ingredients.py and
+POST /ingredients/bulk): JSON-array and NDJSON bodies, the ids reported for
+adds, and per-item errors that don't stop the rest of the batch:
+
+    python -m pytest -q test_bulk_ingredients.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import bulk_ingredients  # noqa: E402
+import database  # noqa: E402
+import food_data  # noqa: E402,F401  (creates the food table)
+
+PREFIX = "Brindle "  # made-up names, so other tests' rows never match
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    yield
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food WHERE name LIKE ?", (PREFIX + "%",))
+
+
+@pytest.fixture
+def client():
+    import server
+    return server.app.test_client()
+
+
+def rows():
+    with database.connection() as conn:
+        return {row[0]: row[1:] for row in conn.execute(
+            "SELECT id, name, category, expires_on FROM food WHERE name LIKE ?", (PREFIX + "%",))}
+
+
+def test_adds_report_their_row_ids():
+    results, applied = bulk_ingredients.apply_bulk([
+        {"op": "add", "name": PREFIX + "kale", "category": "Vegetable", "expire_days": 3},
+        {"name": PREFIX + "oats", "category": "Grain", "expiration_date": "2099-01-01"},
+    ])
+    assert applied == 2 and all(r["ok"] for r in results)
+    stored = rows()
+    assert stored[results[0]["id"]][:2] == (PREFIX + "kale", "Vegetable")
+    assert stored[results[1]["id"]][:2] == (PREFIX + "oats", "Grain")
+
+
+def test_ids_of_adds_split_by_other_operations():
+    results, applied = bulk_ingredients.apply_bulk([
+        {"name": PREFIX + "pear", "expire_days": 4},
+        {"op": "delete", "name": PREFIX + "pear"},
+        {"name": PREFIX + "pear", "expire_days": 5},
+        {"name": PREFIX + "quince", "expire_days": 6},
+    ])
+    assert applied == 4
+    first, _, second, third = (r.get("id") for r in results)
+    assert first < second < third and sorted(rows()) == [second, third]
+    assert rows()[third][0] == PREFIX + "quince"
+
+
+def test_delete_and_update_that_match_nothing_are_not_found():
+    (added,), _ = bulk_ingredients.apply_bulk([{"name": PREFIX + "fig", "expire_days": 4}])
+    results, applied = bulk_ingredients.apply_bulk([
+        {"op": "delete", "name": PREFIX + "nothing by this name"},
+        {"op": "delete", "id": 10 ** 9},
+        {"op": "update", "id": 10 ** 9, "category": "Fruit"},
+        {"op": "update", "id": added["id"], "category": "Fruit"},
+        {"op": "delete", "name": PREFIX + "fig"},
+    ])
+    assert [(r["ok"], r.get("error")) for r in results] == [
+        (False, "Not found"), (False, "Not found"), (False, "Not found"), (True, None), (True, None)]
+    assert applied == 2 and rows() == {}
+
+
+def test_invalid_items_get_errors_and_the_rest_apply():
+    results, applied = bulk_ingredients.apply_bulk([
+        {"op": "add", "category": "Fruit"},
+        "not an object",
+        {"op": "add", "name": PREFIX + "plum", "expiration_date": "tomorrow"},
+        {"op": "update", "id": 1},
+        {"op": "explode"},
+        {"op": "add", "name": PREFIX + "lime", "expire_days": 9},
+    ])
+    assert [r.get("error") for r in results] == [
+        "Missing name", "Operation must be an object", "Invalid expiration_date or expire_days",
+        "Nothing to update", "Unknown op: explode", None]
+    assert applied == 1 and [name for name, _, _ in rows().values()] == [PREFIX + "lime"]
+
+
+def test_out_of_range_numbers_are_per_item_errors():
+    results, applied = bulk_ingredients.apply_bulk([
+        {"name": PREFIX + "inf", "expire_days": float("inf")},  # what a 1e400 in the JSON becomes
+        {"name": PREFIX + "nan", "expire_days": float("nan")},
+        {"name": PREFIX + "huge", "expire_days": 10 ** 400},
+        {"name": PREFIX + "billion", "expire_days": 10 ** 9},
+        {"name": PREFIX + "negative", "expire_days": -3},
+        {"name": PREFIX + "far", "expiration_date": "9999-12-31"},
+        {"op": "delete", "id": float("inf")},
+        {"op": "delete", "id": 2 ** 70},
+        {"op": "update", "id": 1.5, "category": "Fruit"},
+        {"name": PREFIX + "fine", "expire_days": "4.7"},
+    ])
+    days_error = f"expire_days must be a number from 0 to {bulk_ingredients.MAX_EXPIRE_DAYS}"
+    assert [r.get("error") for r in results] == [
+        days_error, days_error, "Invalid expiration_date or expire_days", days_error, days_error,
+        f"expiration_date is more than {bulk_ingredients.MAX_EXPIRE_DAYS} days away",
+        "Invalid id", "Invalid id", "Invalid id", None]
+    assert applied == 1 and [row[0] for row in rows().values()] == [PREFIX + "fine"]
+
+
+def test_a_huge_number_in_the_body_is_not_a_500(client):
+    body = '[{"name": "%sbig", "expire_days": 1e400}, {"name": "%sok", "expire_days": 2}]' % (PREFIX, PREFIX)
+    response = client.post("/ingredients/bulk", data=body, content_type="application/json")
+    assert response.status_code == 200
+    assert [r["ok"] for r in response.get_json()["results"]] == [False, True]
+
+
+def test_json_array_endpoint(client):
+    response = client.post("/ingredients/bulk", json={"items": [
+        {"name": PREFIX + "leek", "expire_days": 5}, {"op": "delete", "name": PREFIX + "missing"}]})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body["success"], body["applied"], body["failed"]) == (False, 1, 1)
+    assert body["results"][0]["id"] in rows()
+
+    assert client.post("/ingredients/bulk", data="{nope", content_type="application/json").status_code == 400
+    assert client.post("/ingredients/bulk", json={"op": "add"}).status_code == 400
+    too_many = [{"name": PREFIX + "x"}] * (bulk_ingredients.MAX_BULK_ITEMS + 1)
+    assert client.post("/ingredients/bulk", json=too_many).status_code == 400
+    assert len(rows()) == 1
+
+
+def test_ndjson_endpoint(client):
+    body = "\n".join([json.dumps({"name": PREFIX + "beet", "expire_days": 6}), "", "{broken",
+                      json.dumps({"op": "delete", "name": PREFIX + "beet"})])
+    response = client.post("/ingredients/bulk", data=body, content_type="application/x-ndjson")
+    results = response.get_json()["results"]
+    assert [(r["op"], r["ok"]) for r in results] == [("add", True), (None, False), ("delete", True)]
+    assert results[1]["error"] == "Line 3 is not valid JSON"
+    assert rows() == {}
@@ -0,0 +1,97 @@
+"""
+Tests for the in-memory catalog index behind default expiry at insert time:
+
+    python -m pytest -q test_catalog_index.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import bulk_ingredients  # noqa: E402
+import catalog_index  # noqa: E402
+import database  # noqa: E402
+import food_data  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(catalog_index, "CHECK_INTERVAL", 5)
+    catalog_index.invalidate()
+    yield
+    with database.connection() as conn:
+        conn.execute("DELETE FROM food_catalog WHERE name LIKE 'test %'")
+    catalog_index.invalidate()
+
+
+@pytest.mark.parametrize("name, days", [
+    ("tomato", 146),          # food_data.csv seed
+    ("Tomatoes", 146),
+    ("  ROMA tomatoes! ", 146),  # falls back to the trailing words
+    ("blueberries", 365),
+])
+def test_plural_and_modifier_insensitive_matching(name, days):
+    assert catalog_index.lookup(name) == days
+
+
+def test_unknown_names_use_the_fallback():
+    assert catalog_index.lookup("unobtainium") is None
+    assert catalog_index.default_days("unobtainium", 3) == 3
+    assert catalog_index.default_days("", 7) == 7
+
+
+def test_catalog_values_win_over_csv_seeds():
+    food_data.add_to_catalog("test tomato", 2)
+    food_data.add_to_catalog("Blueberries", 9)
+    try:
+        assert catalog_index.lookup("test tomatoes") == 2
+        assert catalog_index.lookup("blueberry") == 9
+    finally:
+        with database.connection() as conn:
+            conn.execute("DELETE FROM food_catalog WHERE name = 'Blueberries'")
+
+
+def test_add_to_catalog_refreshes_immediately():
+    assert catalog_index.lookup("test dragon fruit") is None
+    food_data.add_to_catalog("test dragon fruit", 11)
+    assert catalog_index.lookup("Test Dragon Fruits") == 11
+
+
+def test_writes_from_elsewhere_are_picked_up_after_the_check_interval(monkeypatch):
+    catalog_index.lookup("tomato")
+    loads = catalog_index.stats()["loads"]
+    with database.connection() as conn:  # e.g. import_csv.py in another process
+        conn.execute("INSERT INTO food_catalog (name, default_expire_days) VALUES ('test quince', 21)")
+
+    assert catalog_index.lookup("test quince") is None  # within the interval: no DB round trip
+    monkeypatch.setattr(catalog_index, "CHECK_INTERVAL", 0)
+    assert catalog_index.lookup("test quinces") == 21
+    catalog_index.lookup("tomato")
+    assert catalog_index.stats()["loads"] == loads + 1  # unchanged version: no second reload
+
+
+def test_lookups_take_microseconds():
+    names = ["tomatoes", "roma tomatoes", "unobtainium", "Blueberries"] * 2500
+    catalog_index.lookup("warm up")
+    start = time.perf_counter()
+    for name in names:
+        catalog_index.lookup(name)
+    per_lookup_us = (time.perf_counter() - start) / len(names) * 1e6
+    assert per_lookup_us < 100
+
+
+def test_bulk_adds_without_a_date_use_the_catalog_default():
+    results, applied = bulk_ingredients.apply_bulk([{"name": "test catalog tomatoes"}, {"name": "test unobtainium"}])
+    assert applied == 2
+    with database.connection() as conn:
+        rows = dict(conn.execute(
+            "SELECT name, expires_on FROM food WHERE id IN (?, ?)", [r["id"] for r in results]
+        ).fetchall())
+        conn.execute("DELETE FROM food WHERE name LIKE 'test %'")
+    today = datetime.now()
+    assert rows["test catalog tomatoes"] == (today + timedelta(days=146)).strftime("%Y-%m-%d")
+    assert rows["test unobtainium"] == (today + timedelta(days=bulk_ingredients.DEFAULT_EXPIRE_DAYS)).strftime("%Y-%m-%d")
@@ -0,0 +1,174 @@
+"""
+Tests for the connection pool (backend/database.py): the size bound,
+commit/rollback in connection(), concurrent checkout, schema setups that
+don't depend on import order, and personal_input writing through it to the
+shared foodapp.db:
+
+    python -m pytest -q test_database.py
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = database.ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE widgets (name TEXT)")
+    yield pool
+    pool.close()
+
+
+def widgets(pool):
+    with pool.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM widgets ORDER BY rowid")]
+
+
+def test_pool_never_opens_more_than_its_size(pool):
+    first, second = pool.acquire(), pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+    assert time.monotonic() - start >= 0.1
+
+    pool.release(second)
+    assert pool.acquire(timeout=0.1) is second  # reused, not reopened
+    assert pool._opened == 2
+    pool.release(first)
+    pool.release(second)
+
+
+def test_connection_commits_on_success_and_rolls_back_on_error(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO widgets VALUES ('kept')")
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO widgets VALUES ('lost')")
+            raise ValueError("boom")
+    assert widgets(pool) == ["kept"]
+
+
+def test_release_rolls_back_an_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO widgets VALUES ('uncommitted')")
+    pool.release(conn)
+    assert not conn.in_transaction and widgets(pool) == []
+
+
+def test_concurrent_checkout_hands_each_connection_to_one_thread(pool):
+    in_use, peak, errors = set(), [0], []
+    lock = threading.Lock()
+
+    def worker(n):
+        try:
+            with pool.connection() as conn:
+                with lock:
+                    assert id(conn) not in in_use
+                    in_use.add(id(conn))
+                    peak[0] = max(peak[0], len(in_use))
+                conn.execute("INSERT INTO widgets VALUES (?)", (f"w{n}",))
+                time.sleep(0.01)
+                with lock:
+                    in_use.discard(id(conn))
+        except Exception as e:  # surfaced below; an assert in a thread would be lost
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [] and peak[0] <= 2 and pool._opened <= 2
+    assert sorted(widgets(pool)) == sorted(f"w{n}" for n in range(12))
+
+
+def test_closed_pool_refuses_checkouts(pool):
+    conn = pool.acquire()
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(conn)  # closed instead of pooled
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """A private schema registry and pool, so registrations here don't touch foodapp.db's."""
+    for name in ("_pools", "_schemas", "_table_setups"):
+        monkeypatch.setattr(database, name, {})
+    monkeypatch.setattr(database, "_tables_changed", set())
+    path = str(tmp_path / "schema.db")
+    yield path
+    database.get_pool(path).close()
+
+
+def indexes(path):
+    with database.connection(path) as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")]
+
+
+def test_on_tables_setups_catch_up_with_tables_registered_later(registry):
+    runs = []
+
+    def index_widgets(conn):  # like ingredient_search: only acts on tables that exist
+        runs.append(1)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name='widgets'").fetchone():
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_widgets_name ON widgets (name)")
+
+    database.register_schema(index_widgets, registry, on_tables=True)  # imported first
+    assert indexes(registry) == [] and len(runs) == 1
+    database.register_schema(lambda conn: conn.execute("CREATE TABLE widgets (name TEXT)"), registry)
+    assert indexes(registry) == ["idx_widgets_name"] and len(runs) == 2
+    indexes(registry)
+    assert len(runs) == 2  # nothing new registered, nothing runs again
+
+
+def test_a_failed_on_tables_setup_runs_again(registry):
+    calls = []
+
+    def flaky(conn):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+
+    database.register_schema(flaky, registry, on_tables=True)
+    with pytest.raises(sqlite3.OperationalError):
+        database.ensure_schema(registry)
+    database.ensure_schema(registry)
+    database.ensure_schema(registry)
+    assert len(calls) == 2
+
+
+def test_personal_input_uses_the_shared_food_db():
+    import personal_input
+    import recipe_maker
+
+    assert personal_input.DB_NAME == database.FOOD_DB
+    with database.connection() as conn:
+        conn.execute("INSERT OR IGNORE INTO food_category (name) VALUES ('Fruit')")
+    user_id = 90417
+    assert recipe_maker.get_user_foods(user_id) == []  # now cached as empty
+
+    client = personal_input.app.test_client()
+    expires = time.strftime("%Y-%m-%d", time.localtime(time.time() + 5 * 86400))
+    try:
+        response = client.post("/add_ingredient", json={
+            "user_id": user_id, "name": "Quillfig", "category": "Fruit", "expiration_date": expires})
+        assert response.get_json() == {"success": True}
+        assert client.get(f"/my_foods?user_id={user_id}").get_json() == [
+            {"name": "Quillfig", "category": "Fruit", "expiration_date": expires}]
+        assert [name for name, _, _ in recipe_maker.get_user_foods(user_id)] == ["Quillfig"]  # cache refreshed
+    finally:
+        with database.connection() as conn:
+            conn.execute("DELETE FROM user_food WHERE user_id = ?", (user_id,))
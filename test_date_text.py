@@ -0,0 +1,158 @@
+"""
+Property tests for the expiration-text parser. Each property is checked
+over a generated corpus (a seeded random.Random, so failures reproduce)
+of dates and durations written the ways labels and the model write them:
+
+    python -m pytest -q test_date_text.py
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import date_text  # noqa: E402
+
+TODAY = datetime(2025, 10, 1, 15, 30)
+CASES = 300
+PREFIXES = ["", "Best by ", "BEST BEFORE: ", "Use by ", "exp ", "Expires ", "Sell by: ", "Labeled: "]
+SUFFIXES = ["", ".", " (printed on lid)", " approx", "!"]
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+WORDS = {1: "one", 2: "two", 3: "three", 4: "four", 5: "five", 6: "six", 7: "seven",
+         8: "eight", 9: "nine", 10: "ten", 11: "eleven", 12: "twelve"}
+
+
+def corpus(seed):
+    rng = random.Random(seed)
+    return rng, range(CASES)
+
+
+def random_date(rng):
+    return datetime(2024, 1, 1) + timedelta(days=rng.randrange(0, 4 * 365))
+
+
+def month_name(rng, month):
+    name = MONTH_NAMES[month - 1]
+    return rng.choice([name, name[:3], name[:3] + ".", name.upper(), name.lower()])
+
+
+def wrap(rng, text):
+    return rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+
+
+def check(text, kind, date):
+    parsed = date_text.parse(text, TODAY)
+    assert parsed is not None, text
+    assert (parsed["kind"], parsed["date"]) == (kind, date), text
+    assert parsed["days"] == (date.date() - TODAY.date()).days
+    assert 0 < parsed["confidence"] <= 1
+    assert parsed["match"].lower() in text.lower()
+    return parsed
+
+
+def test_iso_dates_round_trip():
+    rng, cases = corpus(1)
+    for _ in cases:
+        date = random_date(rng)
+        sep = rng.choice("-/.")
+        text = wrap(rng, f"{date.year}{sep}{date.month:0{rng.choice([1, 2])}d}{sep}{date.day:02d}")
+        assert check(text, "iso", date)["confidence"] == 0.95
+
+
+def test_numeric_dates_resolve_us_and_eu_order():
+    rng, cases = corpus(2)
+    for _ in cases:
+        date = random_date(rng)
+        sep = rng.choice("/-.")
+        year = rng.choice([str(date.year), f"{date.year % 100:02d}"])
+        us, eu = f"{date.month:02d}{sep}{date.day:02d}{sep}{year}", f"{date.day:02d}{sep}{date.month:02d}{sep}{year}"
+        parsed = check(wrap(rng, us), "numeric", date)
+        if date.day > 12:
+            # Unambiguous either way round
+            check(wrap(rng, eu), "numeric", date)
+            assert parsed["confidence"] == 0.9
+        elif date.day != date.month:
+            assert parsed["confidence"] < 0.9  # could have been day-first
+
+
+def test_month_name_dates_with_a_year():
+    rng, cases = corpus(3)
+    for _ in cases:
+        date = random_date(rng)
+        month = month_name(rng, date.month)
+        day = rng.choice([str(date.day), f"{date.day}{'th' if 4 <= date.day <= 20 else ''}"])
+        if rng.random() < 0.5:
+            check(wrap(rng, f"{month} {day}, {date.year}"), "month_day", date)
+        else:
+            check(wrap(rng, f"{day} {rng.choice(['', 'of '])}{month} {date.year}"), "day_month", date)
+
+
+def test_month_name_dates_without_a_year_are_never_long_past():
+    rng, cases = corpus(4)
+    for _ in cases:
+        date = random_date(rng)
+        parsed = date_text.parse(wrap(rng, f"{month_name(rng, date.month)} {date.day}"), TODAY)
+        if parsed is None:
+            assert (date.month, date.day) == (2, 29)  # only exists in some years
+            continue
+        assert (parsed["date"].month, parsed["date"].day) == (date.month, date.day)
+        assert -date_text.ROLLOVER_DAYS <= parsed["days"] <= 366
+        assert parsed["confidence"] == 0.8
+
+
+def test_durations_add_to_today():
+    rng, cases = corpus(5)
+    for _ in cases:
+        n = rng.randint(1, 12)
+        unit = rng.choice(list(date_text.UNIT_DAYS))
+        count = rng.choice([str(n), WORDS[n]] + (["a"] if n == 1 else []))
+        text = wrap(rng, f"{count} {unit}{'s' if n > 1 or rng.random() < 0.5 else ''}")
+        check(text, "duration", TODAY + timedelta(days=n * date_text.UNIT_DAYS[unit]))
+
+
+def test_ranges_use_the_midpoint():
+    rng, cases = corpus(6)
+    for _ in cases:
+        low, high = sorted(rng.sample(range(1, 31), 2))
+        unit = rng.choice(["day", "week"])
+        text = wrap(rng, f"{low}{rng.choice(['-', ' - ', '–', ' to '])}{high} {unit}s")
+        parsed = check(text, "range", TODAY + timedelta(days=(low + high) // 2 * date_text.UNIT_DAYS[unit]))
+        assert parsed["confidence"] < 0.85  # less sure than a single figure
+
+
+@pytest.mark.parametrize("text, days, sure", [
+    ("today", 0, True),
+    ("Eat TONIGHT", 0, True),
+    ("tomorrow", 1, True),
+    ("the day after tomorrow", 2, True),
+    ("next week", 7, False),
+    ("within a few days", 3, False),
+    ("a couple of days", 2, False),
+])
+def test_relative_phrases(text, days, sure):
+    parsed = check(text, "relative", TODAY + timedelta(days=days))
+    assert (parsed["confidence"] >= 0.9) == sure
+
+
+def test_the_leftmost_form_wins():
+    assert date_text.parse("2025-10-05 (7 days)", TODAY)["kind"] == "iso"
+    assert date_text.parse("7 days (2025-10-05)", TODAY)["kind"] == "duration"
+
+
+def test_impossible_dates_fall_through_to_the_next_match():
+    parsed = date_text.parse("2025-02-30, or about 3 days", TODAY)
+    assert (parsed["kind"], parsed["days"]) == ("duration", 3)
+
+
+def test_text_without_dates_is_none():
+    rng, cases = corpus(7)
+    alphabet = "bcfghijklnpqruvxz   ,.:;!()"  # can't spell a month, unit or number
+    for _ in cases:
+        noise = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert date_text.parse(noise, TODAY) is None, noise
+    for text in [None, "", "unknown", "N/A", "no label visible", "market fresh", "marinated", "1999-01-01"]:
+        assert date_text.parse(text, TODAY) is None, text
@@ -0,0 +1,130 @@
+"""
+Tests for the day's expiry cache (backend/expiry_cache.py): hits and
+misses, invalidation while a load is in flight, and midnight rollover:
+
+    python -m pytest -q test_expiry_cache.py
+"""
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import expiry_cache  # noqa: E402
+
+
+@pytest.fixture
+def cache():
+    return expiry_cache.ExpiryCache()
+
+
+class Clock:
+    """Stands in for expiry_cache.datetime, so a test can move past midnight."""
+
+    def __init__(self, now):
+        self.current = now
+
+    def now(self):
+        return self.current
+
+
+def counting_loader(value):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return value
+    return load, calls
+
+
+def test_hit_after_miss(cache):
+    load, calls = counting_loader(["milk"])
+    assert cache.get_or_load("food", (True, None), load) == ["milk"]
+    assert cache.get_or_load("food", (True, None), load) == ["milk"]
+    assert len(calls) == 1
+    cache.get_or_load("food", (False, None), load)  # other options, other entry
+    cache.get_or_load("user:1", (True, None), load)  # other inventory, other entry
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3 and cache.stats()["entries"] == 3
+
+
+def test_invalidate_one_inventory_or_all(cache):
+    load, calls = counting_loader([])
+    cache.get_or_load("food", 1, load)
+    cache.get_or_load("user:1", 1, load)
+
+    cache.invalidate("food")
+    cache.get_or_load("user:1", 1, load)  # untouched
+    assert len(calls) == 2
+    cache.get_or_load("food", 1, load)
+    assert len(calls) == 3
+
+    cache.invalidate()
+    cache.get_or_load("food", 1, load)
+    cache.get_or_load("user:1", 1, load)
+    assert len(calls) == 5 and cache.stats()["invalidations"] == 2
+
+
+@pytest.mark.parametrize("inventory", ["food", None])
+def test_a_write_during_a_load_is_not_cached_over(cache, inventory):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_stale_load():
+        started.set()
+        release.wait(5)
+        return ["stale"]
+
+    results = []
+    loader = threading.Thread(target=lambda: results.append(cache.get_or_load("food", 1, slow_stale_load)))
+    loader.start()
+    started.wait(5)
+    cache.invalidate(inventory)  # a writer commits while the rebuild is reading
+    release.set()
+    loader.join()
+
+    assert results == [["stale"]]  # the caller still gets its answer
+    assert cache.get_or_load("food", 1, lambda: ["fresh"]) == ["fresh"]  # but it wasn't stored
+
+
+def test_another_inventorys_write_does_not_discard_a_load(cache):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_load():
+        started.set()
+        release.wait(5)
+        return ["milk"]
+
+    loader = threading.Thread(target=lambda: cache.get_or_load("food", 1, slow_load))
+    loader.start()
+    started.wait(5)
+    cache.invalidate("user:7")
+    release.set()
+    loader.join()
+    assert cache.get_or_load("food", 1, lambda: ["reloaded"]) == ["milk"]
+
+
+def test_midnight_rolls_everything_over(cache, monkeypatch):
+    clock = Clock(datetime(2026, 3, 1, 23, 59, 59))
+    monkeypatch.setattr(expiry_cache, "datetime", clock)
+    assert cache.get_or_load("food", 1, lambda: ["2 days left"]) == ["2 days left"]
+    assert cache.get_or_load("food", 1, lambda: ["unused"]) == ["2 days left"]
+
+    clock.current = datetime(2026, 3, 2, 0, 0, 1)
+    assert cache.get_or_load("food", 1, lambda: ["1 day left"]) == ["1 day left"]
+    assert cache.stats()["rollovers"] == 1 and cache.stats()["day"] == "2026-03-02"
+
+
+def test_a_load_that_straddles_midnight_is_not_stored(cache, monkeypatch):
+    clock = Clock(datetime(2026, 3, 1, 23, 59, 59))
+    monkeypatch.setattr(expiry_cache, "datetime", clock)
+
+    def load_then_midnight():
+        clock.current = datetime(2026, 3, 2, 0, 0, 1)
+        cache.get_or_load("user:1", 1, list)  # the next lookup rolls the day over
+        return ["yesterday's view"]
+
+    assert cache.get_or_load("food", 1, load_then_midnight) == ["yesterday's view"]
+    assert cache.get_or_load("food", 1, lambda: ["today's view"]) == ["today's view"]
@@ -0,0 +1,93 @@
+"""
+Tests for photo preparation before the model call (backend/image_prep.py):
+downscaling to MAX_EDGE, EXIF orientation, metadata stripping, transparency
+and the pass-through of photos that need nothing done:
+
+    python -m pytest -q test_image_prep.py
+"""
+import io
+import os
+import sys
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import image_prep  # noqa: E402
+
+ORIENTATION = 0x0112
+
+
+def encode(im, fmt="JPEG", **params):
+    buf = io.BytesIO()
+    im.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def decode(blob):
+    return Image.open(io.BytesIO(blob["data"]))
+
+
+def exif_with(orientation):
+    exif = Image.Exif()
+    exif[ORIENTATION] = orientation
+    return exif
+
+
+def test_large_photo_is_downscaled_to_max_edge():
+    data = encode(Image.new("RGB", (4000, 3000), (120, 80, 40)))
+    blob, report = image_prep.prepare_image(data, max_edge=1000)
+    im = decode(blob)
+    assert max(im.size) == 1000 and im.size == (1000, 750)
+    assert blob["mime_type"] == "image/jpeg" and im.format == "JPEG"
+    assert report["size_before"] == [4000, 3000] and report["size_after"] == [1000, 750]
+    assert report["bytes_before"] == len(data) and report["bytes_after"] == len(blob["data"])
+
+
+def test_exif_orientation_is_applied():
+    im = Image.new("RGB", (300, 100), (255, 0, 0))
+    im.paste((0, 0, 255), (0, 0, 30, 100))  # a blue band on the left
+    blob, report = image_prep.prepare_image(encode(im, exif=exif_with(6)))  # "rotate 90 CW to view"
+    upright = decode(blob)
+    assert upright.size == (100, 300)
+    red, green, blue = upright.convert("RGB").getpixel((50, 10))
+    assert blue > 200 and red < 60  # the left band is now on top
+    assert report["size_after"] == [100, 300]
+
+
+def test_metadata_is_stripped():
+    data = encode(Image.new("RGB", (200, 200), (9, 9, 9)), exif=exif_with(1), icc_profile=b"\0" * 128)
+    blob, _ = image_prep.prepare_image(data)
+    im = decode(blob)
+    assert "exif" not in im.info and "icc_profile" not in im.info
+    assert ORIENTATION not in im.getexif()
+
+
+def test_small_clean_jpeg_passes_through_untouched():
+    data = encode(Image.new("RGB", (640, 480), (10, 200, 30)))
+    blob, report = image_prep.prepare_image(data)
+    assert blob["data"] == data and "encode" not in report["timings_ms"]
+    stream = io.BytesIO(data)
+    assert image_prep.prepare_image(stream)[0]["data"] == data  # file objects too
+
+
+def test_small_png_is_still_converted():
+    blob, _ = image_prep.prepare_image(encode(Image.new("RGB", (64, 64), (1, 2, 3)), "PNG"))
+    assert decode(blob).format == "JPEG"
+
+
+def test_transparency_is_composited_onto_white():
+    rgba = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+    rgba.paste((200, 0, 0, 255), (0, 0, 32, 64))
+    im = decode(image_prep.prepare_image(encode(rgba, "PNG"))[0])
+    assert im.mode == "RGB"
+    assert all(channel > 240 for channel in im.getpixel((48, 32)))  # the clear half is white
+    assert im.getpixel((16, 32))[0] > 180  # the opaque half keeps its colour
+
+    palette = Image.new("P", (64, 64), 0)
+    palette.putpalette([0, 0, 0] + [0, 200, 0] + [0] * 762)
+    palette.paste(1, (0, 0, 32, 64))
+    data = encode(palette, "PNG", transparency=0)
+    im = decode(image_prep.prepare_image(data)[0])
+    assert all(channel > 240 for channel in im.getpixel((48, 32)))
+    assert im.getpixel((16, 32))[1] > 150
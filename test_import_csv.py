@@ -0,0 +1,102 @@
+"""
+Tests for the streamed catalog import (import_csv.py): chunking, resume
+after an interrupted run, upsert of duplicates and skipped-row counting,
+against a throwaway database:
+
+    python -m pytest -q test_import_csv.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import import_csv  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "catalog.db")
+
+
+def write_csv(tmp_path, rows, name="catalog.csv"):
+    path = tmp_path / name
+    path.write_text("name,default_expire_days\n" + "".join(f"{n},{d}\n" for n, d in rows), encoding="utf-8")
+    return str(path)
+
+
+def catalog(db):
+    with database.connection(db) as conn:
+        return dict(conn.execute("SELECT name, default_expire_days FROM food_catalog").fetchall())
+
+
+def test_chunks_are_committed_with_their_progress(tmp_path, db):
+    path = write_csv(tmp_path, [(f"Item {i}", i) for i in range(25)])
+    result = import_csv.import_catalog(path, db, chunk_size=10, quiet=True)
+
+    assert (result["read"], result["imported"], result["skipped"]) == (25, 25, 0)
+    assert len(catalog(db)) == 25 and catalog(db)["item 7"] == 7
+    with database.connection(db) as conn:
+        assert conn.execute("SELECT rows_done FROM catalog_imports").fetchone()[0] == 25
+
+
+def test_unusable_rows_are_skipped_and_counted(tmp_path, db):
+    rows = [("Apple", 14), ("", 5), ("Inf cheese", "inf"), ("Huge ham", "1e400"), ("Nan nut", "nan"),
+            ("Old oats", -3), ("Ancient ale", 10 ** 6), ("Bread", "abc"), ("  Soft   Tofu ", "4.7")]
+    result = import_csv.import_catalog(write_csv(tmp_path, rows), db, chunk_size=4, quiet=True)
+
+    assert (result["read"], result["imported"], result["skipped"]) == (9, 2, 7)
+    assert catalog(db) == {"apple": 14, "soft tofu": 4}
+
+
+def test_bad_ndjson_lines_are_skipped(tmp_path, db):
+    path = tmp_path / "catalog.ndjson"
+    path.write_text("\n".join([json.dumps({"name": "Kale", "default_expire_days": 5}), "{not json", "[1, 2]",
+                               json.dumps({"name": "Leek", "default_expire_days": 1e400})]), encoding="utf-8")
+    result = import_csv.import_catalog(str(path), db, quiet=True)
+    assert (result["imported"], result["skipped"]) == (1, 3)
+    assert catalog(db) == {"kale": 5}
+
+
+def test_the_last_row_for_a_name_wins(tmp_path, db):
+    path = write_csv(tmp_path, [("Milk", 7), ("Eggs", 21), ("milk ", 10)])
+    import_csv.import_catalog(path, db, chunk_size=2, quiet=True)
+    assert catalog(db) == {"milk": 10, "eggs": 21}
+
+    # Re-importing updates what an earlier import stored
+    import_csv.import_catalog(write_csv(tmp_path, [("Eggs", 28)], "update.csv"), db, quiet=True)
+    assert catalog(db) == {"milk": 10, "eggs": 28}
+
+
+def test_an_interrupted_import_resumes_after_the_last_committed_chunk(tmp_path, db, monkeypatch):
+    path = write_csv(tmp_path, [(f"Item {i}", i) for i in range(30)])
+    clean_row = import_csv.clean_row
+
+    def crash_at_row_17(name, days):
+        if name == "Item 17":
+            raise KeyboardInterrupt
+        return clean_row(name, days)
+
+    monkeypatch.setattr(import_csv, "clean_row", crash_at_row_17)
+    with pytest.raises(KeyboardInterrupt):
+        import_csv.import_catalog(path, db, chunk_size=10, quiet=True)
+    assert len(catalog(db)) == 10  # the chunk with row 17 was never committed
+
+    monkeypatch.setattr(import_csv, "clean_row", clean_row)
+    result = import_csv.import_catalog(path, db, chunk_size=10, resume=True, quiet=True)
+    assert result["resumed_from"] == 10 and result["read"] == 20
+    assert len(catalog(db)) == 30
+
+
+def test_resume_starts_over_when_the_file_changed(tmp_path, db):
+    path = write_csv(tmp_path, [(f"Item {i}", i) for i in range(5)])
+    import_csv.import_catalog(path, db, quiet=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("Extra item,3\n")
+    os.utime(path, (1, 1))  # a different fingerprint even within the same second
+
+    result = import_csv.import_catalog(path, db, resume=True, quiet=True)
+    assert result["resumed_from"] == 0 and result["read"] == 6
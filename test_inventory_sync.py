@@ -0,0 +1,105 @@
+"""
+Tests for inventory change tracking (backend/inventory_sync.py): ETags and
+304s on the inventory endpoints, the `since` delta feed, and pruning of the
+change log:
+
+    python -m pytest -q test_inventory_sync.py
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import food_data  # noqa: E402
+import inventory_sync  # noqa: E402
+
+NAMES = ["Wexlo melon", "Wexlo cress", "Wexlo curd"]
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    yield
+    with database.connection() as conn:
+        conn.executemany("DELETE FROM food WHERE name = ?", [(name,) for name in NAMES])
+
+
+@pytest.fixture
+def client():
+    import server
+    return server.app.test_client()
+
+
+def test_unchanged_inventory_answers_304(client):
+    food_data.add_food(NAMES[0], 5, "Fruit")
+    first = client.get("/all-ingredients")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    again = client.get("/all-ingredients", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    # Another URL is another representation
+    other = client.get("/all-ingredients?fields=name", headers={"If-None-Match": first.headers["ETag"]})
+    assert other.status_code == 200
+
+
+def test_a_write_changes_the_etag(client):
+    etag = client.get("/expiring-ingredients").headers["ETag"]
+    food_data.add_food(NAMES[1], 2, "Vegetable")
+    fresh = client.get("/expiring-ingredients", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+    assert NAMES[1] in [item["name"] for item in fresh.get_json()]
+
+
+def test_delta_feed_since_a_version(client):
+    since = inventory_sync.current_version()
+    food_data.add_food(NAMES[0], 5, "Fruit")
+    food_data.add_food(NAMES[1], 2, "Vegetable")
+    food_data.delete_food(NAMES[0])
+
+    body = client.get(f"/inventory/changes?since={since}").get_json()
+    assert [(c["op"], c["name"]) for c in body["changes"]] == [
+        ("insert", NAMES[0]), ("insert", NAMES[1]), ("delete", NAMES[0])]
+    assert body["version"] == body["changes"][-1]["seq"] == inventory_sync.current_version()
+    assert not body["has_more"] and not body["reset"]
+    assert body["changes"][1]["category"] == "Vegetable" and body["changes"][1]["expiration"]
+
+    page = inventory_sync.changes_since("food", since, limit=2)
+    assert len(page["changes"]) == 2 and page["has_more"]
+    rest = inventory_sync.changes_since("food", page["changes"][-1]["seq"], limit=2)
+    assert [c["op"] for c in rest["changes"]] == ["delete"] and not rest["has_more"]
+
+    assert client.get(f"/inventory/changes?since={body['version']}").get_json()["changes"] == []
+
+
+def test_writes_prune_the_log_and_old_clients_reset(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "changes.db"))
+    inventory_sync.ensure_change_log(conn)
+    insert = "INSERT INTO inventory_changes (seq, inventory, op) VALUES (?, 'food', 'insert')"
+    conn.execute(insert, (1,))
+    conn.execute(insert, (inventory_sync.PRUNE_EVERY - 1,))
+    assert conn.execute("SELECT COUNT(*) FROM inventory_changes").fetchone()[0] == 2  # not a prune point
+
+    last = inventory_sync.KEEP_CHANGES + inventory_sync.PRUNE_EVERY
+    conn.execute(insert, (last,))
+    seqs = [row[0] for row in conn.execute("SELECT seq FROM inventory_changes")]
+    assert seqs == [last]  # everything more than KEEP_CHANGES behind it went
+    conn.close()
+
+
+def test_prune_changes_resets_clients_behind_the_log():
+    since = inventory_sync.current_version()
+    food_data.add_food(NAMES[0], 5, "Fruit")
+    food_data.add_food(NAMES[1], 5, "Fruit")
+    food_data.add_food(NAMES[2], 5, "Fruit")
+    assert not inventory_sync.changes_since("food", since)["reset"]
+
+    inventory_sync.prune_changes(keep=1)
+    behind = inventory_sync.changes_since("food", since)
+    assert behind["reset"] and [c["name"] for c in behind["changes"]] == [NAMES[2]]
+    current = inventory_sync.changes_since("food", inventory_sync.current_version() - 1)
+    assert not current["reset"]
@@ -0,0 +1,113 @@
+"""
+Tests for lazy start-up: importing the server touches no database and no
+model SDK, tables are created once on first use (backend/database.py
+register_schema / ensure_schema / bootstrap), and the Gemini clients are
+created once, on first use:
+
+    python -m pytest -q test_lazy_init.py
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import scanner  # noqa: E402
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_importing_the_server_has_no_side_effects(tmp_path):
+    env = dict(os.environ,
+               EXPIREASE_FOOD_DB=str(tmp_path / "foodapp.db"),
+               EXPIREASE_USER_DB=str(tmp_path / "users.db"))
+    probe = (
+        "import sys; import server, recipe_maker, user_info, user_login; "
+        "print('google.generativeai' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "False"
+    assert os.listdir(tmp_path) == []
+
+
+def test_schema_setups_run_once_before_first_use(tmp_path):
+    path = str(tmp_path / "lazy.db")
+    calls = []
+
+    def setup(conn):
+        calls.append(threading.get_ident())
+        time.sleep(0.05)  # let the other threads pile up behind it
+        conn.execute("CREATE TABLE IF NOT EXISTS widgets (name TEXT)")
+
+    database.register_schema(setup, path)
+    assert not os.path.exists(path)
+
+    counts = []
+
+    def use():
+        with database.connection(path) as conn:
+            counts.append(conn.execute("SELECT COUNT(*) FROM widgets").fetchone()[0])
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and counts == [0] * 8
+    database.bootstrap()  # nothing left to do
+    assert len(calls) == 1
+
+
+def test_a_failed_setup_is_retried(tmp_path):
+    path = str(tmp_path / "retry.db")
+    attempts = []
+
+    def setup(conn):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("disk full")
+        conn.execute("CREATE TABLE IF NOT EXISTS widgets (name TEXT)")
+
+    database.register_schema(setup, path)
+    try:
+        database.bootstrap()
+    except RuntimeError:
+        pass
+    with database.connection(path) as conn:
+        conn.execute("INSERT INTO widgets VALUES ('ok')")
+    assert len(attempts) == 2
+
+
+def test_scanner_model_is_created_once(monkeypatch):
+    created = []
+
+    def load():
+        created.append(1)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(scanner, "model", None)
+    monkeypatch.setattr(scanner, "_model_loaded", False)
+    monkeypatch.setattr(scanner, "_load_model", load)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(scanner.get_model())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1 and len({id(model) for model in models}) == 1
+
+
+def test_missing_api_key_is_only_checked_once(monkeypatch):
+    created = []
+    monkeypatch.setattr(scanner, "model", None)
+    monkeypatch.setattr(scanner, "_model_loaded", False)
+    monkeypatch.setattr(scanner, "_load_model", lambda: created.append(1))
+    assert scanner.get_model() is None and scanner.get_model() is None
+    assert len(created) == 1
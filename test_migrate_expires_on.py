@@ -0,0 +1,64 @@
+"""
+Tests for the expires_on migration (backend/migrate_expires_on.py) on a
+database created before the column existed, both directly and through
+recipe_maker, which imports neither food_data nor user_info:
+
+    python -m pytest -q test_migrate_expires_on.py
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import migrate_expires_on  # noqa: E402
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """A foodapp.db with the food and user_food tables as they were before expires_on."""
+    path = str(tmp_path / "foodapp.db")
+    today = datetime.now().strftime("%Y-%m-%d")
+    last_week = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE food (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, date_added TEXT,
+                           expire_days INTEGER, category TEXT);
+        CREATE TABLE user_food (user_id INTEGER, food_name TEXT, date_added TEXT,
+                                expire_days INTEGER, nutrition TEXT);
+    """)
+    conn.executemany("INSERT INTO food (name, date_added, expire_days, category) VALUES (?, ?, ?, ?)",
+                     [("Milk", today, 2, "Dairy"), ("Rice", today, 30, "Grain"), ("Old bread", last_week, 3, "Bakery")])
+    conn.execute("INSERT INTO user_food VALUES (7, 'Yogurt', ?, 5, '')", (today,))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migrate_adds_backfills_and_indexes(old_db):
+    conn = sqlite3.connect(old_db)
+    migrate_expires_on.migrate(conn)
+    migrate_expires_on.migrate(conn)  # safe to run again
+    rows = dict(conn.execute("SELECT name, expires_on FROM food"))
+    in_days = lambda n: (datetime.now() + timedelta(days=n)).strftime("%Y-%m-%d")  # noqa: E731
+    assert rows["Milk"] == in_days(2) and rows["Rice"] == in_days(30) and rows["Old bread"] == in_days(-4)
+    assert conn.execute("SELECT expires_on FROM user_food").fetchone()[0] == in_days(5)
+    indexes = {row[1] for row in conn.execute("SELECT type, name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_food_expires_on", "idx_user_food_user_expires_on"} <= indexes
+    conn.close()
+
+
+def test_recipe_maker_migrates_an_old_database(old_db):
+    env = dict(os.environ, EXPIREASE_FOOD_DB=old_db)
+    probe = "import recipe_maker; print(recipe_maker.get_user_foods()); print(recipe_maker.get_user_foods(7))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    general, user = result.stdout.strip().splitlines()[-2:]
+    assert general == "[('Milk', 1, 'Dairy'), ('Rice', 29, 'Grain')]"
+    assert user == "[('Yogurt', 4, '')]"
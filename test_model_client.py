@@ -0,0 +1,155 @@
+"""
+Tests for the model clients (backend/model_client.py): the in-process fake,
+the HTTP stub in fake_gemini.py, record/replay fixtures, and the scanner and
+recipe paths running on them without the live API:
+
+    python -m pytest -q test_model_client.py
+"""
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import model_client  # noqa: E402
+import model_policy  # noqa: E402
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+import scan_cache  # noqa: E402
+import scanner  # noqa: E402
+from fake_gemini import FakeGemini  # noqa: E402
+
+FOODS = [("Spinach", 1, "Vegetable"), ("Eggs", 2, "Dairy"), ("Rice", 30, "Grain")]
+
+
+def png(colour):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (colour, 9, 9)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def text_of(result):
+    return "".join(chunk.text for chunk in result) if hasattr(result, "__iter__") else result.text
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    recipe_cache.clear()
+    scan_cache.clear()
+    model_policy.reset()
+
+
+def test_latency_distributions():
+    rng = random.Random(1)
+    assert model_client.latency_sampler("0.25")() == 0.25
+    uniform = [model_client.latency_sampler("uniform:0.1,0.2", rng)() for _ in range(200)]
+    assert 0.1 <= min(uniform) and max(uniform) <= 0.2
+    tail = [model_client.latency_sampler("lognormal:0.5,0.8", rng)() for _ in range(2000)]
+    assert 0.4 < statistics.median(tail) < 0.6 and max(tail) > 3 * statistics.median(tail)
+    spikes = [model_client.latency_sampler("spike:0.1,5,0.1", rng)() for _ in range(1000)]
+    assert set(spikes) == {0.1, 5.0} and 50 < spikes.count(5.0) < 150
+    with pytest.raises(ValueError):
+        model_client.latency_sampler("gamma:1,2")
+
+
+def test_fake_answers_errors_and_blocks():
+    fake = model_client.FakeModel("recipe", responses=["first " * 30, "second " * 30], seed=3)
+    assert text_of(fake.generate_content("prompt")).startswith("first")
+    assert text_of(fake.generate_content("prompt", stream=True)).startswith("second")
+    assert len(list(fake.generate_content("prompt", stream=True))) > 1  # streamed in chunks
+
+    with pytest.raises(model_client.ModelError):
+        model_client.FakeModel(error_rate=1.0).generate_content("prompt")
+    blocked = model_client.FakeModel(blocked_rate=1.0).generate_content("prompt")
+    assert blocked.candidates[0].finish_reason == model_client.SAFETY and not blocked.text
+
+
+def test_fake_times_out_at_the_request_timeout():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        model_client.FakeModel(latency="5").generate_content("prompt", request_options={"timeout": 0.1})
+    assert time.monotonic() - start < 1
+
+
+def test_load_picks_the_client(monkeypatch):
+    monkeypatch.setattr(model_client, "CLIENT", "fake")
+    assert isinstance(model_client.load("recipe", lambda: pytest.fail("no real model")), model_client.FakeModel)
+    monkeypatch.setattr(model_client, "CLIENT", "stub")
+    assert isinstance(model_client.load("scanner", lambda: None), model_client.HttpModel)
+    monkeypatch.setattr(model_client, "CLIENT", "gemini")
+    assert model_client.load("recipe", lambda: None) is None  # no API key
+    assert isinstance(model_client.load("recipe", lambda: object()), model_client.GeminiClient)
+
+
+def test_recipes_and_scans_run_on_the_fake(monkeypatch):
+    monkeypatch.setattr(model_client, "CLIENT", "fake")
+    for module in (recipe_maker, scanner):
+        monkeypatch.setattr(module, "model", None)
+        monkeypatch.setattr(module, "_model_loaded", False)
+
+    assert recipe_maker.make_recipe(FOODS) == model_client.CANNED["recipe"][0]
+    events = list(recipe_maker.stream_recipe(FOODS, "large"))
+    assert events[-1]["source"] == "ai" and events[-1]["recipe"] == model_client.CANNED["recipe"][0]
+    items = scanner.analyze_image(png(211), save=False)
+    assert [item["item"] for item in items] == ["Milk", "Apple", "Spinach"]
+
+
+def test_http_stub_serves_the_rest_api():
+    with FakeGemini(latency="0.01", responses={"recipe": ["stubbed recipe " * 20]}) as stub:
+        client = model_client.HttpModel("recipe", stub.url)
+        answer = client.generate_content("prompt", request_options={"timeout": 5})
+        assert answer.text == "stubbed recipe " * 20 and answer.candidates[0].finish_reason == 1
+        chunks = list(client.generate_content(["prompt", {"mime_type": "image/png", "data": png(9)}], stream=True))
+        assert len(chunks) > 1 and "".join(c.text for c in chunks) == "stubbed recipe " * 20
+        assert chunks[-1].candidates[0].finish_reason == 1
+        assert stub.hits == 2
+
+
+def test_http_stub_errors_and_timeouts():
+    with FakeGemini(error_rate=1.0) as stub:
+        with pytest.raises(model_client.ModelError):
+            model_client.HttpModel("recipe", stub.url).generate_content("prompt")
+        with pytest.raises(model_client.ModelError):
+            list(model_client.HttpModel("recipe", stub.url).generate_content("prompt", stream=True))
+    with FakeGemini(latency="2") as stub:
+        with pytest.raises(TimeoutError):
+            model_client.HttpModel("recipe", stub.url).generate_content("prompt", request_options={"timeout": 0.2})
+
+
+def test_scanner_through_the_http_stub(monkeypatch):
+    with FakeGemini() as stub:
+        monkeypatch.setattr(scanner, "model", model_client.HttpModel("scanner", stub.url))
+        items = scanner.analyze_image(png(212), save=False)
+    assert [item["item"] for item in items] == ["Milk", "Apple", "Spinach"]
+
+
+def test_record_then_replay(tmp_path):
+    live = model_client.FakeModel("recipe", responses=lambda contents: f"answer to {contents} " * 10, latency="0.05")
+    recorder = model_client.RecordingModel(live, "recipe", str(tmp_path))
+    first = recorder.generate_content("prompt one").text
+    second = text_of(recorder.generate_content("prompt two", stream=True))
+    assert len(list(tmp_path.iterdir())) == 2
+
+    replay = model_client.ReplayModel("recipe", str(tmp_path))
+    start = time.monotonic()
+    assert replay.generate_content("prompt one").text == first
+    assert text_of(replay.generate_content("prompt two", stream=True)) == second
+    assert time.monotonic() - start < 0.05  # no recorded timing unless asked
+    other = replay.generate_content("a prompt never recorded").text
+    assert other in (first, second) and replay.generate_content("a prompt never recorded").text == other
+
+    timed = model_client.ReplayModel("recipe", str(tmp_path), timing=True)
+    start = time.monotonic()
+    timed.generate_content("prompt one")
+    assert time.monotonic() - start >= 0.04
+
+
+def test_replay_without_fixtures(tmp_path):
+    with pytest.raises(model_client.ModelError):
+        model_client.ReplayModel("scanner", str(tmp_path)).generate_content("prompt")
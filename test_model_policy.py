@@ -0,0 +1,234 @@
+"""
+Tests for the recipe model call policy (backend/model_policy.py): deadline,
+circuit breaker, hedged requests, the served-path metrics, the recipe
+routes' deadline validation and make_recipe's use of it, offline with stub models in place of Gemini:
+
+    python -m pytest -q test_model_policy.py
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import model_policy  # noqa: E402
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+
+FOODS = [("Spinach", 1, "Vegetable"), ("Eggs", 2, "Dairy"), ("Rice", 30, "Grain"), ("Onion", 10, "Vegetable")]
+RECIPE = "**Stub Recipe**\n" + "Stir and serve. " * 10
+
+
+class StubModel:
+    """Answers after `latency` seconds with `finish_reason`; raises if `fail`."""
+
+    def __init__(self, latency=0.0, finish_reason=1, fail=False):
+        self.latency = latency
+        self.finish_reason = finish_reason
+        self.fail = fail
+        self.timeouts = []
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        self.timeouts.append(request_options["timeout"])
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        candidate = SimpleNamespace(finish_reason=self.finish_reason,
+                                    content=SimpleNamespace(parts=[SimpleNamespace(text=RECIPE)]))
+        return SimpleNamespace(candidates=[candidate])
+
+
+@pytest.fixture(autouse=True)
+def fresh_policy():
+    recipe_cache.clear()
+    model_policy.reset()
+
+
+def recipe(monkeypatch, model, **kwargs):
+    monkeypatch.setattr(recipe_maker, "model", model)
+    recipe_cache.clear()  # every call asks the model
+    return recipe_maker.make_recipe(FOODS, **kwargs)
+
+
+def test_slow_model_is_given_up_at_the_deadline(monkeypatch):
+    model = StubModel(latency=1.0)
+    start = time.monotonic()
+    result = recipe(monkeypatch, model, deadline=0.2)
+
+    assert time.monotonic() - start < 0.5
+    assert result != RECIPE  # the template
+    assert model.timeouts[0] <= 0.2  # the abandoned request doesn't outlive the budget by much
+    assert model_policy.stats()["served"]["deadline"] == 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_skips_the_model(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 3)
+    failing = StubModel(fail=True)
+    for _ in range(3):
+        recipe(monkeypatch, failing)
+    assert model_policy.stats()["state"] == "open"
+
+    recipe(monkeypatch, failing)
+    assert len(failing.timeouts) == 3  # not called while open
+    stats = model_policy.stats()
+    assert stats["served"]["error"] == 3 and stats["served"]["breaker_open"] == 1 and stats["trips"] == 1
+
+
+def test_blocked_finish_reasons_count_as_failures(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 2)
+    blocked = StubModel(finish_reason=3)  # SAFETY
+    recipe(monkeypatch, blocked)
+    recipe(monkeypatch, blocked)
+    stats = model_policy.stats()
+    assert stats["served"]["blocked"] == 2 and stats["state"] == "open"
+
+
+def test_one_probe_after_the_cooldown_closes_the_breaker(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 1)
+    monkeypatch.setattr(model_policy, "BREAKER_COOLDOWN", 0.1)
+    recipe(monkeypatch, StubModel(fail=True))
+    time.sleep(0.15)
+
+    slow = StubModel(latency=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(recipe_maker.make_recipe(FOODS)))
+               for _ in range(4)]
+    monkeypatch.setattr(recipe_maker, "model", slow)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(slow.timeouts) == 1  # only the probe reached the model
+    assert model_policy.stats()["state"] == "closed"
+    assert results.count(RECIPE) == 1
+
+
+def test_a_failed_probe_reopens_the_breaker(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 1)
+    monkeypatch.setattr(model_policy, "BREAKER_COOLDOWN", 0.1)
+    recipe(monkeypatch, StubModel(fail=True))
+    time.sleep(0.15)
+    recipe(monkeypatch, StubModel(fail=True))
+    stats = model_policy.stats()
+    assert stats["state"] == "open" and stats["trips"] == 2
+
+
+def test_slow_call_is_hedged_past_the_p95(monkeypatch):
+    monkeypatch.setattr(model_policy, "HEDGE", True)
+    monkeypatch.setattr(model_policy, "HEDGE_BUDGET", 1.0)
+    for _ in range(model_policy.HEDGE_MIN_SAMPLES):
+        model_policy.call(lambda timeout: time.sleep(0.01) or "ok")
+    assert model_policy.hedge_after() < 0.05
+
+    attempts = []
+
+    def attempt(timeout):
+        attempts.append(timeout)
+        time.sleep(1.0 if len(attempts) == 1 else 0.01)  # the first request is stuck
+        return f"answer {len(attempts)}"
+
+    start = time.monotonic()
+    assert model_policy.call(attempt) == "answer 2"
+    assert time.monotonic() - start < 0.5
+    stats = model_policy.stats()
+    assert stats["hedges"] == 1 and stats["served"]["hedged"] == 1
+
+
+def test_hedging_is_off_by_default():
+    for _ in range(model_policy.HEDGE_MIN_SAMPLES):
+        model_policy.call(lambda timeout: "ok")
+    assert model_policy.hedge_after() is None
+
+
+def test_streams_respect_the_breaker(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 1)
+    recipe(monkeypatch, StubModel(fail=True))
+    events = list(recipe_maker.stream_recipe(FOODS))
+    assert events[-1]["source"] == "template"
+    assert model_policy.stats()["served"]["breaker_open"] == 1
+
+
+def test_stream_is_cut_off_at_the_deadline():
+    closed = []
+
+    def slow_chunks(timeout):
+        try:
+            for n in range(10):
+                time.sleep(0.05)
+                yield f"chunk {n}"
+        finally:
+            closed.append(timeout)
+
+    received = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for text in model_policy.stream(slow_chunks, budget=0.12):
+            received.append(text)
+    assert 1 <= len(received) < 4 and time.monotonic() - start < 0.5
+    assert closed == [0.12]  # the model stream was closed, with the budget as its timeout
+    assert model_policy.stats()["served"]["deadline"] == 1 and model_policy.stats()["consecutive_failures"] == 1
+
+
+def test_stream_with_no_budget_left_never_asks_the_model():
+    with pytest.raises(TimeoutError):
+        list(model_policy.stream(lambda timeout: pytest.fail("the model was asked"), budget=-1))
+    stats = model_policy.stats()
+    assert stats["served"]["deadline"] == 1 and stats["calls"] == 0 and stats["consecutive_failures"] == 0
+
+
+def test_stream_that_fails_to_start_during_a_probe_reopens_the_circuit(monkeypatch):
+    monkeypatch.setattr(model_policy, "BREAKER_FAILURES", 1)
+    monkeypatch.setattr(model_policy, "BREAKER_COOLDOWN", 0)
+    model_policy._policy.record("error")  # open
+    assert model_policy.stats()["state"] == "open"
+
+    def refuse(timeout):
+        raise ConnectionError("connection refused")
+
+    with pytest.raises(ConnectionError):
+        list(model_policy.stream(refuse, budget=1))  # the half-open probe
+    stats = model_policy.stats()
+    assert stats["state"] == "open" and stats["served"]["error"] == 2
+    assert model_policy.call(lambda timeout: "ok", 1) == "ok"  # the next probe is let through
+
+
+def test_stream_that_fails_to_start_is_counted():
+    def refuse(timeout):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        list(model_policy.stream(refuse, budget=1))
+    assert model_policy.stats()["served"]["error"] == 1 and model_policy.stats()["consecutive_failures"] == 1
+
+
+def test_stats_endpoint(monkeypatch):
+    import server
+    recipe(monkeypatch, StubModel())
+    stats = server.app.test_client().get("/stats/recipe-model").get_json()
+    assert stats["state"] == "closed" and stats["served"]["model"] == 1
+
+
+def test_parse_deadline():
+    assert model_policy.parse_deadline(None) is None
+    assert model_policy.parse_deadline(2.5) == 2.5 and model_policy.parse_deadline("4") == 4.0
+    assert model_policy.parse_deadline(model_policy.MODEL_TIMEOUT) == model_policy.MODEL_TIMEOUT
+    for value in ("abc", [], True, -1, 0, float("inf"), float("nan"), "inf", 10 ** 400, model_policy.MODEL_TIMEOUT + 1):
+        with pytest.raises(ValueError):
+            model_policy.parse_deadline(value)
+
+
+@pytest.mark.parametrize("route", ["/generate-recipe", "/generate-recipe/stream"])
+def test_bad_deadline_is_a_400(route):
+    import server
+    client = server.app.test_client()
+    for deadline in ("abc", -1, 0, "inf", 21):
+        response = client.post(route, json={"deadline": deadline})
+        assert response.status_code == 400 and "deadline" in response.get_json()["error"]
+    response = client.post(route, data='{"deadline": 1e400}', content_type="application/json")
+    assert response.status_code == 400
+    assert model_policy.stats()["calls"] == 0  # rejected before the model was asked
@@ -0,0 +1,116 @@
+"""
+Tests for the recipe cache (backend/recipe_cache.py) and make_recipe's use
+of it, offline with a stub model in place of Gemini:
+
+    python -m pytest -q test_recipe_cache.py
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import model_policy  # noqa: E402
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+
+FOODS = [("Spinach", 1, "Vegetable"), ("Eggs", 2, "Dairy"), ("Rice", 30, "Grain"), ("Onion", 10, "Vegetable")]
+
+
+class StubModel:
+    """Numbers its recipes, so tests can tell a fresh one from a cached one."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        text = f"**Stub Recipe {len(self.prompts)}**\n" + "Stir and serve. " * 10
+        candidate = SimpleNamespace(finish_reason=1, content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+        return SimpleNamespace(candidates=[candidate])
+
+
+@pytest.fixture
+def model(monkeypatch):
+    recipe_cache.clear()
+    model_policy.reset()
+    stub = StubModel()
+    monkeypatch.setattr(recipe_maker, "model", stub)
+    return stub
+
+
+def title(recipe):
+    return recipe.splitlines()[0]
+
+
+def test_key_ignores_order_case_and_spacing():
+    key = recipe_cache.recipe_key(["Spinach", "Eggs"], ["Spinach"], "medium", "Vegetarian ", "")
+    assert recipe_cache.recipe_key(["eggs", "  spinach"], ["SPINACH"], "Medium", "vegetarian", None) == key
+    assert recipe_cache.recipe_key(["eggs", "spinach"], ["spinach"], "large", "vegetarian", "") != key
+    assert recipe_cache.recipe_key(["eggs", "spinach", "rice"], ["spinach"], "medium", "vegetarian", "") != key
+
+
+def test_repeat_requests_are_served_from_the_cache(model):
+    first = recipe_maker.make_recipe(FOODS, "medium", "vegetarian")
+    reordered = [FOODS[2], FOODS[0], FOODS[3], FOODS[1]]
+    again = recipe_maker.make_recipe(reordered, "Medium", "Vegetarian")
+
+    assert again == first and len(model.prompts) == 1
+    recipe_maker.make_recipe(FOODS, "large", "vegetarian")  # different options: a new recipe
+    assert len(model.prompts) == 2
+    stats = recipe_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["keys"]) == (1, 2, 2)
+
+
+def test_variety_fills_a_pool_then_rotates_through_it(model):
+    recipes = [title(recipe_maker.make_recipe(FOODS, variety=3)) for _ in range(7)]
+
+    assert len(model.prompts) == 3
+    assert recipes[:3] == ["**Stub Recipe 1**", "**Stub Recipe 2**", "**Stub Recipe 3**"]
+    assert recipes[3:6] == recipes[:3]  # least recently served first
+    assert recipes[6] == recipes[0]
+
+
+def test_cached_recipe_is_served_when_the_model_fails(model, monkeypatch):
+    first = recipe_maker.make_recipe(FOODS, variety=2)
+    monkeypatch.setattr(recipe_maker, "model", StubModel(fail=True))
+    assert recipe_maker.make_recipe(FOODS, variety=2) == first  # wanted a second variant, got the one there is
+
+
+def test_template_recipes_are_not_cached(model, monkeypatch):
+    monkeypatch.setattr(recipe_maker, "model", StubModel(fail=True))
+    recipe_maker.make_recipe(FOODS)
+    assert recipe_cache.stats()["entries"] == 0
+
+    monkeypatch.setattr(recipe_maker, "model", model)
+    assert title(recipe_maker.make_recipe(FOODS)) == "**Stub Recipe 1**"
+
+
+def test_entries_expire_after_the_ttl_and_at_midnight(model, monkeypatch):
+    recipe_maker.make_recipe(FOODS)
+    with database.connection() as conn:
+        conn.execute("UPDATE recipe_cache SET recipe_day = '2000-01-01'")
+    recipe_maker.make_recipe(FOODS)
+    assert len(model.prompts) == 2
+
+    monkeypatch.setattr(recipe_cache, "TTL_SECONDS", 0)
+    time.sleep(0.01)
+    recipe_maker.make_recipe(FOODS)
+    assert len(model.prompts) == 3
+
+
+def test_least_recently_used_recipes_are_evicted(model, monkeypatch):
+    monkeypatch.setattr(recipe_cache, "MAX_ENTRIES", 2)
+    for size in ("small", "medium", "large"):
+        recipe_maker.make_recipe(FOODS, size)
+    assert recipe_cache.stats()["entries"] == 2
+
+    recipe_maker.make_recipe(FOODS, "small")  # the oldest was evicted
+    assert len(model.prompts) == 4
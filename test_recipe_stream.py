@@ -0,0 +1,155 @@
+"""
+Tests for streamed recipe generation (recipe_maker.stream_recipe and
+POST /generate-recipe/stream), offline with a stub streaming model in place
+of Gemini:
+
+    python -m pytest -q test_recipe_stream.py
+"""
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import model_policy  # noqa: E402
+import recipe_cache  # noqa: E402
+import recipe_maker  # noqa: E402
+
+FOODS = [("Spinach", 1, "Vegetable"), ("Eggs", 2, "Dairy"), ("Rice", 30, "Grain"), ("Onion", 10, "Vegetable")]
+
+
+def chunk(text, finish_reason=0):
+    candidate = SimpleNamespace(finish_reason=finish_reason, content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+    return SimpleNamespace(candidates=[candidate])
+
+
+class StreamingModel:
+    """Sends its recipe in `pieces` chunks, `delay` seconds apart; fails after `fail_after` chunks."""
+
+    def __init__(self, pieces=4, delay=0.0, fail_after=None, finish_reason=1):
+        self.pieces = pieces
+        self.delay = delay
+        self.fail_after = fail_after
+        self.finish_reason = finish_reason
+        self.calls = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        return self._stream()
+
+    def _stream(self):
+        for n in range(self.pieces):
+            if n == self.fail_after:
+                raise RuntimeError("model unavailable")
+            time.sleep(self.delay)
+            text = "**Streamed Recipe**\n" if n == 0 else f"Step {n}: stir and simmer gently. " * 3
+            last = n == self.pieces - 1
+            yield chunk(text, self.finish_reason if last else 0)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    recipe_cache.clear()
+    model_policy.reset()
+
+
+def run(model, monkeypatch, foods=FOODS):
+    monkeypatch.setattr(recipe_maker, "model", model)
+    return list(recipe_maker.stream_recipe(foods, "medium", "vegetarian"))
+
+
+def test_chunks_are_forwarded_and_the_recipe_cached(monkeypatch):
+    model = StreamingModel()
+    events = run(model, monkeypatch)
+
+    chunks = [event["text"] for event in events if event["event"] == "chunk"]
+    assert len(chunks) == 4 and model.calls[0]["stream"] is True
+    assert events[-1] == {"event": "done", "source": "ai", "recipe": "".join(chunks)}
+    assert recipe_cache.stats()["entries"] == 1
+
+    again = run(model, monkeypatch)
+    assert len(model.calls) == 1
+    assert again[-1] == {"event": "done", "source": "cache", "recipe": "".join(chunks)}
+    assert recipe_maker.make_recipe(FOODS, "medium", "vegetarian") == "".join(chunks)  # same cache entry
+
+
+def test_template_is_streamed_when_there_is_no_model(monkeypatch):
+    monkeypatch.setattr(recipe_maker, "_model_loaded", True)
+    events = run(None, monkeypatch)
+
+    chunks = [event["text"] for event in events if event["event"] == "chunk"]
+    assert len(chunks) > 1  # a section at a time
+    assert events[-1]["source"] == "template" and events[-1]["recipe"] == "".join(chunks)
+    assert "reset" not in [event["event"] for event in events]
+    assert recipe_cache.stats()["entries"] == 0
+
+
+def test_failure_part_way_resets_to_the_template(monkeypatch):
+    events = run(StreamingModel(fail_after=2), monkeypatch)
+
+    kinds = [event["event"] for event in events]
+    assert kinds[:3] == ["chunk", "chunk", "reset"]
+    after_reset = "".join(event["text"] for event in events[3:] if event["event"] == "chunk")
+    assert events[-1]["source"] == "template" and events[-1]["recipe"] == after_reset
+    assert recipe_cache.stats()["entries"] == 0  # the half recipe was not cached
+
+
+def test_blocked_recipe_is_not_served(monkeypatch):
+    events = run(StreamingModel(finish_reason=3), monkeypatch)  # 3: SAFETY
+    assert "reset" in [event["event"] for event in events]
+    assert events[-1]["source"] == "template"
+
+
+def test_deadline_between_chunks_resets_to_the_template(monkeypatch):
+    model = StreamingModel(pieces=6, delay=0.1)
+    monkeypatch.setattr(recipe_maker, "model", model)
+    start = time.monotonic()
+    events = list(recipe_maker.stream_recipe(FOODS, "medium", "vegetarian", deadline=0.25))
+
+    assert time.monotonic() - start < 0.5  # not the 0.6 s the model would take
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "chunk" and "reset" in kinds
+    assert events[-1]["source"] == "template"
+    assert model.calls[0]["request_options"]["timeout"] <= 0.25
+    assert model_policy.stats()["served"]["deadline"] == 1
+    assert recipe_cache.stats()["entries"] == 0
+
+
+def test_no_food_items(monkeypatch):
+    events = run(StreamingModel(), monkeypatch, foods=[])
+    assert events[-1] == {"event": "done", "source": "template",
+                          "recipe": "No available food items to create a recipe."}
+
+
+def test_endpoint_sends_the_first_chunk_before_the_model_finishes(monkeypatch):
+    import server
+    monkeypatch.setattr(recipe_maker, "model", StreamingModel(pieces=5, delay=0.1))
+    monkeypatch.setattr(recipe_maker, "get_user_foods", lambda *args, **kwargs: FOODS)
+    start = time.monotonic()
+    response = server.app.test_client().post(
+        "/generate-recipe/stream?format=ndjson", json={"dietary_restrictions": "vegan"}, buffered=False,
+    )
+    assert response.mimetype == "application/x-ndjson"
+    events = [(time.monotonic() - start, json.loads(line)) for line in response.response]
+
+    assert events[0][1] == {"event": "start"} and events[0][0] < 0.1
+    first_chunk_at = next(at for at, event in events if event["event"] == "chunk")
+    assert first_chunk_at < 0.3 and events[-1][0] > 0.45
+    assert events[-1][1]["event"] == "done" and events[-1][1]["source"] == "ai"
+
+
+def test_endpoint_speaks_sse(monkeypatch):
+    import server
+    monkeypatch.setattr(recipe_maker, "model", StreamingModel())
+    monkeypatch.setattr(recipe_maker, "get_user_foods", lambda *args, **kwargs: FOODS)
+    response = server.app.test_client().post("/generate-recipe/stream", json={})
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == "text/event-stream"
+    assert body.startswith("event: start\ndata: {}\n\n")
+    assert 'event: chunk\ndata: {"text": "**Streamed Recipe**\\n"}\n\n' in body
+    assert "event: done\n" in body
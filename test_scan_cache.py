@@ -0,0 +1,143 @@
+"""
+Tests for the photo scan result cache (backend/scan_cache.py): hits, TTL and
+midnight expiry, LRU eviction, and coalescing of concurrent scans of the
+same photo, including a scan that runs longer than followers will wait:
+
+    python -m pytest -q test_scan_cache.py
+"""
+import io
+import os
+import sys
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import scan_cache  # noqa: E402
+
+
+def photo(colour):
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16), (colour, 40, 40)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+class Scanner:
+    """scan() for get_or_scan: counts calls, optionally holding each one until `gate` is set."""
+
+    def __init__(self, items=("Milk",), gate=None):
+        self.items = [{"item": name} for name in items]
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return list(self.items), 1234
+
+
+@pytest.fixture
+def cache():
+    scan_cache.clear()
+    yield scan_cache.ScanCache()
+    scan_cache.clear()
+
+
+def test_repeat_photo_is_a_hit(cache):
+    scan = Scanner()
+    assert cache.get_or_scan(photo(1), scan) == ([{"item": "Milk"}], False)
+    assert cache.get_or_scan(photo(1), scan) == ([{"item": "Milk"}], True)
+    assert cache.get_or_scan(photo(2), scan)[1] is False  # other photo
+    assert scan.calls == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 2, 1234)
+
+
+def test_empty_results_are_not_cached(cache):
+    scan = Scanner(items=())
+    cache.get_or_scan(photo(3), scan)
+    cache.get_or_scan(photo(3), scan)
+    assert scan.calls == 2
+
+
+def test_results_the_caller_gave_up_on_are_not_cached(cache):
+    scan = Scanner()
+    cache.get_or_scan(photo(11), scan, keep=lambda: False)
+    assert cache.get_or_scan(photo(11), scan, keep=lambda: True)[1] is False
+    assert cache.get_or_scan(photo(11), scan)[1] is True
+    assert scan.calls == 2
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    scan = Scanner()
+    cache.get_or_scan(photo(4), scan)
+    monkeypatch.setattr(scan_cache, "TTL_SECONDS", -1)
+    assert cache.get_or_scan(photo(4), scan)[1] is False
+    assert scan.calls == 2
+
+
+def test_entries_expire_at_midnight(cache):
+    scan = Scanner()
+    cache.get_or_scan(photo(5), scan)
+    with database.connection() as conn:
+        conn.execute("UPDATE scan_cache SET scan_day = '2000-01-01'")  # scanned "yesterday"
+    assert cache.get_or_scan(photo(5), scan)[1] is False
+    assert scan.calls == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    monkeypatch.setattr(scan_cache, "MAX_ENTRIES", 2)
+    scan = Scanner()
+    cache.get_or_scan(photo(6), scan)
+    time.sleep(0.01)
+    cache.get_or_scan(photo(7), scan)
+    time.sleep(0.01)
+    cache.get_or_scan(photo(6), scan)  # 6 is now the most recently used
+    time.sleep(0.01)
+    cache.get_or_scan(photo(8), scan)  # evicts 7
+    assert scan.calls == 3
+    assert cache.get_or_scan(photo(6), scan)[1] is True
+    assert cache.get_or_scan(photo(7), scan)[1] is False
+
+
+def test_concurrent_duplicates_share_one_scan(cache):
+    gate = threading.Event()
+    scan = Scanner(gate=gate)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_scan(photo(9), scan)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert scan.calls == 1
+    assert sorted(cached for _, cached in results) == [False, True, True, True]
+    assert all(items == [{"item": "Milk"}] for items, _ in results)
+
+
+def test_followers_stop_waiting_for_a_stuck_scan(cache, monkeypatch):
+    monkeypatch.setattr(scan_cache, "WAIT_SECONDS", 0.05)
+    gate = threading.Event()
+    stuck = Scanner(items=("Stuck",), gate=gate)
+    leader = threading.Thread(target=lambda: cache.get_or_scan(photo(10), stuck))
+    leader.start()
+    while stuck.calls == 0:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    items, cached = cache.get_or_scan(photo(10), Scanner(items=("Fresh",)))
+    assert (items, cached) == ([{"item": "Fresh"}], False)  # scanned itself, didn't hang
+    assert time.monotonic() - start < 1 and cache.stats()["wait_timeouts"] == 1
+
+    gate.set()
+    leader.join()
+    assert not cache._inflight  # the leader still released its claim
@@ -0,0 +1,199 @@
+"""
+Tests for the durable photo-scan job queue (backend/scan_jobs.py) and the
+/photo_scanner + /scan-jobs/<id> endpoints, offline with stub analysers:
+
+    python -m pytest -q test_scan_jobs.py
+"""
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import scan_jobs  # noqa: E402
+
+
+def photo(name, delay=0.0, fail=False):
+    """Upload stand-in: the 'photo' bytes tell the stub analyser what to do."""
+    return (f"{name}.jpg", f"{name}|{delay}|{int(fail)}".encode())
+
+
+def stub_analyze_iter(data):
+    name, delay, fail = data.decode().split("|")
+    time.sleep(float(delay))
+    if fail == "1":
+        raise RuntimeError("model unavailable")
+    yield {"item": f"{name} apple", "expiration": "5 days", "category": "Fruit"}
+    yield {"item": f"{name} pear", "expiration": "3 days", "category": "Fruit"}
+
+
+@pytest.fixture
+def clean_tables():
+    with database.connection() as conn:
+        conn.execute("DELETE FROM scan_jobs")
+        conn.execute("DELETE FROM scan_job_images")
+
+
+@pytest.fixture
+def job_queue(clean_tables):
+    saved = []
+    queues = []
+
+    def make(workers=2, analyze_iter=stub_analyze_iter):
+        queue = scan_jobs.JobQueue(analyze_iter, saved.append, workers=workers)
+        queue.saved = saved
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue.stop(timeout=5)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_submit_returns_before_the_scan_runs(job_queue):
+    queue = job_queue()
+    start = time.monotonic()
+    job_id = queue.submit([photo("a", delay=0.3)])
+    assert time.monotonic() - start < 0.2
+
+    assert scan_jobs.get_job(job_id)["status"] in ("queued", "running")
+    job = queue.wait(job_id, timeout=5)
+    assert job["status"] == "done"
+    assert job["results"] == [[
+        {"item": "a apple", "expiration": "5 days", "category": "Fruit"},
+        {"item": "a pear", "expiration": "3 days", "category": "Fruit"},
+    ]]
+    assert job["items_found"] == 2
+    assert job["processing_seconds"] >= 0.3
+
+
+def test_progress_is_visible_while_a_job_runs(job_queue):
+    queue = job_queue()
+    job_id = queue.submit([photo("slow", delay=0.6), photo("quick"), photo("broken", fail=True)])
+
+    assert wait_for(lambda: scan_jobs.get_job(job_id)["images_done"] == 2)
+    job = scan_jobs.get_job(job_id)
+    assert job["status"] == "running"
+    assert job["results"][0] is None  # still being analysed
+    assert [entry["item"] for entry in job["results"][1]] == ["quick apple", "quick pear"]
+    assert job["results"][2] == [{"item": "Error", "error": "model unavailable"}]
+
+    job = queue.wait(job_id, timeout=5)
+    assert (job["status"], job["images_done"], job["items_found"]) == ("done", 3, 4)
+    # Each finished photo's items were saved once; the failed one saved nothing
+    assert sorted(len(items) for items in queue.saved) == [2, 2]
+
+
+def test_jobs_queue_up_behind_busy_workers_and_are_measured(job_queue):
+    queue = job_queue(workers=1)
+    first = queue.submit([photo("first", delay=0.3)])
+    second = queue.submit([photo("second")])
+
+    assert wait_for(lambda: scan_jobs.stats()["queued"] == 1 and scan_jobs.stats()["running"] == 1)
+    queue.wait(second, timeout=5)
+
+    stats = scan_jobs.stats()
+    assert (stats["queued"], stats["running"], stats["done"]) == (0, 0, 2)
+    assert scan_jobs.get_job(second)["wait_seconds"] >= 0.25  # waited for the first job
+    assert stats["wait_seconds"]["max"] >= 0.25
+    assert stats["processing_seconds"]["max"] >= 0.3
+    assert scan_jobs.get_job(first)["status"] == "done"
+
+
+def test_jobs_survive_a_restart(job_queue):
+    # A job enqueued, half done and left "running" by a process that died
+    job_id = scan_jobs.enqueue([photo("done-before"), photo("left-over")])
+    with database.connection() as conn:
+        conn.execute("UPDATE scan_jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job_id))
+        conn.execute(
+            "UPDATE scan_job_images SET result = '[{\"item\": \"saved earlier\"}]' WHERE job_id = ? AND idx = 0",
+            (job_id,)
+        )
+        conn.execute("UPDATE scan_jobs SET images_done = 1, items_found = 1 WHERE id = ?", (job_id,))
+
+    queue = job_queue()
+    queue.start()
+    job = queue.wait(job_id, timeout=5)
+
+    assert job["status"] == "done"
+    assert job["results"][0] == [{"item": "saved earlier"}]
+    assert [entry["item"] for entry in job["results"][1]] == ["left-over apple", "left-over pear"]
+    assert len(queue.saved) == 1  # only the photo without a result was analysed again
+    with database.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM scan_job_images WHERE data IS NOT NULL").fetchone()[0] == 0
+
+
+def test_unknown_job():
+    assert scan_jobs.get_job("nope") is None
+
+
+class StubModel:
+    """Offline stand-in for Gemini: one fixed item per photo."""
+
+    def generate_content(self, contents, **kwargs):
+        part = SimpleNamespace(text='{"items": [{"name": "Stub Yogurt", "days": 9, "category": "Dairy"}]}')
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+@pytest.fixture
+def client(monkeypatch, clean_tables):
+    import server
+    import scan_cache
+    scan_cache.clear()
+    monkeypatch.setattr(server.scanner, "model", StubModel())
+    yield server.app.test_client()
+    server.scan_queue.stop(timeout=5)
+
+
+def upload(name):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), (200, 100, len(name))).save(buf, "PNG")
+    buf.seek(0)
+    return buf, name
+
+
+def test_photo_scanner_queues_and_reports_through_scan_jobs(client):
+    response = client.post("/photo_scanner?async=1", data={"images": [upload("a.png"), upload("bb.png")]},
+                           content_type="multipart/form-data")
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.get_json()["status_url"] == f"/scan-jobs/{job_id}"
+
+    assert wait_for(lambda: client.get(f"/scan-jobs/{job_id}").get_json()["status"] == "done")
+    job = client.get(f"/scan-jobs/{job_id}").get_json()
+    assert [[entry["item"] for entry in items] for items in job["results"]] == [["Stub Yogurt"], ["Stub Yogurt"]]
+
+    stats = client.get("/stats/scan-jobs").get_json()
+    assert stats["done"] >= 1 and stats["queued"] == 0
+    assert client.get("/scan-jobs/nope").status_code == 404
+
+
+def test_photo_scanner_answers_synchronously_by_default(client):
+    # The app posts here and reads results[0] from the response
+    response = client.post("/photo_scanner", data={"image": upload("ccc.png")},
+                           content_type="multipart/form-data")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["success"] and body["results"][0][0]["item"] == "Stub Yogurt"
+
+
+def test_prefer_respond_async_queues(client):
+    response = client.post("/photo_scanner", data={"image": upload("dddd.png")},
+                           content_type="multipart/form-data", headers={"Prefer": "respond-async"})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert wait_for(lambda: client.get(f"/scan-jobs/{job_id}").get_json()["status"] == "done")
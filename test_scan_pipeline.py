@@ -0,0 +1,246 @@
+"""
+Offline tests for backend/scan_pipeline.py, run against a stub model in
+place of Gemini:
+
+    python -m pytest -q test_scan_pipeline.py
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import scan_cache  # noqa: E402
+import scan_pipeline  # noqa: E402
+import scanner  # noqa: E402
+
+LATENCY = 0.2
+
+
+class StubModel:
+    """Answers generate_content() after a fixed delay, naming the photo by its colour."""
+
+    def __init__(self, latency=LATENCY, delays=None):
+        self.latency = latency
+        self.delays = delays or {}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def generate_content(self, contents, **kwargs):
+        image = Image.open(io.BytesIO(contents[1]["data"]))
+        colour = round(image.getpixel((0, 0))[0], -1)  # JPEG re-encoding may nudge it
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(colour, self.latency))
+            if colour == 250:
+                raise RuntimeError("model unavailable")
+            text = f"Item: Food {colour}\nExpiration: 5 days\nCategory: Fruit\n"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        part = SimpleNamespace(text=text)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+@pytest.fixture
+def photos(tmp_path):
+    def make(colours):
+        paths = []
+        for colour in colours:
+            path = tmp_path / f"photo_{colour}.png"
+            Image.new("RGB", (8, 8), (colour, 0, 0)).save(path)
+            paths.append(str(path))
+        return paths
+    return make
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    def install(**kwargs):
+        scan_cache.clear()  # photos repeat across tests; every test should reach the model
+        model = StubModel(**kwargs)
+        monkeypatch.setattr(scanner, "model", model)
+        return model
+    return install
+
+
+def analyze(path):
+    return scanner.analyze_image(path, save=False)
+
+
+def item_names(results):
+    return [r["items"][0]["item"] for r in results]
+
+
+def test_wall_clock_approaches_slowest_image(photos, stub_model):
+    stub_model()
+    paths = photos([10, 20, 30, 40])
+
+    start = time.monotonic()
+    results = scan_pipeline.scan_images(paths, analyze, max_concurrency=4)
+    elapsed = time.monotonic() - start
+
+    assert item_names(results) == ["Food 10", "Food 20", "Food 30", "Food 40"]
+    assert elapsed < LATENCY * 2  # sequential would be LATENCY * 4
+
+
+def test_results_keep_upload_order_when_later_images_finish_first(photos, stub_model):
+    stub_model(delays={10: 0.3, 20: 0.05, 30: 0.15})
+    results = scan_pipeline.scan_images(photos([10, 20, 30]), analyze, max_concurrency=3)
+
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert item_names(results) == ["Food 10", "Food 20", "Food 30"]
+
+
+def test_per_request_limit_bounds_concurrency(photos, stub_model):
+    model = stub_model(latency=0.05)
+    results = scan_pipeline.scan_images(photos(range(10, 70, 10)), analyze, max_concurrency=2)
+
+    assert len(results) == 6
+    assert model.max_in_flight == 2
+
+
+def test_failed_image_does_not_sink_the_others(photos, stub_model):
+    stub_model(latency=0.01)
+    results = scan_pipeline.scan_images(photos([10, 250, 30]), analyze)
+
+    assert results[1]["error"] == "model unavailable"
+    assert results[0]["items"][0]["item"] == "Food 10"
+    assert results[2]["items"][0]["item"] == "Food 30"
+
+
+def test_slow_image_times_out(photos, stub_model):
+    stub_model(latency=0.01, delays={20: 1.0})
+
+    start = time.monotonic()
+    results = scan_pipeline.scan_images(photos([10, 20]), analyze, timeout=0.2)
+    elapsed = time.monotonic() - start
+
+    assert "items" in results[0]
+    assert results[1]["error"].startswith("Timed out")
+    assert elapsed < 0.8
+
+
+def wait_idle(model, timeout=5):
+    deadline = time.monotonic() + timeout
+    while model.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # let the abandoned worker finish with the scan cache
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_a_timed_out_photo_is_scanned_again_on_retry(photos, stub_model, streaming):
+    model = stub_model(delays={30: 0.4})
+    path = photos([30])
+
+    def scan(timeout):
+        if streaming:
+            events = scan_pipeline.stream_images(path, lambda p: scanner.iter_analyze_image(p, save=False),
+                                                 timeout=timeout)
+            return [event["item"] for event in events if event["event"] == "item"]
+        return scan_pipeline.scan_images(path, analyze, timeout=timeout)[0].get("items", [])
+
+    assert scan(0.1) == []  # timed out: nothing returned, nothing saved
+    wait_idle(model)  # the abandoned analysis ran to the end in the background
+
+    retried = scan(5)
+    assert [entry["item"] for entry in retried] == ["Food 30"]
+    assert not any(entry.get("cached") for entry in retried)  # so save_items adds them this time
+    assert scan(5)[0].get("cached")  # a completed scan is cached as before
+
+
+def test_empty_upload():
+    assert scan_pipeline.scan_images([], analyze) == []
+
+
+def slow_items(delays):
+    """analyze_iter stand-in: photo `source` yields one item per delay, after that delay."""
+    def analyze_iter(source):
+        for n, delay in enumerate(delays[source]):
+            if delay < 0:
+                raise RuntimeError("model unavailable")
+            time.sleep(delay)
+            yield {"item": f"{source}-{n}"}
+    return analyze_iter
+
+
+def timed(events):
+    start = time.monotonic()
+    return [(round(time.monotonic() - start, 2), event) for event in events]
+
+
+def test_stream_yields_each_item_as_soon_as_it_is_found():
+    analyze_iter = slow_items({"slow": [0.4], "fast": [0.05, 0.1]})
+    events = timed(scan_pipeline.stream_images(["slow", "fast"], analyze_iter, max_concurrency=2))
+
+    first_at, first = events[0]
+    assert first == {"event": "item", "index": 1, "item": {"item": "fast-0"}}
+    assert first_at < 0.2  # not held back by the slow photo
+    assert [e["item"]["item"] for _, e in events if e["event"] == "item"] == ["fast-0", "fast-1", "slow-0"]
+    images = {e["index"]: e for _, e in events if e["event"] == "image"}
+    assert images[0]["items"] == 1 and images[1]["items"] == 2
+
+
+def test_stream_reports_failed_and_timed_out_photos():
+    analyze_iter = slow_items({"ok": [0.01], "broken": [0.01, -1], "stuck": [0.01, 1.0, 0.01]})
+    events = list(scan_pipeline.stream_images(["ok", "broken", "stuck"], analyze_iter, timeout=0.3))
+
+    images = {e["index"]: e for e in events if e["event"] == "image"}
+    assert images[0]["items"] == 1
+    assert images[1]["error"] == "model unavailable"
+    assert images[2]["error"].startswith("Timed out")
+    # Items found before a failure or timeout were still passed on
+    assert sorted(e["item"]["item"] for e in events if e["event"] == "item") == ["broken-0", "ok-0", "stuck-0"]
+
+
+def test_stream_endpoint_sends_items_before_the_batch_finishes(photos, monkeypatch):
+    import server
+    # Colours no other test uses: a timed-out scan elsewhere may still be filling the cache
+    model = StubModel(delays={110: 0.05, 120: 0.4})
+    scan_cache.clear()
+    monkeypatch.setattr(server.scanner, "model", model)
+    paths = photos([110, 120])
+    files = [(open(path, "rb"), os.path.basename(path)) for path in paths]
+    try:
+        response = server.app.test_client().post(
+            "/photo_scanner/stream?format=ndjson", data={"images": files},
+            content_type="multipart/form-data", buffered=False,
+        )
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.response  # the generator, read as the client would
+        events = [(time.monotonic(), json.loads(line)) for line in lines]
+    finally:
+        for f, _ in files:
+            f.close()
+
+    kinds = [event["event"] for _, event in events]
+    assert kinds[0] == "start" and kinds[-1] == "done"
+    items = [event for _, event in events if event["event"] == "item"]
+    assert [event["item"]["item"] for event in items] == ["Food 110", "Food 120"]
+    first_item_at = next(at for at, event in events if event["event"] == "item")
+    assert events[-1][0] - first_item_at > 0.2  # the first photo's items arrived well before the end
+    assert events[-1][1]["items"] == 2
+
+
+def test_stream_endpoint_speaks_sse(photos, monkeypatch):
+    import server
+    scan_cache.clear()
+    monkeypatch.setattr(server.scanner, "model", StubModel(latency=0.01))
+    with open(photos([130])[0], "rb") as f:
+        body = server.app.test_client().post(
+            "/photo_scanner/stream", data={"image": (f, "photo.png")}, content_type="multipart/form-data",
+        ).get_data(as_text=True)
+
+    assert body.startswith("event: start\ndata: {\"images\": 1}\n\n")
+    assert 'event: item\ndata: {"index": 0, "item": {"item": "Food 130"' in body
+    assert "event: done\n" in body
@@ -0,0 +1,150 @@
+"""
+Tests for reading the scanner model's answer (backend/scan_response.py),
+with recorded responses from fixtures/gemini/ and a stub model in place
+of Gemini:
+
+    python -m pytest -q test_scan_response.py
+"""
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import scan_cache  # noqa: E402
+import scan_response  # noqa: E402
+import scanner  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "gemini")
+TODAY = datetime(2025, 10, 1)
+
+
+def recorded(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def response(text):
+    part = SimpleNamespace(text=text)
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+def names(items):
+    return [item["item"] for item in items]
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 10000])
+def test_json_items_are_the_same_however_the_stream_is_split(size):
+    items = list(scan_response.iter_items(chunked(recorded("json_items.json"), size), TODAY))
+
+    assert names(items) == ["Whole Milk", "Baby Spinach", '"Hot" Salsa {mild}', "Cheddar Cheese"]
+    milk, spinach, salsa, cheddar = items
+    assert milk == {"item": "Whole Milk", "expiration": "2025-10-09", "category": "Dairy", "days": 8, "confidence": 0.95}
+    assert spinach["expiration"] == "2025-10-06"  # from days; no lookup needed later
+    assert salsa["expiration"] == "Best by Oct 20" and "days" not in salsa
+    assert (cheddar["expiration"], cheddar["days"], cheddar["confidence"]) == ("2025-10-22", 21, 0.9)
+
+
+def test_items_are_yielded_before_the_stream_ends():
+    text = recorded("json_items.json")
+    stream = scan_response.ItemStream(TODAY)
+    first_close = text.index("}") + 1
+
+    assert stream.feed(text[:first_close - 1]) == []
+    assert names(stream.feed(text[first_close - 1:first_close])) == ["Whole Milk"]
+
+
+def test_fenced_array_with_prose_around_it():
+    items = list(scan_response.iter_items(chunked(recorded("json_fenced.txt"), 16), TODAY))
+    assert names(items) == ["Bananas", "Greek Yogurt"]
+    assert items[0]["expiration"] == "2025-10-05"
+
+
+def test_truncated_reply_keeps_the_complete_items():
+    items = list(scan_response.iter_items([recorded("json_truncated.txt")], TODAY))
+    assert names(items) == ["Eggs"]
+
+
+def test_text_reply_falls_back_to_the_line_parser():
+    items = list(scan_response.iter_items(chunked(recorded("text_items.txt"), 5), TODAY))
+    assert items == [
+        {"item": "Strawberries", "expiration": "3-5 days", "category": "Fruit"},
+        # "item" inside the expiration text no longer starts a new item
+        {"item": "Yogurt", "expiration": "Check the date printed near the item barcode", "category": "Dairy"},
+        {"item": "Bread", "expiration": "2025-10-06", "category": "Grain"},
+    ]
+
+
+@pytest.mark.parametrize("text", ['{"items": []}', "[]", "", "I can't see any food in this photo."])
+def test_nothing_found(text):
+    assert list(scan_response.iter_items([text], TODAY)) == []
+
+
+def test_single_object_reply():
+    assert names(scan_response.iter_items(['{"name": "Apple", "days": 10}'], TODAY)) == ["Apple"]
+
+
+class StubModel:
+    """Streams a recorded reply back in small chunks, like generate_content(stream=True)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def generate_content(self, contents, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return [response(chunk) for chunk in chunked(self.text, 20)]
+        return response(self.text)
+
+
+@pytest.fixture
+def photo(tmp_path):
+    from PIL import Image
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (8, 8), (40, 80, 120)).save(path)
+    return str(path)
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    scan_cache.clear()
+    asked = []
+
+    def estimate_expirations(names):
+        asked.extend(names)
+        return ["2025-12-31"] * len(names)
+    monkeypatch.setattr(scanner, "estimate_expirations", estimate_expirations)
+    return asked
+
+
+def test_json_mode_streams_and_skips_lookups_for_items_with_days(monkeypatch, photo, lookups):
+    model = StubModel(recorded("json_items.json"))
+    monkeypatch.setattr(scanner, "model", model)
+    monkeypatch.setattr(scanner, "SCAN_OUTPUT", "json")
+
+    items = scanner.analyze_image(photo, save=False)
+
+    assert model.calls == [{"generation_config": scanner.JSON_CONFIG, "stream": True}]
+    assert names(items) == ["Whole Milk", "Baby Spinach", '"Hot" Salsa {mild}', "Cheddar Cheese"]
+    assert all(item["expiration"] for item in items)
+    assert lookups == []
+
+
+def test_text_mode_and_non_json_replies_still_work(monkeypatch, photo, lookups):
+    model = StubModel("Item: Mystery Jar\nCategory: Condiment\n")
+    monkeypatch.setattr(scanner, "model", model)
+    monkeypatch.setattr(scanner, "SCAN_OUTPUT", "text")
+
+    items = scanner.analyze_image(photo, save=False)
+
+    assert model.calls == [{}]
+    assert items == [{"item": "Mystery Jar", "expiration": "2025-12-31", "category": "Condiment"}]
+    assert lookups == ["Mystery Jar"]
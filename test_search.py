@@ -0,0 +1,96 @@
+"""
+Tests for ingredient search (backend/ingredient_search.py and GET /search):
+ranking, limit, dedupe across passes and typo tolerance:
+
+    python -m pytest -q test_search.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import food_data  # noqa: E402
+import ingredient_search  # noqa: E402
+
+# Made-up names, so other tests' rows in the shared test database never match
+FOODS = [
+    ("Zorbel jam", "Preserves"),
+    ("Zorbel", "Fruit"),
+    ("Zorbelberry pie", "Bakery"),
+    ("Dried zorbel", "Fruit"),
+    ("Quimbo zorbel zest", "Spice"),
+    ("Plumquat", "Fruit"),
+]
+
+
+@pytest.fixture(autouse=True)
+def foods():
+    for name, category in FOODS:
+        food_data.add_food(name, 10, category)
+    yield
+    with database.connection() as conn:
+        conn.executemany("DELETE FROM food WHERE name = ?", [(name,) for name, _ in FOODS])
+
+
+def names(results):
+    return [item["name"] for item in results]
+
+
+def test_substring_ranks_prefix_hits_then_shorter_names():
+    results = ingredient_search.search("zorbel")
+    assert names(results)[:3] == ["Zorbel", "Zorbel jam", "Zorbelberry pie"]
+    assert set(names(results)[3:]) == {"Dried zorbel", "Quimbo zorbel zest"}
+    assert all(item["score"] == 1.0 for item in results)
+
+
+def test_limit():
+    assert len(ingredient_search.search("zorbel", limit=2)) == 2
+    assert len(ingredient_search.search("zorbel", limit=0)) == 1  # at least one
+    assert len(ingredient_search.search("zorbel", limit=10 ** 6)) == 5  # capped at MAX_LIMIT
+
+
+def test_short_prefix_matches_later_words_once():
+    results = ingredient_search.search("zo")
+    zorbel = [item for item in results if item["name"].lower().startswith("zorbel")]
+    later = [item for item in results if item["name"] in ("Dried zorbel", "Quimbo zorbel zest")]
+    assert len(zorbel) == 3 and all(item["score"] == 1.0 for item in zorbel)
+    assert len(later) == 2 and all(item["score"] == 0.9 for item in later)
+    assert len(names(results)) == len(set(item["id"] for item in results))  # no row twice
+    assert names(results).index("Zorbel") < names(results).index("Dried zorbel")
+
+
+def test_word_prefix_row_that_also_starts_with_the_prefix_is_not_repeated():
+    food_data.add_food("Zo zo snack", 10, "Snack")  # matches both "zo%" and "% zo%"
+    try:
+        results = ingredient_search.search("zo")
+        assert names(results).count("Zo zo snack") == 1
+    finally:
+        with database.connection() as conn:
+            conn.execute("DELETE FROM food WHERE name = 'Zo zo snack'")
+
+
+def test_typos_are_tolerated():
+    results = ingredient_search.search("plumqat")
+    assert names(results)[0] == "Plumquat" and results[0]["score"] < 1.0
+    assert ingredient_search.search("plumqat", fuzzy=False) == []
+
+
+def test_endpoint_returns_real_categories_only():
+    import server
+    client = server.app.test_client()
+    body = client.get("/search?q=zorbel").get_json()
+    assert body["name"] == "Zorbel" and body["category"] == "Fruit"
+    assert [r["category"] for r in body["results"][:2]] == ["Fruit", "Preserves"]
+
+    # Catalog rows have no category: none is made up
+    food_data.add_to_catalog("Zorbel nectar", 30)
+    try:
+        body = client.get("/search?q=zorbel&source=catalog").get_json()
+        assert body["name"] == "Zorbel nectar" and "category" not in body
+    finally:
+        with database.connection() as conn:
+            conn.execute("DELETE FROM food_catalog WHERE name = 'Zorbel nectar'")
+    assert client.get("/search?q=nothingcalledthis").status_code == 404
@@ -0,0 +1,152 @@
+"""
+Tests for the shelf-life store and the pooled StillTasty fetcher in front
+of it, against the local stand-in in fake_stilltasty.py:
+
+    python -m pytest -q test_shelf_life.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import database  # noqa: E402
+import food_data  # noqa: E402,F401  (creates food_catalog, which seeds the shelf_life table)
+import shelf_life_api  # noqa: E402
+import shelf_life_store  # noqa: E402
+from fake_stilltasty import FakeStillTasty  # noqa: E402
+
+
+def in_days(days):
+    return (datetime.today() + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def site(monkeypatch):
+    with database.connection() as conn:
+        conn.execute("DELETE FROM shelf_life WHERE source NOT IN ('catalog', 'csv')")
+    with FakeStillTasty() as fake:
+        monkeypatch.setattr(shelf_life_api, "STILLTASTY_BASE_URL", fake.url)
+        monkeypatch.setattr(shelf_life_api, "FETCH_BACKOFF", 0.01)
+        monkeypatch.setattr(shelf_life_api, "_session", None)  # pick up the short backoff
+        yield fake
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("Tomatoes", "tomato"),
+    ("  Roma TOMATOES! ", "roma tomato"),
+    ("Blueberries", "blueberry"),
+    ("peaches", "peach"),
+    ("Eggs", "egg"),
+    ("hummus", "hummus"),
+    ("swiss", "swiss"),
+])
+def test_normalize_name(raw, key):
+    assert shelf_life_store.normalize_name(raw) == key
+
+
+def test_seeded_items_never_hit_the_network(site):
+    # food_data.csv has tomato,146
+    assert shelf_life_api.estimate_expiration("Tomatoes") == in_days(146)
+    assert site.hits == 0
+
+
+def test_cold_miss_fetches_once_then_serves_from_the_store(site):
+    assert shelf_life_api.estimate_expiration("Sourdough Bread") == in_days(6)
+    assert site.hits == 2  # search page + item page
+
+    assert shelf_life_api.estimate_expiration("sourdough bread") == in_days(6)
+    assert site.hits == 2
+    assert shelf_life_store.lookup("Sourdough  Bread")["source"] == "stilltasty"
+
+
+def test_text_without_days_is_kept_as_text(site):
+    text = site.foods["mystery sauce"]
+    assert shelf_life_api.estimate_expiration("Mystery Sauce") == text
+    assert shelf_life_api.estimate_expiration("Mystery Sauce") == text
+    assert site.hits == 2
+
+
+def test_not_found_is_negatively_cached(site):
+    assert shelf_life_api.estimate_expiration("unobtainium") == in_days(7)
+    assert site.hits == 1  # search page only
+
+    assert shelf_life_api.estimate_expiration("Unobtainium") == in_days(7)
+    assert site.hits == 1
+    assert shelf_life_store.lookup("unobtainium")["found"] is False
+
+
+def test_expired_entries_are_refreshed(site, monkeypatch):
+    assert shelf_life_api.estimate_expiration("tempeh") == in_days(4)
+    monkeypatch.setattr(shelf_life_store, "TTL_SECONDS", -1)
+    site.foods["tempeh"] = "Tempeh lasts 7 days in the refrigerator after opening"
+
+    assert shelf_life_api.estimate_expiration("tempeh") == in_days(7)
+    assert site.hits == 4
+
+
+def test_outage_is_not_cached_as_not_found(site):
+    site.fail_first = shelf_life_api.FETCH_RETRIES + 1
+    assert shelf_life_api.estimate_expiration("kimchi") == in_days(7)
+    assert shelf_life_store.lookup("kimchi") is None
+
+    assert shelf_life_api.estimate_expiration("kimchi") == in_days(135)
+
+
+def test_transient_errors_are_retried(site):
+    site.fail_first = shelf_life_api.FETCH_RETRIES
+    assert shelf_life_api.estimate_expiration("kimchi") == in_days(135)
+    assert site.hits == shelf_life_api.FETCH_RETRIES + 2
+
+
+def test_session_keeps_connections_alive(site):
+    shelf_life_api.estimate_expirations(["sourdough bread"])
+    shelf_life_api.estimate_expiration("hummus")
+    assert site.hits == 4
+    assert len(site.connections) == 1
+
+
+def test_batch_fetches_concurrently_and_keeps_order(site):
+    site.latency = 0.1
+    names = ["sourdough bread", "hummus", "tempeh", "ricotta cheese", "fresh basil", "smoked salmon"]
+
+    start = time.monotonic()
+    estimates = shelf_life_api.estimate_expirations(names)
+    elapsed = time.monotonic() - start
+
+    assert estimates == [in_days(6), in_days(5), in_days(4), in_days(6), in_days(8), in_days(14)]
+    assert elapsed < 0.2 * len(names) / 2  # sequential is 2 fetches x 0.1s per item
+    assert 1 < site.max_in_flight <= shelf_life_api.MAX_CONCURRENT_FETCHES
+
+
+def test_duplicate_names_in_flight_share_one_fetch(site):
+    site.latency = 0.05
+    estimates = shelf_life_api.estimate_expirations(["Hummus", "hummus", "HUMMUS ", "tomato", "hummus"])
+
+    assert estimates == [in_days(5)] * 3 + [in_days(146), in_days(5)]
+    assert site.hits == 2
+
+
+def test_remote_answers_never_replace_seeded_values(site):
+    shelf_life_store.store("tomato", 2, "2 days")
+    assert shelf_life_store.lookup("tomato")["days"] == 146
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stilltasty")
+PARSERS = ["html.parser"] + (["lxml"] if shelf_life_api.DEFAULT_HTML_PARSER == "lxml" else [])
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_extraction_from_saved_pages(parser):
+    assert shelf_life_api.extract_result_path(fixture("search_hummus.html"), parser) == "/fooditems/index/18000"
+    assert shelf_life_api.extract_result_path(fixture("search_none.html"), parser) is None
+    assert shelf_life_api.extract_answer(fixture("item_hummus.html"), parser) == "4-6 days after opening"
+    assert shelf_life_api.extract_answer("<div class='summary'>Use within 3 days</div>", parser) == "Use within 3 days"
@@ -0,0 +1,156 @@
+"""
+Tests for scanning photos straight from memory (backend/uploads.py): every
+kind of source analyze_image accepts, the spool-to-disk fallback for big
+uploads, and concurrent uploads through the Flask endpoints, with a stub
+model in place of Gemini:
+
+    python -m pytest -q test_uploads.py
+"""
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import scan_cache  # noqa: E402
+import scanner  # noqa: E402
+import uploads  # noqa: E402
+
+
+class StubModel:
+    """Names the photo by the red value of its first pixel."""
+
+    def generate_content(self, contents, **kwargs):
+        colour = round(Image.open(io.BytesIO(contents[1]["data"])).getpixel((0, 0))[0], -1)
+        part = SimpleNamespace(text=f"Item: Food {colour}\nExpiration: 5 days\nCategory: Fruit\n")
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+def png(colour, noisy=False):
+    im = Image.new("RGB", (64, 64), (colour, 7, 7))
+    if noisy:  # incompressible, so the PNG is big enough to spill to disk
+        rng = random.Random(colour)
+        for x in range(64):
+            for y in range(8, 64):  # below the first JPEG block, which names the photo
+                im.putpixel((x, y), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buf = io.BytesIO()
+    im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+class OneWayStream(io.RawIOBase):
+    """A stream that can only be read forwards, like a raw request body."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._data.readinto(b)
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    scan_cache.clear()
+    monkeypatch.setattr(scanner, "model", StubModel())
+
+
+def names(items):
+    return [item["item"] for item in items]
+
+
+@pytest.mark.parametrize("wrap", [
+    bytes, bytearray, memoryview, io.BytesIO, OneWayStream,
+    lambda data: FileStorage(io.BytesIO(data), "photo.png"),
+])
+def test_analyze_image_takes_photos_in_memory(stub_model, wrap):
+    assert names(scanner.analyze_image(wrap(png(10)), save=False)) == ["Food 10"]
+
+
+def test_analyze_image_still_takes_a_path(stub_model, tmp_path):
+    path = tmp_path / "photo.png"
+    path.write_bytes(png(20))
+    assert names(scanner.analyze_image(str(path), save=False)) == ["Food 20"]
+
+
+def test_in_memory_uploads_are_not_copied_to_disk():
+    data = png(30)
+    with uploads.image_data(FileStorage(io.BytesIO(data), "photo.png")) as got:
+        assert got == data and isinstance(got, bytes)
+    spool = tempfile.SpooledTemporaryFile(max_size=len(data) + 1)
+    spool.write(data)
+    with uploads.image_data(FileStorage(spool, "photo.png")) as got:
+        assert got == data and not spool._rolled
+
+
+def test_big_photos_are_scanned_from_disk(stub_model, monkeypatch, tmp_path):
+    data = png(40, noisy=True)
+    monkeypatch.setattr(uploads, "SPOOL_MAX_BYTES", len(data) // 2)
+
+    path = tmp_path / "big.png"
+    path.write_bytes(data)
+    with uploads.image_data(str(path)) as got:
+        assert hasattr(got, "read")  # an open file, not the whole photo in memory
+    with uploads.image_data(OneWayStream(data)) as got:
+        assert hasattr(got, "read") and got._rolled
+        assert got.read() == data
+
+    assert names(scanner.analyze_image(str(path), save=False)) == ["Food 40"]
+    assert names(scanner.analyze_image(OneWayStream(data), save=False)) == ["Food 40"]
+    # The same photo from memory hits the cache entry the file scan stored
+    assert scanner.analyze_image(data, save=False)[0].get("cached")
+
+
+def test_spooled_request_keeps_small_uploads_in_memory(monkeypatch):
+    from flask import Flask, request
+    small, big = png(50), png(60, noisy=True)
+    monkeypatch.setattr(uploads, "SPOOL_MAX_BYTES", (len(small) + len(big)) // 2)
+    app = Flask(__name__)
+    app.request_class = uploads.SpooledRequest
+    seen = {}
+
+    @app.route("/upload", methods=["POST"])
+    def upload():
+        for key, upload in request.files.items():
+            seen[key] = (upload.stream._rolled, upload.read())
+        return "ok"
+
+    app.test_client().post("/upload", content_type="multipart/form-data", data={
+        "small": (io.BytesIO(small), "small.png"),
+        "big": (io.BytesIO(big), "big.png"),
+    })
+    assert seen == {"small": (False, small), "big": (True, big)}
+
+
+def test_concurrent_stream_uploads_keep_their_own_photos(monkeypatch):
+    import server
+    scan_cache.clear()
+    monkeypatch.setattr(server.scanner, "model", StubModel())
+    colours = [70, 80, 90, 100, 140, 150, 160, 170]
+    found = {}
+
+    def post(colour):
+        client = server.app.test_client()
+        body = client.post("/photo_scanner/stream?format=ndjson", content_type="multipart/form-data",
+                           data={"image": (io.BytesIO(png(colour)), "photo.png")}).get_data(as_text=True)
+        events = [json.loads(line) for line in body.splitlines()]
+        found[colour] = [event["item"]["item"] for event in events if event["event"] == "item"]
+
+    threads = [threading.Thread(target=post, args=(colour,)) for colour in colours]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert found == {colour: [f"Food {colour}"] for colour in colours}
@@ -1,97 +1,99 @@
-import sqlite3
 from datetime import datetime, timedelta
 import os
+import sys
 
-BASE_DIR = os.path.dirname(__file__)
-DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(BASE_DIR, "backend")
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import database
+import inventory_sync
+import expiry_cache
+import catalog_index
+
+DB_NAME = database.FOOD_DB
 
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Borrow a pooled connection to foodapp.db (use as a context manager)."""
+    return database.connection()
 
 # ====== DATABASE INITIALIZATION ======
-conn = get_connection()
-cursor = conn.cursor()
-
-# User's personal food table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS user_food (
-    user_id INTEGER,
-    food_name TEXT,
-    date_added TEXT,
-    expire_days INTEGER,
-    nutrition TEXT
-)
-""")
-
-# User's favorites table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS user_favorites (
-    user_id INTEGER,
-    item_name TEXT,
-    date_added TEXT
-)
-""")
-
-conn.commit()
-conn.close()
+# Run by database.ensure_schema() before foodapp.db is first used (or by database.bootstrap())
+def ensure_schema(conn):
+    cursor = conn.cursor()
+
+    # User's personal food table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_food (
+        user_id INTEGER,
+        food_name TEXT,
+        date_added TEXT,
+        expire_days INTEGER,
+        nutrition TEXT,
+        expires_on TEXT
+    )
+    """)
+
+    # User's favorites table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS user_favorites (
+        user_id INTEGER,
+        item_name TEXT,
+        date_added TEXT
+    )
+    """)
+
+database.register_schema(ensure_schema)
 
 # ====== USER FOOD FUNCTIONS ======
 def add_user_food(user_id, food_name, expire_days=None, nutrition=""):
-    conn = get_connection()
-    cursor = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
     if expire_days is None:
-        expire_days = 3  # default expire days
-    cursor.execute(
-        "INSERT INTO user_food (user_id, food_name, date_added, expire_days, nutrition) VALUES (?, ?, ?, ?, ?)",
-        (user_id, food_name, today, expire_days, nutrition)
-    )
-    conn.commit()
-    conn.close()
+        expire_days = catalog_index.default_days(food_name, 3)  # catalog default, else 3 days
+    expires_on = (now + timedelta(days=expire_days)).strftime("%Y-%m-%d")
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO user_food (user_id, food_name, date_added, expire_days, nutrition, expires_on) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, food_name, today, expire_days, nutrition, expires_on)
+        )
+    expiry_cache.invalidate(inventory_sync.inventory_name(user_id))
     print(f"Added '{food_name}' for user_id {user_id}.")
 
 def check_user_food_status(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    today = datetime.now()
-    cursor.execute(
-        "SELECT food_name, date_added, expire_days, nutrition FROM user_food WHERE user_id=?",
-        (user_id,)
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    today = datetime.now().strftime("%Y-%m-%d")
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT food_name, CAST(julianday(expires_on) - julianday(?) AS INTEGER) - 1, nutrition "
+            "FROM user_food WHERE user_id=?",
+            (today, user_id)
+        ).fetchall()
 
     result = []
-    for name, date_added, expire_days, nutrition in rows:
-        date_added_dt = datetime.strptime(date_added, "%Y-%m-%d")
-        expire_date = date_added_dt + timedelta(days=expire_days)
-        days_left = (expire_date - today).days
+    for name, days_left, nutrition in rows:
+        if days_left is None:
+            continue  # invalid date_added
         status = "expired" if days_left < 0 else f"good, {days_left} days left"
         result.append((name, status, nutrition))
     return result
 
 # ====== USER FAVORITES FUNCTIONS ======
 def add_to_favorites(user_id, item_name):
-    conn = get_connection()
-    cursor = conn.cursor()
     today = datetime.now().strftime("%Y-%m-%d")
-    cursor.execute(
-        "INSERT INTO user_favorites (user_id, item_name, date_added) VALUES (?, ?, ?)",
-        (user_id, item_name, today)
-    )
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO user_favorites (user_id, item_name, date_added) VALUES (?, ?, ?)",
+            (user_id, item_name, today)
+        )
     print(f"Added '{item_name}' to favorites for user_id {user_id}.")
 
 def list_favorites(user_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT item_name, date_added FROM user_favorites WHERE user_id=?",
-        (user_id,)
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT item_name, date_added FROM user_favorites WHERE user_id=?",
+            (user_id,)
+        ).fetchall()
     if not rows:
         print("No favorites yet.")
         return []
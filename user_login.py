@@ -2,58 +2,58 @@ import sqlite3
 import hashlib
 from datetime import datetime
 import os
+import sys
 
-BASE_DIR = os.path.dirname(__file__)
-DB_NAME = os.path.join(BASE_DIR, "foodapp.db")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+backend_path = os.path.join(BASE_DIR, "backend")
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import database
+
+DB_NAME = database.FOOD_DB
 
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Borrow a pooled connection to foodapp.db (use as a context manager)."""
+    return database.connection()
 
-# 初始化 user 表
-conn = get_connection()
-cursor = conn.cursor()
+# 初始化 user 表 (run by database.ensure_schema() before foodapp.db is first used)
+def ensure_schema(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        email TEXT,
+        password TEXT,
+        created_at TEXT
+    )
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS user (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE,
-    email TEXT,
-    password TEXT,
-    created_at TEXT
-)
-""")
-conn.commit()
-conn.close()
+database.register_schema(ensure_schema)
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def register_user(username, email, password):
-    conn = get_connection()
-    cursor = conn.cursor()
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     password_hash = hash_password(password)
     try:
-        cursor.execute(
-            "INSERT INTO user (username, email, password, created_at) VALUES (?, ?, ?, ?)",
-            (username, email, password_hash, created_at)
-        )
-        conn.commit()
+        with get_connection() as conn:
+            conn.execute(
+                "INSERT INTO user (username, email, password, created_at) VALUES (?, ?, ?, ?)",
+                (username, email, password_hash, created_at)
+            )
         print(f"User '{username}' registered successfully.")
     except sqlite3.IntegrityError:
         print(f"Username '{username}' already exists.")
-    conn.close()
 
 def login_user(username, password):
-    conn = get_connection()
-    cursor = conn.cursor()
     password_hash = hash_password(password)
-    cursor.execute(
-        "SELECT id FROM user WHERE username=? AND password=?",
-        (username, password_hash)
-    )
-    row = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT id FROM user WHERE username=? AND password=?",
+            (username, password_hash)
+        ).fetchone()
     if row:
         print(f"User '{username}' logged in.")
         return row[0]  # 返回 user_id